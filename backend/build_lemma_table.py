@@ -0,0 +1,74 @@
+# build_lemma_table.py
+"""
+Construction hors ligne de la table de lemmes (data/lemmas.bin).
+
+Lemmatise chaque mot du dictionnaire et du vocabulaire N-gram : en
+service, les mots connus sont ensuite lemmatisés par simple recherche.
+À relancer après une mise à jour du dictionnaire, du modèle N-gram ou
+des inventaires d'affixes de MalagasyLemmatizer.
+
+Usage (depuis backend/) :
+    python build_lemma_table.py
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Permet de lancer le script depuis backend/ (chemins data/...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.nlp.algorithmic import MalagasyLemmatizer
+from backend.nlp.compact_ngram import load_ngram_model
+from backend.nlp.dictionary_loader import MalagasyDictionary
+from backend.nlp.lemma_table import LEMMA_TABLE_PATH, LemmaTable, build_lemma_table
+
+# Lemmes de référence vérifiés après chaque construction (mot -> racine)
+REFERENCE_LEMMAS = {
+    "mandeha": "deha",
+    "misotro": "sotro",
+}
+
+
+def check_reference_lemmas(filepath: str) -> bool:
+    """Vérifie les lemmes de référence dans la table écrite"""
+    table = LemmaTable(filepath)
+    ok = True
+    for word, root in REFERENCE_LEMMAS.items():
+        result = table.lookup(word)
+        found = result["root"] if result is not None else None
+        if found != root:
+            print(f"  Erreur : {word} -> {found} (attendu : {root})")
+            ok = False
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction de la table de lemmes")
+    parser.add_argument("--ngram-model", default="data/ngram_model.bin",
+                        help="Modèle N-gram dont le vocabulaire est inclus")
+    parser.add_argument("--output", default=LEMMA_TABLE_PATH, help="Table de sortie")
+    args = parser.parse_args()
+
+    started = time.time()
+
+    dictionary = MalagasyDictionary()
+    words = set(dictionary.words)
+    if Path(args.ngram_model).exists():
+        model = load_ngram_model(args.ngram_model)
+        vocabulary = model.words() if hasattr(model, "words") else model.word_freq
+        words.update(vocabulary)
+        print(f" Vocabulaire N-gram inclus : {args.ngram_model}")
+
+    # Même classement des segmentations qu'en service
+    lemmatizer = MalagasyLemmatizer()
+    lemmatizer.roots = dictionary.words
+    build_lemma_table(words, lemmatizer, args.output)
+    if not check_reference_lemmas(args.output):
+        sys.exit(1)
+    print(f" Durée : {time.time() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
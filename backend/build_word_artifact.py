@@ -0,0 +1,64 @@
+# build_word_artifact.py
+"""
+Construction hors ligne de l'artefact binaire des mots (data/malagasy_words.bin).
+
+Les mots viennent du dictionnaire (base + malagasy_words.txt + JSON) et
+des listes extraites de Wikipedia. Avec --front-coded, les mots sont
+codés par préfixes : quelques octets par mot, adapté aux vocabulaires de
+corpus complets et aux formes fléchies.
+
+Usage (depuis backend/) :
+    python build_word_artifact.py --front-coded
+    python build_word_artifact.py --extra corpus/formes.txt --output data/malagasy_words.bin
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Permet de lancer le script depuis backend/ (chemins data/...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.merge_wikipedia_words import load_words
+from backend.nlp.dictionary_loader import (
+    WORD_ARTIFACT_PATH,
+    CompactWordSet,
+    MalagasyDictionary,
+    build_word_artifact
+)
+
+# Listes extraites par scraper.py
+SCRAPED_WORD_LISTS = ("data/wikipedia_direct_words.txt", "data/wikipedia_search_words.txt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construction de l'artefact binaire des mots")
+    parser.add_argument("--extra", nargs="*", default=list(SCRAPED_WORD_LISTS),
+                        help="Listes de mots supplémentaires (un mot par ligne)")
+    parser.add_argument("--front-coded", action="store_true",
+                        help="Coder les mots par préfixes (plus compact, accès un peu plus lent)")
+    parser.add_argument("--output", default=WORD_ARTIFACT_PATH, help="Artefact de sortie")
+    args = parser.parse_args()
+
+    started = time.time()
+
+    # Reconstruire depuis les sources, sans l'artefact existant
+    words = set(MalagasyDictionary(artifact_path=None).words)
+    for filepath in args.extra:
+        extra = load_words(Path(filepath))
+        print(f" {filepath} : {len(extra)} mots")
+        words.update(extra)
+
+    build_word_artifact(words, args.output, front_coded=args.front_coded)
+
+    artifact = CompactWordSet(args.output, use_mmap=False)
+    size = artifact.memory_bytes()
+    print(f"\n Statistiques :")
+    print(f"   - Mots : {len(artifact)}")
+    print(f"   - Taille : {size} octets ({size / max(len(artifact), 1):.1f} octets/mot)")
+    print(f" Durée : {time.time() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,7 @@ API FastAPI pour l'éditeur de texte Malagasy
 Intègre tous les modules NLP (symbolic + algorithmic)
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
@@ -13,12 +13,24 @@ from backend.nlp.nlp_checker import (
     get_next_word_predictions,
     autocomplete_word,
     get_word_info,
+    get_word_family,
     get_text_quality_score,
-    format_suggestions_by_category
+    format_suggestions_by_category,
+    count_sentiment_words,
+    AUTOCOMPLETE_CACHE,
+    LEARNER,
+    RELOAD_STATUS,
+    USER_OVERLAYS,
+    WORD_LOG,
+    learn_from_text,
+    reload_models_in_background,
+    search_definitions
 )
-from backend.nlp.dictionary_loader import MalagasyDictionary
-from backend.nlp.algorithmic import MalagasyLemmatizer, SentenceAnalyzer
+from backend.nlp import nlp_checker
+from backend.nlp.dialects import OFFICIAL_VARIANT
+from backend.nlp.user_overlay import MAX_OWNER_LENGTH
 import logging
+import os
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
@@ -42,11 +54,23 @@ app.add_middleware(
 
 # Charger les modèles au démarrage
 logger.info("🔄 Chargement des modèles NLP...")
-DICTIONARY = MalagasyDictionary()
-LEMMATIZER = MalagasyLemmatizer()
-ANALYZER = SentenceAnalyzer()
+# Le dictionnaire est partagé avec les modules NLP (une seule copie par worker)
+# et lu via nlp_checker.DICTIONARY : il peut être rechargé à chaud
+# Lemmatiseur et analyseur partagés avec nlp_checker (table de lemmes comprise)
 logger.info("✅ Modèles chargés avec succès")
 
+# Jeton des routes d'administration (routes désactivées s'il n'est pas défini)
+ADMIN_TOKEN = os.environ.get("MALAGASY_ADMIN_TOKEN")
+
+# Au-delà de 2 fautes, un préfixe de 2-3 lettres correspond à tout le vocabulaire
+MAX_AUTOCOMPLETE_EDITS = 2
+
+# Taille maximale d'une page de résultats de recherche
+MAX_SEARCH_LIMIT = 100
+
+# Nombre maximal de mots par requête de lemmatisation groupée
+MAX_LEMMATIZE_BATCH = 1000
+
 
 # ============================================================
 # MODÈLES PYDANTIC (Validation des données)
@@ -54,19 +78,54 @@ logger.info("✅ Modèles chargés avec succès")
 
 class TextInput(BaseModel):
     text: str
+    user_id: Optional[str] = None  # dictionnaire personnel (utilisateur ou équipe)
+    variant: Optional[str] = None  # dialecte ou glossaire (défaut : officiel)
 
 class WordInput(BaseModel):
     word: str
+    user_id: Optional[str] = None
+    variant: Optional[str] = None
+
+class UserWordInput(BaseModel):
+    user_id: str
+    word: str
+    definition: Optional[str] = None
 
 class ContextInput(BaseModel):
     context: List[str]
     limit: Optional[int] = 5
 
+class LearnInput(BaseModel):
+    text: str
+    opt_in: bool = False  # consentement explicite de l'utilisateur
+
+class LemmatizeBatchInput(BaseModel):
+    words: List[str]
+
+class AddWordInput(BaseModel):
+    word: str
+    definition: Optional[str] = None
+
 class TranslationInput(BaseModel):
     word: str
     direction: Optional[str] = "mg-fr"  # "mg-fr" ou "fr-mg"
 
 
+def _check_user_id(user_id: Optional[str]):
+    """Refuse un identifiant d'utilisateur vide ou trop long"""
+    if user_id is not None and (not user_id.strip() or len(user_id) > MAX_OWNER_LENGTH):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Le paramètre 'user_id' doit faire entre 1 et {MAX_OWNER_LENGTH} caractères"
+        )
+
+
+def _check_variant(variant: Optional[str]):
+    """Refuse une variante du dictionnaire inconnue"""
+    if variant and variant != OFFICIAL_VARIANT and variant not in nlp_checker.VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Variante '{variant}' inconnue")
+
+
 # ============================================================
 # ROUTES DE L'API
 # ============================================================
@@ -78,16 +137,24 @@ async def home():
         "name": "API Éditeur Malagasy IA",
         "version": "1.0.0",
         "status": "running",
-        "dictionary_size": len(DICTIONARY.words),
+        "dictionary_size": len(nlp_checker.DICTIONARY.words),
         "endpoints": {
             "check": "POST /api/check - Vérification complète du texte",
             "word_info": "POST /api/word-info - Informations sur un mot",
-            "autocomplete": "GET /api/autocomplete?prefix=ma&limit=10",
+            "autocomplete": "GET /api/autocomplete?prefix=ma&limit=10&max_edits=1",
             "predict": "POST /api/predict - Prédiction du mot suivant",
             "lemmatize": "POST /api/lemmatize - Lemmatisation",
+            "lemmatize_batch": "POST /api/lemmatize/batch - Lemmatisation d'une liste de mots",
+            "word_family": "GET /api/word-family?word=mianatra&limit=50 - Mots de même racine",
             "sentiment": "POST /api/sentiment - Analyse de sentiment",
             "translate": "POST /api/translate - Traduction mot-à-mot",
-            "stats": "GET /api/stats - Statistiques du dictionnaire"
+            "search": "GET /api/search?q=maison&limit=20&offset=0 - Recherche dans les définitions",
+            "variants": "GET /api/variants - Variantes du dictionnaire (dialectes, glossaires)",
+            "user_words": "GET/POST/DELETE /api/user-words - Dictionnaire personnel",
+            "learn": "POST /api/learn - Apprentissage à partir d'un texte accepté (opt-in)",
+            "stats": "GET /api/stats - Statistiques du dictionnaire",
+            "admin_words": "POST /api/admin/words - Ajout d'un mot (X-Admin-Token)",
+            "admin_reload": "POST /api/admin/reload - Rechargement à chaud (X-Admin-Token)"
         }
     }
 
@@ -109,8 +176,11 @@ async def check_text(input_data: TextInput):
         if not text.strip():
             raise HTTPException(status_code=400, detail="Le texte ne peut pas être vide")
         
+        _check_user_id(input_data.user_id)
+        _check_variant(input_data.variant)
+        
         # Analyse complète
-        results = check_text_complete(text)
+        results = check_text_complete(text, user_id=input_data.user_id, variant=input_data.variant)
         
         # Ajouter le score de qualité
         quality_score = get_text_quality_score(results)
@@ -148,8 +218,11 @@ async def word_info(input_data: WordInput):
         if not word:
             raise HTTPException(status_code=400, detail="Le mot ne peut pas être vide")
         
+        _check_user_id(input_data.user_id)
+        _check_variant(input_data.variant)
+        
         # Obtenir les infos
-        info = get_word_info(word)
+        info = get_word_info(word, user_id=input_data.user_id, variant=input_data.variant)
         
         return info
         
@@ -161,13 +234,14 @@ async def word_info(input_data: WordInput):
 
 
 @app.get("/api/autocomplete")
-async def autocomplete(prefix: str, limit: int = 10):
+async def autocomplete(prefix: str, limit: int = 10, max_edits: int = 0):
     """
     Autocomplétion d'un préfixe
     
     Args:
         prefix: Début du mot (ex: "ma")
         limit: Nombre de suggestions (défaut: 10)
+        max_edits: Fautes de frappe tolérées dans le préfixe (0, 1 ou 2)
     
     Returns:
         Liste de complétions possibles
@@ -176,14 +250,21 @@ async def autocomplete(prefix: str, limit: int = 10):
         if not prefix:
             raise HTTPException(status_code=400, detail="Le paramètre 'prefix' est requis")
         
+        if max_edits < 0 or max_edits > MAX_AUTOCOMPLETE_EDITS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Le paramètre 'max_edits' doit être compris entre 0 et {MAX_AUTOCOMPLETE_EDITS}"
+            )
+        
         if len(prefix) < 2:
             return {"prefix": prefix, "suggestions": [], "count": 0}
         
         # Obtenir les suggestions
-        suggestions = autocomplete_word(prefix, top_k=limit)
+        suggestions = autocomplete_word(prefix, top_k=limit, max_edits=max_edits)
         
         return {
             "prefix": prefix,
+            "max_edits": max_edits,
             "suggestions": suggestions,
             "count": len(suggestions)
         }
@@ -205,7 +286,7 @@ async def predict_next(input_data: ContextInput):
         limit: Nombre de prédictions
     
     Returns:
-        Liste de prédictions avec probabilités
+        Liste de prédictions avec scores (repli sur les contextes plus courts)
     """
     try:
         context = input_data.context
@@ -230,6 +311,186 @@ async def predict_next(input_data: ContextInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/search")
+async def search(q: str, limit: int = 20, offset: int = 0):
+    """
+    Recherche plein texte dans les mots et les définitions
+    
+    Args:
+        q: Termes recherchés (français ou malagasy)
+        limit: Nombre de résultats par page (défaut: 20)
+        offset: Nombre de résultats à sauter (pagination)
+    
+    Returns:
+        Entrées classées par pertinence, avec extrait de la définition
+    """
+    try:
+        if not q.strip():
+            raise HTTPException(status_code=400, detail="Le paramètre 'q' est requis")
+        
+        if limit < 1 or limit > MAX_SEARCH_LIMIT:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Le paramètre 'limit' doit être compris entre 1 et {MAX_SEARCH_LIMIT}"
+            )
+        
+        if offset < 0:
+            raise HTTPException(status_code=400, detail="Le paramètre 'offset' doit être positif")
+        
+        results = search_definitions(q, limit=limit, offset=offset)
+        
+        if results is None:
+            raise HTTPException(status_code=503, detail="Index de recherche des définitions non disponible")
+        
+        return results
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur search : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/variants")
+async def list_variants():
+    """
+    Variantes du dictionnaire disponibles (à passer dans 'variant')
+    
+    Returns:
+        La variante officielle et, pour chaque autre, la taille de son delta
+    """
+    try:
+        variants = nlp_checker.VARIANTS
+        
+        return {
+            "default": OFFICIAL_VARIANT,
+            "variants": [OFFICIAL_VARIANT] + sorted(variants),
+            "details": {
+                name: {"added_words": len(variant.overlay), "removed_words": len(variant.removed)}
+                for name, variant in variants.items()
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur variants : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/user-words")
+async def list_user_words(user_id: str):
+    """
+    Mots du dictionnaire personnel d'un utilisateur ou d'une équipe
+    
+    Args:
+        user_id: Identifiant de l'utilisateur ou de l'équipe
+    """
+    try:
+        _check_user_id(user_id)
+        
+        words = USER_OVERLAYS.get_words(user_id)
+        
+        return {
+            "user_id": user_id,
+            "words": [{"word": word, "definition": definition} for word, definition in sorted(words.items())],
+            "count": len(words)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur user-words : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/user-words")
+async def add_user_word(input_data: UserWordInput):
+    """
+    Ajoute un mot au dictionnaire personnel (le dictionnaire partagé
+    n'est pas modifié)
+    
+    Args:
+        user_id: Identifiant de l'utilisateur ou de l'équipe
+        word: Mot à ajouter
+        definition: Définition (optionnelle)
+    """
+    try:
+        _check_user_id(input_data.user_id)
+        
+        word = input_data.word.strip()
+        if not word or " " in word:
+            raise HTTPException(status_code=400, detail="Un seul mot non vide est attendu")
+        
+        word = USER_OVERLAYS.add_word(input_data.user_id, word, input_data.definition)
+        
+        return {"user_id": input_data.user_id, "word": word, "added": True}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur add_user_word : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.delete("/api/user-words")
+async def remove_user_word(user_id: str, word: str):
+    """
+    Retire un mot du dictionnaire personnel
+    
+    Args:
+        user_id: Identifiant de l'utilisateur ou de l'équipe
+        word: Mot à retirer
+    """
+    try:
+        _check_user_id(user_id)
+        
+        removed = USER_OVERLAYS.remove_word(user_id, word)
+        if not removed:
+            raise HTTPException(status_code=404, detail=f"Mot '{word}' absent du dictionnaire personnel")
+        
+        return {"user_id": user_id, "word": word.lower().strip(), "removed": True}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur remove_user_word : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/learn")
+async def learn(input_data: LearnInput):
+    """
+    Apprentissage en ligne à partir d'un texte accepté par l'utilisateur
+    
+    Args:
+        text: Texte accepté ou soumis
+        opt_in: Consentement de l'utilisateur (obligatoire)
+    
+    Returns:
+        Nombre de textes en attente de fusion dans le modèle
+    """
+    try:
+        if not input_data.opt_in:
+            raise HTTPException(status_code=400, detail="Le consentement 'opt_in' est requis")
+        
+        if not input_data.text.strip():
+            raise HTTPException(status_code=400, detail="Le texte ne peut pas être vide")
+        
+        result = learn_from_text(input_data.text)
+        
+        if result["queue_full"]:
+            raise HTTPException(status_code=429, detail="File d'apprentissage pleine, réessayer plus tard")
+        if not result["accepted"]:
+            raise HTTPException(status_code=503, detail="Apprentissage en ligne désactivé sur ce serveur")
+        
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur learn : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/lemmatize")
 async def lemmatize(input_data: WordInput):
     """
@@ -239,7 +500,7 @@ async def lemmatize(input_data: WordInput):
         word: Mot à lemmatiser
     
     Returns:
-        Racine, préfixe, suffixe
+        Racine, préfixe, suffixe et toutes les segmentations possibles
     """
     try:
         word = input_data.word.strip()
@@ -248,7 +509,9 @@ async def lemmatize(input_data: WordInput):
             raise HTTPException(status_code=400, detail="Le mot ne peut pas être vide")
         
         # Lemmatiser
-        result = LEMMATIZER.lemmatize(word)
+        lemmatizer = nlp_checker.LEMMATIZER
+        result = dict(lemmatizer.lemmatize(word))
+        result["analyses"] = lemmatizer.segmentations(word)
         
         return result
         
@@ -259,6 +522,76 @@ async def lemmatize(input_data: WordInput):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/api/lemmatize/batch")
+async def lemmatize_batch(input_data: LemmatizeBatchInput):
+    """
+    Lemmatisation d'une liste de mots en une requête
+    
+    Args:
+        words: Mots à lemmatiser (les doublons ne sont calculés qu'une fois)
+    
+    Returns:
+        Un résultat (racine, préfixe, suffixe) par mot, dans l'ordre
+    """
+    try:
+        words = [word.strip() for word in input_data.words]
+        
+        if not words:
+            raise HTTPException(status_code=400, detail="La liste de mots ne peut pas être vide")
+        
+        if len(words) > MAX_LEMMATIZE_BATCH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Trop de mots (maximum {MAX_LEMMATIZE_BATCH})"
+            )
+        
+        if not all(words):
+            raise HTTPException(status_code=400, detail="Les mots ne peuvent pas être vides")
+        
+        results = nlp_checker.LEMMATIZER.lemmatize_many(words)
+        
+        return {
+            "results": results,
+            "count": len(results)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur lemmatize batch : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/word-family")
+async def word_family(word: str, limit: int = 50):
+    """
+    Famille d'un mot : mots connus partageant sa racine
+    
+    Args:
+        word: Mot de départ
+        limit: Nombre maximal de mots (défaut: 50)
+    
+    Returns:
+        Racine et mots de la même famille
+    """
+    try:
+        word = word.strip()
+        
+        if not word:
+            raise HTTPException(status_code=400, detail="Le mot ne peut pas être vide")
+        
+        if limit < 1:
+            raise HTTPException(status_code=400, detail="Le paramètre 'limit' doit être positif")
+        
+        return get_word_family(word, limit=limit)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur word-family : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/api/sentiment")
 async def sentiment(input_data: TextInput):
     """
@@ -273,23 +606,10 @@ async def sentiment(input_data: TextInput):
     try:
         text = input_data.text.lower()
         
-        # Mots positifs en malagasy
-        positive_words = [
-            "faly", "tsara", "mahafaly", "mendrika", "soa", "marina",
-            "mahafinaritra", "mahagaga", "be", "lehibe", "misaotra",
-            "fitiavana", "sambatra", "mazava", "malaza"
-        ]
-        
-        # Mots négatifs en malagasy
-        negative_words = [
-            "malahelo", "ratsy", "mafy", "sarotra", "tsy", "marary",
-            "sosotra", "diso", "mangetaheta", "mangidy", "mahantra",
-            "kivy", "mampalahelo"
-        ]
-        
-        # Compter
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        # Compter (mots entiers, polarité lue dans la table des mots)
+        counts = count_sentiment_words(text)
+        positive_count = counts["positive"]
+        negative_count = counts["negative"]
         
         # Déterminer le sentiment
         total = positive_count + negative_count
@@ -446,10 +766,19 @@ async def stats():
         Nombre de mots, couverture, etc.
     """
     try:
-        dict_stats = DICTIONARY.get_statistics()
+        dict_stats = nlp_checker.DICTIONARY.get_statistics()
         
         return {
             "dictionary": dict_stats,
+            "autocomplete_cache": AUTOCOMPLETE_CACHE.get_statistics(),
+            "lemma_cache": nlp_checker.LEMMATIZER.get_statistics(),
+            "word_features": nlp_checker.WORD_FEATURES.get_statistics(),
+            "online_learning": LEARNER.get_statistics() if LEARNER else None,
+            "reload": RELOAD_STATUS,
+            "word_log": WORD_LOG.get_statistics(),
+            "definitions_cache": (nlp_checker.DICTIONARY.definitions.get_statistics()
+                                  if hasattr(nlp_checker.DICTIONARY.definitions, "get_statistics") else None),
+            "user_overlays": USER_OVERLAYS.get_statistics(),
             "api": {
                 "status": "operational",
                 "version": "1.0.0"
@@ -461,12 +790,85 @@ async def stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _require_admin(token: Optional[str]):
+    """Refuse l'accès si le jeton d'administration est absent ou invalide"""
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Accès administrateur refusé")
+
+
+@app.post("/api/admin/words")
+async def admin_add_word(input_data: AddWordInput, x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Ajoute un mot au dictionnaire partagé
+    
+    L'ajout est immédiat en mémoire et écrit dans le journal des mots
+    (data/added_words.log) en arrière-plan, sans réécrire les fichiers.
+    
+    Args:
+        word: Mot à ajouter
+        definition: Définition (optionnelle)
+    """
+    _require_admin(x_admin_token)
+    
+    try:
+        word = input_data.word.strip()
+        if not word or " " in word:
+            raise HTTPException(status_code=400, detail="Un seul mot non vide est attendu")
+        
+        dictionary = nlp_checker.DICTIONARY
+        dictionary.add_word(word, input_data.definition)
+        nlp_checker.AUTOCOMPLETE_CACHE.clear()
+        nlp_checker.LEMMATIZER.clear_cache()
+        
+        return {
+            "word": word.lower(),
+            "added": True,
+            "dictionary_size": len(dictionary.words)
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Erreur admin_add_word : {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/reload", status_code=202)
+async def admin_reload(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Recharge à chaud le dictionnaire et le modèle N-gram depuis data/
+    
+    La reconstruction se fait en arrière-plan ; les références globales
+    sont ensuite échangées atomiquement (les requêtes en cours terminent
+    sur l'ancienne version).
+    
+    Headers:
+        X-Admin-Token: jeton défini par MALAGASY_ADMIN_TOKEN
+    """
+    _require_admin(x_admin_token)
+    
+    started = reload_models_in_background()
+    
+    return {
+        "status": "reloading" if started else "already_in_progress",
+        "reload": RELOAD_STATUS
+    }
+
+
+@app.on_event("shutdown")
+def flush_pending_writes():
+    """Fusionne les textes et écrit les mots encore en attente avant l'arrêt du worker"""
+    if LEARNER is not None:
+        LEARNER.stop()
+    WORD_LOG.stop()
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "dictionary_loaded": len(DICTIONARY.words) > 0
+        "dictionary_loaded": len(nlp_checker.DICTIONARY.words) > 0
     }
 
 
@@ -53,5 +53,16 @@ def merge_wikipedia_into_dictionary():
 
     print("✅ Fusion terminée avec succès")
 
+    rebuild_word_artifact()
+
+def rebuild_word_artifact():
+    """Reconstruit l'artefact binaire partagé (data/malagasy_words.bin)"""
+    import sys
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from backend.nlp.dictionary_loader import MalagasyDictionary, build_word_artifact
+
+    dictionary = MalagasyDictionary(artifact_path=None)
+    build_word_artifact(dictionary.words)
+
 if __name__ == "__main__":
     merge_wikipedia_into_dictionary()
@@ -5,11 +5,17 @@ Inclut : Levenshtein, N-grams, lemmatisation, autocomplétion, analyse de phrase
 """
 
 from rapidfuzz import fuzz, process
-from collections import Counter, defaultdict
+from collections import Counter, OrderedDict, defaultdict
+import ast
+import heapq
+import itertools
+import threading
 import re
 import json
 from pathlib import Path
-from typing import List, Dict, Tuple, Set
+from typing import Callable, Iterator, List, Dict, Optional, Tuple, Set
+
+from backend.nlp.segmentation import Sentence, SentenceSegmenter
 
 # ============================================================
 # 1. CORRECTION ORTHOGRAPHIQUE (LEVENSHTEIN)
@@ -20,8 +26,15 @@ class SpellChecker:
     Correcteur orthographique basé sur la distance de Levenshtein
     """
     
-    def __init__(self, dictionary_words: Set[str]):
+    def __init__(self, dictionary_words: Set[str], known_word: Callable[[str], bool] = None):
+        """
+        Args:
+            dictionary_words: Mots connus (candidats des suggestions)
+            known_word: Test d'existence plus large que l'appartenance à
+                        dictionary_words (ex. formes dérivées d'une racine)
+        """
         self.dictionary = dictionary_words
+        self.known_word = known_word
     
     def check_word(self, word: str, threshold: int = 70) -> Dict:
         """
@@ -36,7 +49,7 @@ class SpellChecker:
         """
         word_clean = word.lower().strip(".,!?;:\"'")
         
-        if word_clean in self.dictionary:
+        if word_clean in self.dictionary or (self.known_word is not None and self.known_word(word_clean)):
             return {
                 "correct": True,
                 "word": word,
@@ -62,14 +75,24 @@ class SpellChecker:
             "confidence": matches[0][1] if matches else 0
         }
     
-    def correct_text(self, text: str, auto_correct: bool = False) -> List[Dict]:
+    def correct_text(self, text: str, auto_correct: bool = False,
+                     words: List[str] = None, unknown: Set[str] = None) -> List[Dict]:
         """
         Corrige un texte entier
+        
+        Args:
+            words: Mots du texte déjà découpés (sinon text.split())
+            unknown: Mots normalisés inconnus du dictionnaire, déjà
+                     déterminés : les autres ne sont pas revérifiés
         """
-        words = text.split()
+        if words is None:
+            words = text.split()
         corrections = []
         
         for i, word in enumerate(words):
+            if unknown is not None and word.lower().strip(".,!?;:\"'") not in unknown:
+                continue
+            
             result = self.check_word(word)
             
             if not result["correct"]:
@@ -92,12 +115,43 @@ class SpellChecker:
 # 2. LEMMATISATION (Extraction de racines)
 # ============================================================
 
+class AffixTrie:
+    """
+    Trie de caractères compilé depuis un inventaire d'affixes : toutes les
+    longueurs d'affixes présents en tête (ou en fin, si reverse) d'un mot
+    sont trouvées en un seul parcours
+    """
+    
+    def __init__(self, affixes: List[str], reverse: bool = False):
+        self.reverse = reverse
+        self.root = {}
+        for affix in affixes:
+            node = self.root
+            for char in (reversed(affix) if reverse else affix):
+                node = node.setdefault(char, {})
+            # Clé None : un affixe se termine sur ce nœud
+            node[None] = True
+    
+    def match_lengths(self, word: str) -> List[int]:
+        """Longueurs des affixes qui commencent (ou terminent) word, plus longue d'abord"""
+        lengths = []
+        node = self.root
+        for length, char in enumerate(reversed(word) if self.reverse else word, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                lengths.append(length)
+        lengths.reverse()
+        return lengths
+
+
 class MalagasyLemmatizer:
     """
     Lemmatiseur pour retrouver la racine des mots malagasy
     """
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 8192):
         # Préfixes malagasy courants
         self.prefixes = [
             "maha", "mpam", "mpan", "fam", "fan", "mam", "man", "mpa", 
@@ -112,6 +166,26 @@ class MalagasyLemmatizer:
         # Ordre : plus long en premier pour éviter les faux positifs
         self.prefixes.sort(key=len, reverse=True)
         self.suffixes.sort(key=len, reverse=True)
+        
+        # Inventaires compilés : un parcours par côté du mot
+        self.prefix_trie = AffixTrie(self.prefixes)
+        self.suffix_trie = AffixTrie(self.suffixes, reverse=True)
+        
+        # Racines connues (mots du dictionnaire) pour classer les segmentations
+        self.roots = None
+        
+        # Table précalculée du vocabulaire (LemmaTable), consultée en premier
+        self.table = None
+        
+        # Cache LRU de lemmatize_many (mot normalisé -> lemme), à vider
+        # quand roots ou table changent
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # Incrémentée par clear_cache : un calcul commencé avant n'est pas mis en cache
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
     
     def lemmatize(self, word: str) -> Dict:
         """
@@ -121,63 +195,375 @@ class MalagasyLemmatizer:
             Dict avec racine, préfixe, suffixe
         """
         word = word.lower().strip()
-        original = word
         
-        prefix_found = ""
-        suffix_found = ""
+        table = self.table
+        if table is not None:
+            result = table.lookup(word)
+            if result is not None:
+                return result
         
-        # Retirer le préfixe
-        for prefix in self.prefixes:
-            if word.startswith(prefix) and len(word) > len(prefix) + 2:
-                prefix_found = prefix
-                word = word[len(prefix):]
-                break
+        roots = self.roots
+        first = None
+        # Ordre glouton : la première racine connue est la mieux classée.
+        # Le mot entier ne compte jamais comme racine connue : roots contient
+        # aussi des formes fléchies (mandeha), qui resteraient inchangées.
+        for segment in self._segments(word):
+            if roots is None or (self._is_affixed(segment) and segment[1] in roots):
+                return self._lemma(word, *segment)
+            if first is None:
+                first = segment
+        return self._lemma(word, *first)
+    
+    def segmentations(self, word: str) -> List[Dict]:
+        """
+        Toutes les segmentations préfixe + racine + suffixe d'un mot, les
+        racines connues du dictionnaire en premier (la première est le
+        résultat de lemmatize hors table)
+        """
+        word = word.lower().strip()
+        roots = self.roots
         
-        # Retirer le suffixe
-        for suffix in self.suffixes:
-            if word.endswith(suffix) and len(word) > len(suffix) + 2:
-                suffix_found = suffix
-                word = word[:-len(suffix)]
-                break
+        results = []
+        for prefix, root, suffix in self._segments(word):
+            result = self._lemma(word, prefix, root, suffix)
+            result["root_known"] = (roots is not None and bool(prefix or suffix)
+                                    and root in roots)
+            results.append(result)
+        # Tri stable : l'ordre glouton départage les racines connues
+        results.sort(key=lambda result: not result["root_known"])
+        return results
+    
+    def _segments(self, word: str) -> Iterator[Tuple[str, str, str]]:
+        """
+        Segmentations (préfixe, racine, suffixe) valides, la racine gardant
+        au moins 3 lettres une fois chaque affixe retiré. Ordre glouton :
+        préfixe le plus long, puis suffixe le plus long ; le mot entier
+        (sans affixe) en dernier.
+        """
+        prefix_lengths = self.prefix_trie.match_lengths(word)
+        prefix_lengths.append(0)
+        # Les suffixes du mot sont ceux de chaque reste : un seul parcours suffit
+        suffix_lengths = self.suffix_trie.match_lengths(word)
+        suffix_lengths.append(0)
         
+        size = len(word)
+        for prefix_length in prefix_lengths:
+            if prefix_length and size <= prefix_length + 2:
+                continue
+            rest_length = size - prefix_length
+            for suffix_length in suffix_lengths:
+                if suffix_length and rest_length <= suffix_length + 2:
+                    continue
+                end = size - suffix_length
+                yield word[:prefix_length], word[prefix_length:end], word[end:]
+    
+    @staticmethod
+    def _is_affixed(segment: Tuple[str, str, str]) -> bool:
+        return bool(segment[0] or segment[2])
+    
+    @staticmethod
+    def _lemma(original: str, prefix: str, root: str, suffix: str) -> Dict:
         return {
             "original": original,
-            "root": word,
-            "prefix": prefix_found,
-            "suffix": suffix_found,
-            "has_prefix": bool(prefix_found),
-            "has_suffix": bool(suffix_found)
+            "root": root,
+            "prefix": prefix,
+            "suffix": suffix,
+            "has_prefix": bool(prefix),
+            "has_suffix": bool(suffix)
         }
     
-    def lemmatize_text(self, text: str) -> List[Dict]:
+    def lemmatize_many(self, words: List[str]) -> List[Dict]:
         """
-        Lemmatise tous les mots d'un texte
+        Lemmatise une liste de mots : chaque mot distinct n'est calculé
+        qu'une fois, et les mots déjà vus sont servis par le cache LRU
+        
+        Returns:
+            Un lemme par mot, dans l'ordre (les doublons partagent le même dict)
         """
-        words = text.split()
-        results = []
+        normalized = [word.lower().strip() for word in words]
+        lemmas = {}
         
-        for word in words:
-            word_clean = word.strip(".,!?;:\"'")
-            if word_clean:
-                result = self.lemmatize(word_clean)
-                results.append(result)
+        with self._lock:
+            generation = self._generation
+            for word in normalized:
+                if word in lemmas:
+                    continue
+                lemma = self._cache.get(word)
+                if lemma is not None:
+                    self._cache.move_to_end(word)
+                    self.hits += 1
+                lemmas[word] = lemma
         
-        return results
+        # Calcul hors verrou des mots absents du cache
+        computed = {word: self.lemmatize(word) for word, lemma in lemmas.items() if lemma is None}
+        
+        if computed:
+            with self._lock:
+                self.misses += len(computed)
+                # Racines ou table remplacées pendant le calcul : ne pas
+                # remettre en cache des lemmes de l'ancien vocabulaire
+                if generation == self._generation:
+                    for word, lemma in computed.items():
+                        self._cache[word] = lemma
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+            lemmas.update(computed)
+        
+        return [lemmas[word] for word in normalized]
+    
+    def clear_cache(self):
+        """Vide le cache de lemmatize_many"""
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+    
+    def get_statistics(self) -> Dict:
+        """Retourne des statistiques sur le cache"""
+        return {
+            "entries": len(self._cache),
+            "maxsize": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+    
+    def lemmatize_text(self, text: str) -> List[Dict]:
+        """
+        Lemmatise tous les mots d'un texte
+        """
+        words = [word.strip(".,!?;:\"'") for word in text.split()]
+        return self.lemmatize_many([word for word in words if word])
 
 
 # ============================================================
 # 3. N-GRAMS ET AUTOCOMPLÉTION
 # ============================================================
 
+class _TrieNode:
+    __slots__ = ("children", "word", "count")
+    
+    def __init__(self):
+        self.children = {}
+        self.word = None
+        self.count = 0
+
+
+class CompletionTrie:
+    """
+    Trie de complétion pondéré par la fréquence des mots.
+    Supporte une recherche tolérante aux fautes (automate de Levenshtein)
+    sans parcourir tout le vocabulaire.
+    """
+    
+    def __init__(self, word_counts: Dict[str, int] = None):
+        self.root = _TrieNode()
+        self.size = 0
+        if word_counts:
+            for word, count in word_counts.items():
+                self.insert(word, count)
+    
+    def insert(self, word: str, count: int = 1):
+        """Ajoute un mot (ou met à jour sa fréquence)"""
+        node = self.root
+        for char in word:
+            child = node.children.get(char)
+            if child is None:
+                child = node.children[char] = _TrieNode()
+            node = child
+        if node.word is None:
+            self.size += 1
+        node.word = word
+        node.count = count
+    
+    def search(self, prefix: str, max_edits: int = 0, top_k: int = None) -> List[str]:
+        """
+        Retourne les mots dont un préfixe est à au plus `max_edits`
+        modifications (insertion, suppression, substitution) de `prefix`.
+        
+        Les complétions exactes passent en premier, puis les autres par
+        distance croissante ; à distance égale, par fréquence décroissante.
+        
+        Args:
+            prefix: Début du mot tapé par l'utilisateur
+            max_edits: Nombre maximal de fautes tolérées
+            top_k: Nombre de résultats (None = tous)
+        """
+        results = []
+        first_row = list(range(len(prefix) + 1))
+        # (noeud, ligne de Levenshtein, meilleure distance sur le chemin)
+        # Une ligne None signifie que le sous-arbre entier est déjà accepté.
+        stack = [(self.root, first_row, first_row[-1])]
+        
+        while stack:
+            node, row, best = stack.pop()
+            
+            if node.word is not None and best <= max_edits:
+                results.append((best, -node.count, node.word))
+            
+            for char, child in node.children.items():
+                if row is None:
+                    stack.append((child, None, best))
+                    continue
+                
+                new_row = [row[0] + 1]
+                for j in range(1, len(prefix) + 1):
+                    cost = 0 if prefix[j - 1] == char else 1
+                    new_row.append(min(new_row[j - 1] + 1, row[j] + 1, row[j - 1] + cost))
+                
+                child_best = min(best, new_row[-1])
+                if min(new_row) > max_edits:
+                    # Plus aucune amélioration possible : on garde le
+                    # sous-arbre seulement si un ancêtre correspond déjà
+                    if child_best <= max_edits:
+                        stack.append((child, None, child_best))
+                    continue
+                
+                stack.append((child, new_row, child_best))
+        
+        if top_k is None:
+            results.sort()
+        else:
+            results = heapq.nsmallest(top_k, results)
+        
+        return [word for _, _, word in results]
+
+
+# Nettoyage des corpus : fin de phrase (ponctuation simple, ligne par ligne)
+# et ponctuation retirée autour des mots
+_SENTENCE_END = re.compile(r"[.!?]+")
+_CORPUS_PUNCTUATION = ".,!?;:\"'()«»[]"
+
+
+def corpus_sentences(lines):
+    """
+    Découpe des lignes de texte brut en phrases nettoyées (mots séparés
+    par des espaces), prêtes pour NGramModel.update_counts
+    """
+    for line in lines:
+        for sentence in _SENTENCE_END.split(line):
+            words = [w.strip(_CORPUS_PUNCTUATION) for w in sentence.split()]
+            words = [w for w in words if w]
+            if len(words) > 1:
+                yield " ".join(words)
+
+
+# Numéro de version unique par état de modèle (entraînement, chargement...)
+_MODEL_VERSIONS = itertools.count(1)
+
+# Pénalité par niveau de repli (« stupid backoff », Brants et al. 2007)
+BACKOFF_ALPHA = 0.4
+
+# Taille des listes de prédictions précalculées par contexte
+TOP_K_PREDICTIONS = 10
+
+
+def stupid_backoff(context: Tuple[str, ...], lookup: Callable, unigram_top: Callable,
+                   total_words: int, top_k: int, alpha: float = BACKOFF_ALPHA,
+                   ranked: bool = False) -> List[Tuple[str, float]]:
+    """
+    Classe les mots suivants avec le repli « stupid backoff »
+    
+    Le score d'un mot est sa fréquence relative après le plus long
+    contexte où il a été observé, multipliée par alpha pour chaque mot
+    de contexte abandonné. Ce n'est pas une probabilité normalisée.
+    
+    Args:
+        context: Mots précédents (au plus n-1)
+        lookup: lookup(contexte) -> (total, [(mot, compte), ...]) ou None
+        unigram_top: unigram_top(k) -> [(mot, fréquence), ...] les plus fréquents
+            (k vaut None en mode ranked : toute la liste classée, éventuellement
+            déjà privée des successeurs des niveaux inférieurs)
+        total_words: Nombre total de mots du corpus
+        top_k: Nombre de prédictions
+        alpha: Pénalité par niveau de repli
+        ranked: lookup rend (total, successeurs par compte décroissant
+            avec égalités par ordre alphabétique, ensemble des
+            successeurs) : chaque niveau s'arrête alors après top_k mots
+            nouveaux, les suivants ne pouvant plus entrer dans le top-k.
+            Un mot vu à un niveau supérieur garde le score de ce niveau
+            et reste donc exclu des niveaux suivants.
+    
+    Returns:
+        Liste de tuples (mot, score) par score décroissant
+    """
+    scores = {}
+    # Successeurs complets des niveaux parcourus (mode ranked)
+    seen = []
+    penalty = 1.0
+    
+    for start in range(len(context)):
+        found = lookup(context[start:])
+        if found is not None:
+            total, successors = found[0], found[1]
+            added = 0
+            for word, count in successors:
+                if word not in scores and not any(word in level for level in seen):
+                    scores[word] = penalty * count / total
+                    added += 1
+                    if ranked and added == top_k:
+                        break
+            if ranked:
+                seen.append(found[2])
+        penalty *= alpha
+    
+    # Niveau unigramme : assez de candidats pour compléter le top-k (la
+    # liste est toujours classée)
+    if total_words:
+        added = 0
+        limit = None if ranked else top_k + len(scores)
+        for word, freq in unigram_top(limit):
+            if word not in scores and not any(word in level for level in seen):
+                scores[word] = penalty * freq / total_words
+                added += 1
+                if added == top_k:
+                    break
+    
+    return heapq.nsmallest(top_k, scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+class _RankedTail:
+    """
+    Liste classée privée de mots exclus, prolongée à la demande et
+    partagée par tous ceux qui la parcourent
+    """
+    
+    def __init__(self, source, excluded):
+        self._source = iter(source)
+        self._excluded = excluded
+        self._items = []
+    
+    def __iter__(self):
+        items = self._items
+        position = 0
+        while True:
+            if position == len(items):
+                for item in self._source:
+                    if item[0] not in self._excluded:
+                        items.append(item)
+                        break
+                else:
+                    return
+            yield items[position]
+            position += 1
+
+
 class NGramModel:
     """
-    Modèle N-gram pour la prédiction de mots et l'autocomplétion
+    Modèle N-gram pour la prédiction de mots et l'autocomplétion.
+    Garde les comptes de tous les contextes de 1 à n-1 mots pour le repli.
     """
     
     def __init__(self, n: int = 2):
+        if n < 2:
+            raise ValueError("Un modèle N-gram demande n >= 2")
         self.n = n
         self.ngrams = defaultdict(Counter)
         self.word_freq = Counter()
+        self.total_words = 0
+        self._trie = None
+        self._top_table = None
+        self._unigram_top = ()
+        self.top_k = TOP_K_PREDICTIONS
+        self.version = next(_MODEL_VERSIONS)
     
     def train(self, texts: List[str]):
         """
@@ -186,19 +572,113 @@ class NGramModel:
         Args:
             texts: Liste de phrases en malagasy
         """
+        self.update_counts(texts)
+        self.finalize()
+    
+    def update_counts(self, texts):
+        """
+        Ajoute les comptes d'un corpus sans recalculer les tables de
+        prédiction (appeler finalize() ensuite)
+        
+        Args:
+            texts: Itérable de phrases (peut être un générateur)
+        """
+        self._trie = None
+        self._top_table = None
+        self.version = next(_MODEL_VERSIONS)
+        
         for text in texts:
             words = text.lower().split()
             
             # Compter la fréquence des mots
             self.word_freq.update(words)
+            self.total_words += len(words)
             
-            # Créer les n-grams
-            for i in range(len(words) - self.n + 1):
-                # Contexte = n-1 premiers mots
-                context = tuple(words[i:i+self.n-1])
-                # Mot suivant
-                next_word = words[i+self.n-1]
-                self.ngrams[context][next_word] += 1
+            # Créer les n-grams de tous les ordres (contexte de 1 à n-1 mots)
+            for i in range(1, len(words)):
+                next_word = words[i]
+                for order in range(1, min(self.n - 1, i) + 1):
+                    context = tuple(words[i-order:i])
+                    self.ngrams[context][next_word] += 1
+    
+    def merge_counts(self, word_freq: Dict[str, int], ngrams: Dict[Tuple[str, ...], Dict[str, int]]):
+        """
+        Ajoute des comptes calculés ailleurs (autre processus, autre modèle)
+        
+        Args:
+            word_freq: Fréquences des mots
+            ngrams: Contexte -> {mot suivant: compte}
+        """
+        self._trie = None
+        self._top_table = None
+        self.version = next(_MODEL_VERSIONS)
+        
+        self.word_freq.update(word_freq)
+        self.total_words += sum(word_freq.values())
+        for context, successors in ngrams.items():
+            self.ngrams[context].update(successors)
+    
+    def prune(self, min_count: int = 2):
+        """
+        Supprime les n-grams observés moins de `min_count` fois
+        (les fréquences des mots sont conservées)
+        
+        Returns:
+            Nombre de n-grams supprimés
+        """
+        removed = 0
+        for context in list(self.ngrams):
+            successors = self.ngrams[context]
+            rare = [word for word, count in successors.items() if count < min_count]
+            for word in rare:
+                del successors[word]
+            removed += len(rare)
+            if not successors:
+                del self.ngrams[context]
+        
+        self._top_table = None
+        return removed
+    
+    def finalize(self, top_k: int = TOP_K_PREDICTIONS):
+        """
+        Précalcule, pour chaque contexte connu, ses `top_k` meilleures
+        prédictions (repli compris) : une prédiction devient une simple
+        recherche dans un dict suivie d'une tranche.
+        
+        Le vocabulaire et les successeurs de chaque contexte sont classés
+        une seule fois ici : chaque contexte ne parcourt ensuite que les
+        premiers mots de ces listes, au lieu de tout le vocabulaire. Le
+        vocabulaire privé des successeurs d'un suffixe (ny -> ...) est
+        partagé par tous les contextes qui finissent par ce suffixe.
+        """
+        by_count = lambda item: (-item[1], item[0])
+        ranked_ngrams = {
+            context: (sum(candidates.values()), sorted(candidates.items(), key=by_count), candidates)
+            for context, candidates in self.ngrams.items()
+            if candidates
+        }
+        tails = {(): sorted(self.word_freq.items(), key=by_count)}
+        
+        def unigram_tail(suffix):
+            # Vocabulaire classé, sans les successeurs des contextes suffix, suffix[1:]...
+            tail = tails.get(suffix)
+            if tail is None:
+                candidates = self.ngrams.get(suffix) or ()
+                tail = tails[suffix] = _RankedTail(unigram_tail(suffix[1:]), candidates)
+            return tail
+        
+        self.top_k = top_k
+        self._top_table = {
+            context: tuple(self._backoff(context, top_k, ranked_ngrams, unigram_tail))
+            for context in self.ngrams
+        }
+        self._unigram_top = tuple(self._backoff((), top_k, ranked_ngrams, unigram_tail))
+    
+    def top_table(self):
+        """Retourne (table contexte -> top-k, top-k unigrammes), précalculés si besoin"""
+        if self._top_table is None:
+            self.finalize()
+        return self._top_table, self._unigram_top
     
     def predict_next_word(self, context: List[str], top_k: int = 5) -> List[Tuple[str, float]]:
         """
@@ -209,49 +689,77 @@ class NGramModel:
             top_k: Nombre de prédictions à retourner
         
         Returns:
-            Liste de tuples (mot, probabilité)
+            Liste de tuples (mot, score de repli)
         """
         # Prendre les n-1 derniers mots comme contexte
-        context = tuple(context[-(self.n-1):])
+        context = tuple(w.lower() for w in context[-(self.n-1):])
         
-        if context not in self.ngrams:
-            # Fallback : retourner les mots les plus fréquents
-            return [(word, freq) for word, freq in self.word_freq.most_common(top_k)]
+        if top_k > self.top_k or self._top_table is None:
+            return self._backoff(context, top_k)
         
-        # Calculer les probabilités
-        candidates = self.ngrams[context]
-        total = sum(candidates.values())
+        # Le plus long suffixe connu du contexte porte déjà le classement
+        # complet ; chaque mot de contexte abandonné multiplie par alpha
+        penalty = 1.0
+        for start in range(len(context)):
+            entries = self._top_table.get(context[start:])
+            if entries is not None:
+                break
+            penalty *= BACKOFF_ALPHA
+        else:
+            entries = self._unigram_top
         
-        predictions = [
-            (word, count / total) 
-            for word, count in candidates.most_common(top_k)
-        ]
+        if penalty == 1.0:
+            return list(entries[:top_k])
+        return [(word, score * penalty) for word, score in entries[:top_k]]
+    
+    def _backoff(self, context: Tuple[str, ...], top_k: int,
+                 ranked_ngrams: Optional[Dict] = None,
+                 unigram_tail: Optional[Callable] = None) -> List[Tuple[str, float]]:
+        """
+        Calcul complet du repli (sans table précalculée)
+        
+        ranked_ngrams / unigram_tail : classements calculés par
+        finalize(), partagés par tous les contextes
+        """
+        if ranked_ngrams is not None:
+            tail = unigram_tail(context[1:])
+            return stupid_backoff(context, ranked_ngrams.get, lambda k: tail,
+                                  self.total_words, top_k, ranked=True)
+        
+        def lookup(ctx):
+            candidates = self.ngrams.get(ctx)
+            if not candidates:
+                return None
+            return sum(candidates.values()), candidates.items()
         
-        return predictions
+        def unigram_top(k):
+            # Égalités départagées par ordre alphabétique (comme le format compact)
+            return heapq.nsmallest(k, self.word_freq.items(), key=lambda item: (-item[1], item[0]))
+        
+        return stupid_backoff(context, lookup, unigram_top, self.total_words, top_k)
     
-    def autocomplete(self, prefix: str, top_k: int = 5) -> List[str]:
+    def autocomplete(self, prefix: str, top_k: int = 5, max_edits: int = 0) -> List[str]:
         """
         Suggère des complétions pour un préfixe
         
         Args:
             prefix: Début du mot à compléter
             top_k: Nombre de suggestions
+            max_edits: Nombre de fautes tolérées dans le préfixe
         
         Returns:
             Liste de mots possibles
         """
-        prefix = prefix.lower()
-        
-        # Trouver tous les mots qui commencent par ce préfixe
-        candidates = [
-            word for word in self.word_freq.keys() 
-            if word.startswith(prefix)
-        ]
+        if self._trie is None:
+            self._trie = CompletionTrie(self.word_freq)
         
-        # Trier par fréquence
-        candidates.sort(key=lambda w: self.word_freq[w], reverse=True)
-        
-        return candidates[:top_k]
+        return self._trie.search(prefix.lower(), max_edits=max_edits, top_k=top_k)
+    
+    def to_ngram_model(self):
+        """Copie modifiable des comptes (même interface que CompactNGramModel)"""
+        copy = NGramModel(n=self.n)
+        copy.merge_counts(self.word_freq, self.ngrams)
+        return copy
     
     def save_model(self, filepath: str):
         """Sauvegarde le modèle"""
@@ -264,6 +772,12 @@ class NGramModel:
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
     
+    def save_binary(self, filepath: str):
+        """Sauvegarde le modèle au format binaire compact (voir compact_ngram.py)"""
+        from backend.nlp.compact_ngram import save_compact_model
+        
+        save_compact_model(self, filepath)
+    
     def load_model(self, filepath: str):
         """Charge un modèle sauvegardé"""
         with open(filepath, 'r', encoding='utf-8') as f:
@@ -271,18 +785,191 @@ class NGramModel:
         
         self.n = data["n"]
         self.word_freq = Counter(data["word_freq"])
+        self.total_words = sum(self.word_freq.values())
+        self._trie = None
+        self.version = next(_MODEL_VERSIONS)
         
         # Reconvertir les clés en tuples
         self.ngrams = defaultdict(Counter)
         for k, v in data["ngrams"].items():
-            key = eval(k)  # Convertir string en tuple
+            key = ast.literal_eval(k)  # Convertir string en tuple (sans exécuter de code)
             self.ngrams[key] = Counter(v)
+        
+        self.finalize()
+
+
+class AutocompleteCache:
+    """
+    Cache LRU partagé des résultats d'autocomplétion.
+    
+    Chaque entrée garde la liste classée complète des candidats d'un
+    préfixe (bornée à `max_candidates`). Un préfixe plus long (« mana »)
+    est alors servi en filtrant les candidats d'un préfixe déjà en cache
+    (« man ») sans relancer la recherche : le filtrage conserve l'ordre.
+    """
+    
+    def __init__(self, maxsize: int = 1024, max_candidates: int = 500):
+        self.maxsize = maxsize
+        self.max_candidates = max_candidates
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.extensions = 0
+        self.misses = 0
+    
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def _put(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+    
+    def get_or_compute(self, prefix: str, limit: int, max_edits: int, version: int,
+                       compute: Callable[[str, int], List[str]]) -> List[str]:
+        """
+        Retourne les `limit` meilleures complétions de `prefix`
+        
+        Args:
+            prefix: Préfixe normalisé (minuscules)
+            limit: Nombre de suggestions voulues
+            max_edits: Fautes tolérées (fait partie de la clé)
+            version: Version du modèle (fait partie de la clé)
+            compute: compute(prefix, top_k) -> liste classée de candidats
+        """
+        if limit > self.max_candidates:
+            return compute(prefix, limit)
+        
+        key = (prefix, max_edits, version)
+        
+        with self._lock:
+            entry = self._get(key)
+            if entry is not None:
+                self.hits += 1
+                return entry[0][:limit]
+            
+            # Réutilisation d'un préfixe plus court. Seulement en mode
+            # exact : en mode tolérant le classement dépend de la distance
+            # au préfixe complet et doit être recalculé.
+            if max_edits == 0:
+                for end in range(len(prefix) - 1, 0, -1):
+                    shorter = self._get((prefix[:end], max_edits, version))
+                    if shorter is None:
+                        continue
+                    candidates, complete = shorter
+                    if not complete:
+                        break
+                    filtered = [w for w in candidates if w.startswith(prefix)]
+                    self._put(key, (filtered, True))
+                    self.extensions += 1
+                    return filtered[:limit]
+        
+        # Recherche hors verrou : elle peut être longue
+        candidates = compute(prefix, self.max_candidates + 1)
+        complete = len(candidates) <= self.max_candidates
+        candidates = candidates[:self.max_candidates]
+        
+        with self._lock:
+            self.misses += 1
+            self._put(key, (candidates, complete))
+        
+        return candidates[:limit]
+    
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_statistics(self) -> Dict:
+        """Retourne des statistiques sur le cache"""
+        return {
+            "entries": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "prefix_extensions": self.extensions,
+            "misses": self.misses
+        }
 
 
 # ============================================================
 # 4. ANALYSE DE PHRASES
 # ============================================================
 
+# Mots courants d'autres langues (indices de mélange de langues)
+FOREIGN_INDICATORS = {
+    "le": "français", "la": "français", "les": "français",
+    "the": "anglais", "is": "anglais", "are": "anglais",
+    "et": "français", "ou": "français"
+}
+
+# Classes de mots (bits retournés par TokenClasses.flags)
+VERB_LIKE = 1
+CONJUNCTION = 2
+PREPOSITION = 4
+FOREIGN_INDICATOR = 8
+
+
+class TokenClasses:
+    """
+    Classes de chaque mot (verbe probable, conjonction, préposition,
+    indice de langue étrangère) sous forme de bits : précalculées pour
+    le vocabulaire, mémorisées (LRU) pour les autres mots
+    """
+    
+    def __init__(self, verb_prefixes: List[str], conjunctions: List[str], prepositions: List[str],
+                 foreign_indicators=FOREIGN_INDICATORS, cache_size: int = 65536):
+        self.verb_prefixes = tuple(verb_prefixes)
+        self.conjunctions = frozenset(conjunctions)
+        self.prepositions = frozenset(prepositions)
+        self.foreign_indicators = frozenset(foreign_indicators)
+        self.cache_size = cache_size
+        # Table du vocabulaire, remplacée d'un bloc (lecture sans verrou)
+        self._vocabulary = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _compute(self, word: str) -> int:
+        flags = 0
+        for prefix in self.verb_prefixes:
+            if word.startswith(prefix) and len(word) > len(prefix) + 1:
+                flags |= VERB_LIKE
+                break
+        if word in self.conjunctions:
+            flags |= CONJUNCTION
+        if word in self.prepositions:
+            flags |= PREPOSITION
+        if word in self.foreign_indicators:
+            flags |= FOREIGN_INDICATOR
+        return flags
+    
+    def precompute(self, words):
+        """Calcule les classes de tout le vocabulaire (au chargement)"""
+        self._vocabulary = {word: self._compute(word) for word in words}
+    
+    def flags(self, word: str) -> int:
+        """Classes d'un mot en minuscules (combinaison de VERB_LIKE, CONJUNCTION...)"""
+        flags = self._vocabulary.get(word)
+        if flags is not None:
+            return flags
+        
+        with self._lock:
+            flags = self._cache.get(word)
+            if flags is not None:
+                self._cache.move_to_end(word)
+                return flags
+        
+        flags = self._compute(word)
+        with self._lock:
+            self._cache[word] = flags
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return flags
+
+
 class SentenceAnalyzer:
     """
     Analyseur de phrases en Malagasy
@@ -297,6 +984,12 @@ class SentenceAnalyzer:
         
         # Prépositions
         self.prepositions = ["amin'ny", "amin", "eo", "any", "aty", "avy", "ho", "ao"]
+        
+        # Découpage en phrases avec positions
+        self.segmenter = SentenceSegmenter()
+        
+        # Classes des mots, calculées une fois par mot
+        self.classes = TokenClasses(self.verb_prefixes, self.conjunctions, self.prepositions)
     
     def analyze_sentence(self, sentence: str) -> Dict:
         """
@@ -323,25 +1016,26 @@ class SentenceAnalyzer:
             "vso_order": False
         }
         
+        classes = self.classes
+        
         # Détecter les verbes
         for i, word in enumerate(words):
             word_lower = word.lower()
+            flags = classes.flags(word_lower)
             
             # Vérifier si c'est un verbe
-            for prefix in self.verb_prefixes:
-                if word_lower.startswith(prefix) and len(word_lower) > len(prefix) + 1:
-                    analysis["has_verb"] = True
-                    if analysis["verb_position"] is None:
-                        analysis["verb_position"] = i
-                    break
+            if flags & VERB_LIKE:
+                analysis["has_verb"] = True
+                if analysis["verb_position"] is None:
+                    analysis["verb_position"] = i
             
             # Vérifier conjonctions
-            if word_lower in self.conjunctions:
+            if flags & CONJUNCTION:
                 analysis["has_conjunction"] = True
                 analysis["conjunctions_found"].append(word_lower)
             
             # Vérifier prépositions
-            if word_lower in self.prepositions:
+            if flags & PREPOSITION:
                 analysis["has_preposition"] = True
                 analysis["prepositions_found"].append(word_lower)
         
@@ -363,22 +1057,29 @@ class SentenceAnalyzer:
         """
         # Séparateurs de phrases en malagasy
         # Utilise . ! ? et aussi les retours à la ligne
-        sentences = re.split(r'[.!?]+', text)
-        
-        # Nettoyer et filtrer
-        sentences = [s.strip() for s in sentences if s.strip()]
-        
-        return sentences
+        return [sentence.text for sentence in self.segmenter.segment(text)]
+    
+    def iter_sentences(self, text: str) -> Iterator[Sentence]:
+        """
+        Phrases d'un texte avec leurs positions de début et de fin
+        """
+        return self.segmenter.segment(text)
     
     def analyze_text(self, text: str) -> Dict:
         """
         Analyse un texte complet (plusieurs phrases)
         """
         sentences = self.split_sentences(text)
-        
+        return self.summarize(text, [self.analyze_sentence(sentence) for sentence in sentences])
+    
+    def summarize(self, text: str, sentence_analyses: List[Dict]) -> Dict:
+        """
+        Statistiques d'un texte à partir des analyses de ses phrases
+        (déjà calculées par analyze_sentence)
+        """
         analysis = {
             "text": text,
-            "sentence_count": len(sentences),
+            "sentence_count": len(sentence_analyses),
             "sentences": [],
             "average_words": 0,
             "vso_percentage": 0,
@@ -388,8 +1089,7 @@ class SentenceAnalyzer:
         total_words = 0
         vso_count = 0
         
-        for sentence in sentences:
-            sent_analysis = self.analyze_sentence(sentence)
+        for sent_analysis in sentence_analyses:
             analysis["sentences"].append(sent_analysis)
             
             total_words += sent_analysis["word_count"]
@@ -401,9 +1101,9 @@ class SentenceAnalyzer:
                 analysis["complex_sentences"] += 1
         
         # Calculer les statistiques
-        if sentences:
-            analysis["average_words"] = total_words / len(sentences)
-            analysis["vso_percentage"] = (vso_count / len(sentences)) * 100
+        if sentence_analyses:
+            analysis["average_words"] = total_words / len(sentence_analyses)
+            analysis["vso_percentage"] = (vso_count / len(sentence_analyses)) * 100
         
         return analysis
 
@@ -424,11 +1124,14 @@ class SentenceValidator:
         """
         Valide une phrase et retourne des suggestions
         """
+        return self.validate_analysis(self.analyzer.analyze_sentence(sentence))
+    
+    def validate_analysis(self, analysis: Dict) -> List[Dict]:
+        """
+        Suggestions pour une phrase déjà analysée par analyze_sentence
+        """
         suggestions = []
         
-        analysis = self.analyzer.analyze_sentence(sentence)
-        words = sentence.split()
-        
         # Règle 1 : Phrase trop courte
         if analysis["word_count"] < 2:
             suggestions.append({
@@ -605,8 +1308,8 @@ if __name__ == "__main__":
     context = ["manao"]
     predictions = ngram_model.predict_next_word(context, top_k=3)
     print(f"\n   Après '{' '.join(context)}', les mots probables sont:")
-    for word, prob in predictions:
-        print(f"      - {word}: {prob:.2%}")
+    for word, score in predictions:
+        print(f"      - {word}: {score:.3f}")
     
     # Tester l'autocomplétion
     prefix = "ma"
@@ -0,0 +1,346 @@
+# nlp/artifacts.py
+"""
+Outils communs aux artefacts binaires précompilés (modèle N-gram, dictionnaire).
+
+Un artefact est un en-tête suivi de sections nommées, toutes alignées
+sur 8 octets pour pouvoir être lues directement avec memoryview.cast().
+Ouvert via mmap, un artefact est partagé par le cache de pages du
+système entre tous les workers uvicorn/gunicorn d'une même machine.
+
+Deux représentations de tableaux triés de chaînes sont disponibles :
+PackedStrings (accès direct, table de hachage optionnelle) et
+FrontCodedStrings (préfixes communs factorisés par blocs, quelques
+octets par mot pour les très grands vocabulaires).
+"""
+
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+# nom de section, longueur en octets
+_SECTION = struct.Struct("<4sQ")
+
+
+def _pad(length: int) -> int:
+    return (8 - length % 8) % 8
+
+
+def _check_byteorder():
+    if sys.byteorder != "little":
+        raise ValueError("Les artefacts binaires supposent une machine little-endian")
+
+
+def write_artifact(filepath: str, header: bytes, sections: List[Tuple[bytes, bytes]]):
+    """
+    Écrit un artefact (en-tête + sections) de manière atomique
+
+    Args:
+        filepath: Fichier de sortie
+        header: En-tête déjà encodé (commence par le magic)
+        sections: Liste de (nom sur 4 octets, données)
+    """
+    _check_byteorder()
+    path = Path(filepath)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Écriture dans un fichier temporaire puis renommage : les workers qui
+    # ont déjà mappé l'ancien fichier continuent de le lire sans risque
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(b"\0" * _pad(len(header)))
+        for name, data in sections:
+            f.write(_SECTION.pack(name, len(data)))
+            f.write(data)
+            f.write(b"\0" * _pad(len(data)))
+    tmp_path.replace(path)
+
+
+def open_artifact(filepath: str, use_mmap: bool = True):
+    """
+    Ouvre un artefact et retourne un buffer lisible par memoryview
+
+    Args:
+        filepath: Fichier à ouvrir
+        use_mmap: Projeter le fichier en mémoire (partagé entre processus)
+                  plutôt que de le copier dans le tas du processus
+    """
+    _check_byteorder()
+    if not use_mmap:
+        return Path(filepath).read_bytes()
+
+    with open(filepath, "rb") as f:
+        # Le mapping reste valide après fermeture du descripteur
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_sections(view: memoryview, header_size: int) -> Dict[bytes, memoryview]:
+    """Indexe les sections d'un artefact sans copier leurs données"""
+    sections = {}
+    pos = header_size + _pad(header_size)
+    while pos < len(view):
+        name, length = _SECTION.unpack_from(view, pos)
+        pos += _SECTION.size
+        sections[name] = view[pos:pos + length]
+        pos += length + _pad(length)
+    return sections
+
+
+def pack_strings(encoded: Iterable[bytes]) -> Tuple[bytes, bytes]:
+    """
+    Sérialise des chaînes UTF-8 déjà triées
+
+    Returns:
+        (octets concaténés, offsets uint32)
+    """
+    encoded = list(encoded)
+    offsets = array("I", [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+    return b"".join(encoded), offsets.tobytes()
+
+
+def build_string_hash(encoded: List[bytes]) -> bytes:
+    """
+    Table de hachage (adressage ouvert) chaîne -> position + 1, pour
+    PackedStrings.index en O(1). CRC32 plutôt que hash() : la valeur
+    doit être identique dans tous les processus.
+    """
+    slot_bits = max(1, (2 * len(encoded)).bit_length())
+    size = 1 << slot_bits
+    slots = array("I", [0]) * size
+    for index, word in enumerate(encoded):
+        slot = zlib.crc32(word) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = index + 1
+    return slots.tobytes()
+
+
+class PackedStrings:
+    """
+    Tableau trié de chaînes UTF-8 stocké dans un buffer (éventuellement mmap).
+    La position d'une chaîne sert d'identifiant entier.
+    """
+
+    def __init__(self, blob: memoryview, offsets: memoryview, hash_table: memoryview = None):
+        self._blob = blob
+        self._offsets = offsets.cast("I")
+        self._hash = hash_table.cast("I") if hash_table is not None else None
+        self.size = len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def raw(self, index: int) -> bytes:
+        return bytes(self._blob[self._offsets[index]:self._offsets[index + 1]])
+
+    def __getitem__(self, index: int) -> str:
+        return self.raw(index).decode("utf-8")
+
+    def lower_bound(self, key: bytes) -> int:
+        """Première position dont la chaîne est >= key"""
+        low, high = 0, self.size
+        while low < high:
+            mid = (low + high) // 2
+            if self.raw(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def index(self, word: str) -> int:
+        """Position d'une chaîne, ou -1 si absente"""
+        key = word.encode("utf-8")
+
+        if self._hash is not None:
+            mask = len(self._hash) - 1
+            slot = zlib.crc32(key) & mask
+            while self._hash[slot]:
+                position = self._hash[slot] - 1
+                if self.raw(position) == key:
+                    return position
+                slot = (slot + 1) & mask
+            return -1
+
+        position = self.lower_bound(key)
+        if position < self.size and self.raw(position) == key:
+            return position
+        return -1
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Plage [début, fin) des chaînes commençant par prefix"""
+        key = prefix.encode("utf-8")
+        # 0xff n'apparaît jamais en UTF-8 : borne supérieure de la plage
+        return self.lower_bound(key), self.lower_bound(key + b"\xff")
+
+    def iter_range(self, start: int, end: int):
+        """Chaînes des positions [start, end), dans l'ordre"""
+        for index in range(start, end):
+            yield self[index]
+
+    def __iter__(self):
+        return self.iter_range(0, self.size)
+
+
+# ============================================================
+# CODAGE PAR PRÉFIXES (front coding)
+# ============================================================
+
+# Nombre de chaînes par bloc : un bloc est décodé en entier à chaque accès
+FRONT_CODING_BLOCK = 16
+
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(view, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def pack_front_coded(encoded: List[bytes], block_size: int = FRONT_CODING_BLOCK) -> Tuple[bytes, bytes]:
+    """
+    Sérialise des chaînes UTF-8 triées par blocs : chaque chaîne est
+    stockée comme (longueur du préfixe commun avec la précédente,
+    longueur du suffixe, suffixe). La première chaîne d'un bloc est
+    complète, ce qui permet la recherche dichotomique sur les blocs.
+
+    Returns:
+        (blocs concaténés, offsets uint32 des blocs)
+    """
+    blob = bytearray()
+    offsets = array("I")
+    previous = b""
+    for position, word in enumerate(encoded):
+        if position % block_size == 0:
+            offsets.append(len(blob))
+            previous = b""
+        shared = 0
+        limit = min(len(previous), len(word))
+        while shared < limit and previous[shared] == word[shared]:
+            shared += 1
+        _write_varint(blob, shared)
+        _write_varint(blob, len(word) - shared)
+        blob += word[shared:]
+        previous = word
+    offsets.append(len(blob))
+    return bytes(blob), offsets.tobytes()
+
+
+class FrontCodedStrings:
+    """
+    Tableau trié de chaînes UTF-8 codées par préfixes (voir pack_front_coded).
+    Même interface que PackedStrings ; un accès décode au plus un bloc.
+    """
+
+    def __init__(self, blob: memoryview, block_offsets: memoryview, count: int,
+                 block_size: int = FRONT_CODING_BLOCK):
+        self._blob = blob
+        self._offsets = block_offsets.cast("I")
+        self.size = count
+        self.block_size = block_size
+        self._blocks = len(self._offsets) - 1
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _decode_block(self, block: int) -> List[bytes]:
+        # Un seul bytes() par bloc : les tranches suivantes ne touchent plus au buffer
+        data = bytes(self._blob[self._offsets[block]:self._offsets[block + 1]])
+        end = len(data)
+        pos = 0
+        words = []
+        previous = b""
+        while pos < end:
+            shared = data[pos]
+            if shared < 0x80:
+                pos += 1
+            else:
+                shared, pos = _read_varint(data, pos)
+            length = data[pos]
+            if length < 0x80:
+                pos += 1
+            else:
+                length, pos = _read_varint(data, pos)
+            word = previous[:shared] + data[pos:pos + length]
+            pos += length
+            words.append(word)
+            previous = word
+        return words
+
+    def _block_head(self, block: int) -> bytes:
+        # Premier mot d'un bloc : préfixe commun nul (un octet), puis longueur
+        pos = self._offsets[block] + 1
+        length, pos = _read_varint(self._blob, pos)
+        return bytes(self._blob[pos:pos + length])
+
+    def _find_block(self, key: bytes) -> int:
+        """Dernier bloc dont la première chaîne est <= key (0 par défaut)"""
+        low, high = 0, self._blocks
+        while low < high:
+            mid = (low + high) // 2
+            if self._block_head(mid) <= key:
+                low = mid + 1
+            else:
+                high = mid
+        return max(low - 1, 0)
+
+    def raw(self, index: int) -> bytes:
+        return self._decode_block(index // self.block_size)[index % self.block_size]
+
+    def __getitem__(self, index: int) -> str:
+        return self.raw(index).decode("utf-8")
+
+    def lower_bound(self, key: bytes) -> int:
+        """Première position dont la chaîne est >= key"""
+        if not self._blocks:
+            return 0
+        block = self._find_block(key)
+        return block * self.block_size + bisect_left(self._decode_block(block), key)
+
+    def index(self, word: str) -> int:
+        """Position d'une chaîne, ou -1 si absente"""
+        if not self._blocks:
+            return -1
+        key = word.encode("utf-8")
+        block = self._find_block(key)
+        words = self._decode_block(block)
+        position = bisect_left(words, key)
+        if position < len(words) and words[position] == key:
+            return block * self.block_size + position
+        return -1
+
+    def prefix_range(self, prefix: str) -> Tuple[int, int]:
+        """Plage [début, fin) des chaînes commençant par prefix"""
+        key = prefix.encode("utf-8")
+        return self.lower_bound(key), self.lower_bound(key + b"\xff")
+
+    def iter_range(self, start: int, end: int):
+        """Chaînes des positions [start, end), en décodant chaque bloc une fois"""
+        block = start // self.block_size
+        position = block * self.block_size
+        while position < end:
+            for word in self._decode_block(block):
+                if start <= position < end:
+                    yield word.decode("utf-8")
+                position += 1
+            block += 1
+
+    def __iter__(self):
+        return self.iter_range(0, self.size)
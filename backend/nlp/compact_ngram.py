@@ -0,0 +1,422 @@
+# nlp/compact_ngram.py
+"""
+Format binaire compact pour le modèle N-gram.
+
+Le fichier est une suite de sections alignées sur 8 octets :
+    - un en-tête (magic, version du format, n, taille du vocabulaire...)
+    - le vocabulaire trié (octets UTF-8 concaténés + tableau d'offsets
+      + table de hachage mot -> identifiant)
+    - les fréquences des mots (uint32)
+    - pour chaque ordre de contexte : clés de contexte triées (uint64),
+      offsets, identifiants des mots suivants, comptes et totaux, plus
+      une table de hachage (adressage ouvert) clé -> position pour une
+      recherche en O(1) par ordre
+    - pour chaque contexte, ses K meilleures prédictions déjà classées
+      (repli compris) : identifiants + scores float32
+
+Les tableaux sont lus directement depuis le buffer (memoryview) sans
+reconstruire de dict Python : le chargement prend quelques millisecondes
+et la mémoire reste proche de la taille du fichier. Ouvert via mmap, le
+fichier est partagé entre tous les workers (voir artifacts.py).
+"""
+
+import heapq
+import struct
+from array import array
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Tuple
+
+from backend.nlp.algorithmic import BACKOFF_ALPHA, CompletionTrie, _MODEL_VERSIONS, stupid_backoff
+from backend.nlp.artifacts import (
+    PackedStrings,
+    build_string_hash,
+    open_artifact,
+    pack_strings,
+    read_sections,
+    write_artifact
+)
+
+MAGIC = b"MGNGRAM\0"
+# v1 : recherche des contextes par dichotomie ; v2 : + tables de hachage ;
+# v3 : + prédictions top-k précalculées
+FORMAT_VERSION = 3
+SUPPORTED_VERSIONS = (1, 2, 3)
+
+# magic, version du format, n, taille du vocabulaire, bits par mot dans une clé, total des mots
+_HEADER = struct.Struct("<8sIIIIQ")
+
+
+def _context_bits(vocab_size: int) -> int:
+    return max(1, (vocab_size - 1).bit_length())
+
+
+def _pack_context(ids, bits: int) -> int:
+    key = 0
+    for word_id in ids:
+        key = (key << bits) | word_id
+    return key
+
+
+def _hash_slot(key: int, slot_bits: int) -> int:
+    # Hachage multiplicatif de Fibonacci sur 64 bits
+    return ((key * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF) >> (64 - slot_bits)
+
+
+def _build_hash_table(keys) -> array:
+    """Table à adressage ouvert : case = position + 1 (0 = vide), taux de remplissage <= 1/2"""
+    slot_bits = max(1, (2 * len(keys)).bit_length())
+    size = 1 << slot_bits
+    slots = array("I", [0]) * size
+    for index, key in enumerate(keys):
+        slot = _hash_slot(key, slot_bits)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = index + 1
+    return slots
+
+
+# ============================================================
+# ÉCRITURE
+# ============================================================
+
+def save_compact_model(model, filepath: str):
+    """
+    Écrit un modèle N-gram au format binaire
+
+    Args:
+        model: NGramModel entraîné
+        filepath: Fichier de sortie
+    """
+    n, word_freq, ngrams = model.n, model.word_freq, model.ngrams
+    top_table, unigram_top = model.top_table()
+
+    vocab = set(word_freq)
+    for context, successors in ngrams.items():
+        vocab.update(context)
+        vocab.update(successors)
+
+    encoded = sorted(word.encode("utf-8") for word in vocab)
+    word_ids = {word.decode("utf-8"): i for i, word in enumerate(encoded)}
+    bits = _context_bits(len(encoded))
+
+    max_order = max((len(context) for context in ngrams), default=0)
+    if bits * max_order > 64:
+        raise ValueError(f"Vocabulaire trop grand pour des contextes d'ordre {max_order}")
+
+    sections = []
+
+    blob, offsets = pack_strings(encoded)
+    sections.append((b"VOCB", blob))
+    sections.append((b"VOFF", offsets))
+    sections.append((b"VHSH", build_string_hash(encoded)))
+
+    unigrams = array("I", [0] * len(encoded))
+    for word, count in word_freq.items():
+        unigrams[word_ids[word]] = count
+    sections.append((b"UNIG", unigrams.tobytes()))
+
+    # Mots classés par fréquence décroissante (repli et autocomplétion)
+    by_freq = sorted(range(len(encoded)), key=lambda i: (-unigrams[i], i))
+    sections.append((b"UTOP", array("I", by_freq).tobytes()))
+
+    sections.append((b"TOPK", array("I", [model.top_k]).tobytes()))
+    sections.append((b"UTKW", array("I", [word_ids[w] for w, _ in unigram_top]).tobytes()))
+    sections.append((b"UTKS", array("f", [score for _, score in unigram_top]).tobytes()))
+
+    by_order = defaultdict(list)
+    for context, successors in ngrams.items():
+        if successors:
+            key = _pack_context((word_ids[w] for w in context), bits)
+            by_order[len(context)].append((key, successors, top_table[context]))
+
+    for order in sorted(by_order):
+        entries = sorted(by_order[order], key=lambda entry: entry[0])
+        keys = array("Q")
+        offsets = array("I", [0])
+        successor_ids = array("I")
+        counts = array("I")
+        totals = array("I")
+        top_offsets = array("I", [0])
+        top_ids = array("I")
+        top_scores = array("f")
+
+        for key, successors, top in entries:
+            # Successeurs triés par compte décroissant : top-k = une tranche
+            ranked = sorted(successors.items(), key=lambda item: (-item[1], word_ids[item[0]]))
+            keys.append(key)
+            successor_ids.extend(word_ids[word] for word, _ in ranked)
+            counts.extend(count for _, count in ranked)
+            offsets.append(len(successor_ids))
+            totals.append(sum(count for _, count in ranked))
+            top_ids.extend(word_ids[word] for word, _ in top)
+            top_scores.extend(score for _, score in top)
+            top_offsets.append(len(top_ids))
+
+        tag = str(order).encode("ascii")
+        sections.append((b"CTX" + tag, keys.tobytes()))
+        sections.append((b"OFF" + tag, offsets.tobytes()))
+        sections.append((b"SUC" + tag, successor_ids.tobytes()))
+        sections.append((b"CNT" + tag, counts.tobytes()))
+        sections.append((b"TOT" + tag, totals.tobytes()))
+        sections.append((b"HSH" + tag, _build_hash_table(keys).tobytes()))
+        sections.append((b"TKO" + tag, top_offsets.tobytes()))
+        sections.append((b"TKW" + tag, top_ids.tobytes()))
+        sections.append((b"TKS" + tag, top_scores.tobytes()))
+
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, n, len(encoded), bits, sum(unigrams))
+    write_artifact(filepath, header, sections)
+
+
+# ============================================================
+# LECTURE
+# ============================================================
+
+class CompactNGramModel:
+    """
+    Modèle N-gram en lecture seule adossé au format binaire.
+    Même interface de prédiction et d'autocomplétion que NGramModel.
+    """
+
+    def __init__(self, filepath: str, use_mmap: bool = True):
+        self.filepath = filepath
+        self._trie = None
+        self._open(open_artifact(filepath, use_mmap=use_mmap))
+        self.version = next(_MODEL_VERSIONS)
+
+    def _open(self, buffer):
+        view = memoryview(buffer)
+        magic, version, n, vocab_size, bits, total = _HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.filepath} n'est pas un modèle N-gram compact")
+        if version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Version de format non supportée : {version}")
+
+        self.n = n
+        self.vocab_size = vocab_size
+        self.total_words = total
+        self._bits = bits
+        # Garder une référence : les vues ci-dessous pointent dans ce buffer
+        self._buffer = buffer
+
+        sections = read_sections(view, _HEADER.size)
+        self._vocab = PackedStrings(sections[b"VOCB"], sections[b"VOFF"], sections.get(b"VHSH"))
+        self._unigrams = sections[b"UNIG"].cast("I")
+        self._by_freq = sections[b"UTOP"].cast("I")
+
+        # Prédictions précalculées (format v3) : {ordre: (offsets, ids, scores)}
+        self.top_k = 0
+        self._top = {}
+        if b"TOPK" in sections:
+            self.top_k = sections[b"TOPK"].cast("I")[0]
+            self._top_unigrams = [
+                (self.word(word_id), score)
+                for word_id, score in zip(sections[b"UTKW"].cast("I"), sections[b"UTKS"].cast("f"))
+            ]
+
+        self._tables = {}
+        order = 1
+        while b"CTX%d" % order in sections:
+            tag = b"%d" % order
+            hash_table = sections.get(b"HSH" + tag)
+            self._tables[order] = (
+                sections[b"CTX" + tag].cast("Q"),
+                sections[b"OFF" + tag].cast("I"),
+                sections[b"SUC" + tag].cast("I"),
+                sections[b"CNT" + tag].cast("I"),
+                sections[b"TOT" + tag].cast("I"),
+                hash_table.cast("I") if hash_table is not None else None,
+            )
+            if self.top_k:
+                self._top[order] = (
+                    sections[b"TKO" + tag].cast("I"),
+                    sections[b"TKW" + tag].cast("I"),
+                    sections[b"TKS" + tag].cast("f"),
+                )
+            order += 1
+
+    # ---------- Vocabulaire ----------
+
+    def word(self, word_id: int) -> str:
+        """Mot correspondant à un identifiant"""
+        return self._vocab[word_id]
+
+    def word_id(self, word: str) -> int:
+        """Identifiant d'un mot, ou -1 s'il est inconnu"""
+        return self._vocab.index(word)
+
+    def word_count(self, word: str) -> int:
+        """Fréquence d'un mot dans le corpus d'entraînement"""
+        word_id = self.word_id(word)
+        return self._unigrams[word_id] if word_id >= 0 else 0
+
+    def words(self) -> Iterator[str]:
+        """Parcourt le vocabulaire dans l'ordre trié"""
+        return iter(self._vocab)
+
+    def __contains__(self, word: str) -> bool:
+        return self.word_id(word) >= 0
+
+    def __len__(self) -> int:
+        return self.vocab_size
+
+    # ---------- Prédiction ----------
+
+    def _find_context(self, order: int, key: int) -> int:
+        """Position d'une clé de contexte dans la table d'un ordre, ou -1"""
+        keys, _, _, _, _, hash_table = self._tables[order]
+
+        if hash_table is None:
+            # Format v1 : dichotomie sur les clés triées
+            index = bisect_left(keys, key)
+            return index if index < len(keys) and keys[index] == key else -1
+
+        size = len(hash_table)
+        slot = _hash_slot(key, size.bit_length() - 1)
+        while hash_table[slot]:
+            index = hash_table[slot] - 1
+            if keys[index] == key:
+                return index
+            slot = (slot + 1) & (size - 1)
+        return -1
+
+    def _lookup_ids(self, ids: Tuple[int, ...]):
+        """Retourne (total, [(mot, compte), ...]) pour un contexte d'identifiants"""
+        order = len(ids)
+        if order not in self._tables or -1 in ids:
+            return None
+
+        index = self._find_context(order, _pack_context(ids, self._bits))
+        if index < 0:
+            return None
+
+        _, offsets, successors, counts, totals, _ = self._tables[order]
+        start, end = offsets[index], offsets[index + 1]
+        return totals[index], (
+            (self.word(successors[i]), counts[i]) for i in range(start, end)
+        )
+
+    def _unigram_top(self, k: int) -> List[Tuple[str, int]]:
+        return [(self.word(i), self._unigrams[i]) for i in self._by_freq[:k]]
+
+    def predict_next_word(self, context: List[str], top_k: int = 5) -> List[Tuple[str, float]]:
+        """
+        Prédit les k mots les plus probables après un contexte
+
+        Args:
+            context: Liste des mots précédents
+            top_k: Nombre de prédictions à retourner
+
+        Returns:
+            Liste de tuples (mot, score de repli)
+        """
+        # Les mots inconnus (-1) restent dans le contexte : leurs niveaux
+        # ne sont jamais trouvés mais comptent dans la pénalité de repli
+        ids = tuple(self.word_id(w.lower()) for w in context[-(self.n - 1):])
+
+        if top_k <= self.top_k:
+            return self._predict_precomputed(ids, top_k)
+
+        return stupid_backoff(
+            ids,
+            self._lookup_ids,
+            self._unigram_top,
+            self.total_words,
+            top_k
+        )
+
+    def _predict_precomputed(self, ids: Tuple[int, ...], top_k: int) -> List[Tuple[str, float]]:
+        """Prédiction par recherche du plus long contexte connu + tranche"""
+        penalty = 1.0
+        for start in range(len(ids)):
+            suffix = ids[start:]
+            index = -1
+            if -1 not in suffix and len(suffix) in self._tables:
+                index = self._find_context(len(suffix), _pack_context(suffix, self._bits))
+            if index >= 0:
+                offsets, top_ids, top_scores = self._top[len(suffix)]
+                end = min(offsets[index + 1], offsets[index] + top_k)
+                return [
+                    (self.word(top_ids[i]), top_scores[i] * penalty)
+                    for i in range(offsets[index], end)
+                ]
+            penalty *= BACKOFF_ALPHA
+
+        return [(word, score * penalty) for word, score in self._top_unigrams[:top_k]]
+
+    # ---------- Autocomplétion ----------
+
+    def autocomplete(self, prefix: str, top_k: int = 5, max_edits: int = 0) -> List[str]:
+        """
+        Suggère des complétions pour un préfixe
+
+        Args:
+            prefix: Début du mot à compléter
+            top_k: Nombre de suggestions
+            max_edits: Nombre de fautes tolérées dans le préfixe
+
+        Returns:
+            Liste de mots possibles
+        """
+        prefix = prefix.lower()
+
+        if max_edits > 0:
+            if self._trie is None:
+                self._trie = CompletionTrie(
+                    {self.word(i): self._unigrams[i] for i in range(self.vocab_size)}
+                )
+            return self._trie.search(prefix, max_edits=max_edits, top_k=top_k)
+
+        # Les mots partageant un préfixe forment une plage contiguë du vocabulaire trié
+        start, end = self._vocab.prefix_range(prefix)
+        ranked = heapq.nsmallest(
+            top_k if top_k is not None else end - start,
+            range(start, end),
+            key=lambda i: (-self._unigrams[i], i)
+        )
+        return [self.word(i) for i in ranked]
+
+    # ---------- Conversion ----------
+
+    def to_ngram_model(self):
+        """
+        Reconstruit un NGramModel modifiable (pour réentraînement).
+        Appeler finalize() avant de s'en servir pour prédire.
+        """
+        from backend.nlp.algorithmic import NGramModel
+
+        model = NGramModel(n=self.n)
+        model.word_freq = Counter({self.word(i): self._unigrams[i] for i in range(self.vocab_size)})
+        model.total_words = self.total_words
+        model.ngrams = defaultdict(Counter)
+
+        bits = self._bits
+        mask = (1 << bits) - 1
+        for order, (keys, offsets, successors, counts, _, _) in self._tables.items():
+            for index, key in enumerate(keys):
+                context = tuple(
+                    self.word((key >> (bits * (order - 1 - pos))) & mask)
+                    for pos in range(order)
+                )
+                model.ngrams[context] = Counter({
+                    self.word(successors[i]): counts[i]
+                    for i in range(offsets[index], offsets[index + 1])
+                })
+        return model
+
+
+def load_ngram_model(filepath: str, use_mmap: bool = True):
+    """
+    Charge un modèle N-gram en détectant son format (binaire ou JSON)
+    """
+    with open(filepath, "rb") as f:
+        magic = f.read(len(MAGIC))
+
+    if magic == MAGIC:
+        return CompactNGramModel(filepath, use_mmap=use_mmap)
+
+    from backend.nlp.algorithmic import NGramModel
+
+    model = NGramModel()
+    model.load_model(filepath)
+    return model
@@ -0,0 +1,301 @@
+# nlp/definition_store.py
+"""
+Définitions du dictionnaire stockées dans SQLite et lues à la demande.
+
+Les fichiers JSON de définitions (data/malagasy_dict.json,
+data/tenymalagasy_dict.json) sont importés une fois dans une base indexée
+(data/definitions.sqlite3), reconstruite quand un fichier source est plus
+récent. get_definition interroge la base par clé primaire, derrière un
+petit cache LRU : la mémoire et le temps de démarrage ne dépendent plus
+de la taille du corpus de définitions.
+
+Un index plein texte FTS5 (mots et définitions, accents ignorés) est
+tenu à jour par triggers et sert la recherche classée de /api/search.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFINITIONS_DB_PATH = "data/definitions.sqlite3"
+
+# Sources importées, par ordre de priorité croissante (la dernière l'emporte)
+DEFINITION_SOURCES = ("data/tenymalagasy_dict.json", "data/malagasy_dict.json")
+
+# Version du schéma (PRAGMA user_version) : une base d'un autre schéma est reconstruite
+SCHEMA_VERSION = 2
+
+_SCHEMA = (
+    "CREATE TABLE definitions ("
+    " word TEXT NOT NULL UNIQUE,"
+    " definition TEXT NOT NULL,"
+    " source TEXT"
+    ")",
+    # Index plein texte adossé à la table (pas de copie du texte)
+    "CREATE VIRTUAL TABLE definitions_fts USING fts5("
+    " word, definition, content='definitions', content_rowid='rowid',"
+    " tokenize='unicode61 remove_diacritics 2'"
+    ")",
+)
+
+# Triggers créés après l'import en masse (l'index est alors reconstruit d'un coup)
+_FTS_TRIGGERS = (
+    "CREATE TRIGGER definitions_ai AFTER INSERT ON definitions BEGIN"
+    " INSERT INTO definitions_fts (rowid, word, definition) VALUES (new.rowid, new.word, new.definition);"
+    " END",
+    "CREATE TRIGGER definitions_ad AFTER DELETE ON definitions BEGIN"
+    " INSERT INTO definitions_fts (definitions_fts, rowid, word, definition)"
+    " VALUES ('delete', old.rowid, old.word, old.definition);"
+    " END",
+    "CREATE TRIGGER definitions_au AFTER UPDATE ON definitions BEGIN"
+    " INSERT INTO definitions_fts (definitions_fts, rowid, word, definition)"
+    " VALUES ('delete', old.rowid, old.word, old.definition);"
+    " INSERT INTO definitions_fts (rowid, word, definition) VALUES (new.rowid, new.word, new.definition);"
+    " END",
+)
+
+_UPSERT = (
+    "INSERT INTO definitions (word, definition, source) VALUES (?, ?, ?)"
+    " ON CONFLICT (word) DO UPDATE SET definition = excluded.definition, source = excluded.source"
+)
+
+_MISSING = object()
+
+
+def fts_query(text: str) -> str:
+    """
+    Transforme une saisie libre en requête FTS5 sûre : chaque terme est
+    cité (pas d'opérateurs injectés) et cherché comme préfixe
+    """
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+def _definition_text(value) -> Optional[str]:
+    """Normalise une entrée JSON (chaîne, liste ou objet) en texte"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        parts = [_definition_text(item) for item in value]
+        return "; ".join(part for part in parts if part) or None
+    if isinstance(value, dict):
+        for key in ("definition", "definitions", "gloss", "meaning"):
+            if key in value:
+                return _definition_text(value[key])
+        return None
+    return str(value)
+
+
+def build_definition_store(sources: Iterable[str] = DEFINITION_SOURCES,
+                           db_path: str = DEFINITIONS_DB_PATH) -> int:
+    """
+    Importe les fichiers JSON de définitions dans une nouvelle base SQLite
+    (écrite à côté puis renommée : les lecteurs en cours ne sont pas gênés)
+
+    Returns:
+        Nombre de définitions importées
+    """
+    path = Path(db_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Un fichier temporaire par processus : plusieurs workers peuvent reconstruire
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    connection = sqlite3.connect(str(tmp_path))
+    try:
+        for statement in _SCHEMA:
+            connection.execute(statement)
+        for source in sources:
+            source_path = Path(source)
+            if not source_path.exists():
+                continue
+            with open(source_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            rows = ((word.lower().strip(), _definition_text(value), source_path.name)
+                    for word, value in data.items())
+            connection.executemany(_UPSERT, (row for row in rows if row[0] and row[1]))
+        connection.execute("INSERT INTO definitions_fts (definitions_fts) VALUES ('rebuild')")
+        for statement in _FTS_TRIGGERS:
+            connection.execute(statement)
+        connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        connection.commit()
+        count = connection.execute("SELECT COUNT(*) FROM definitions").fetchone()[0]
+    finally:
+        connection.close()
+
+    tmp_path.replace(path)
+    print(f" Base de définitions écrite : {db_path} ({count} définitions)")
+    return count
+
+
+def definition_store_is_stale(sources: Iterable[str] = DEFINITION_SOURCES,
+                              db_path: str = DEFINITIONS_DB_PATH) -> bool:
+    """Vrai si la base est absente, d'un autre schéma ou plus ancienne qu'un fichier source"""
+    path = Path(db_path)
+    if not path.exists():
+        return True
+    connection = sqlite3.connect(str(path))
+    try:
+        if connection.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            return True
+    finally:
+        connection.close()
+    db_mtime = path.stat().st_mtime
+    return any(Path(source).exists() and Path(source).stat().st_mtime > db_mtime
+               for source in sources)
+
+
+class DefinitionStore:
+    """
+    Définitions mot -> texte lues dans SQLite, avec cache LRU.
+    S'utilise comme le dict MalagasyDictionary.definitions.
+    """
+
+    def __init__(self, db_path: str = DEFINITIONS_DB_PATH, cache_size: int = 4096):
+        """
+        Args:
+            db_path: Base construite par build_definition_store
+            cache_size: Nombre d'entrées (y compris les absences) en cache
+        """
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        # Pas de WAL : la base est remplacée par renommage lors des reconstructions
+        self._connection = None
+        self._inode = None
+        self._connect()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        if self._connection is not None:
+            self._connection.close()
+        self._connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._inode = os.stat(self.db_path).st_ino
+
+    def _reopen_if_replaced(self):
+        """
+        Rouvre la base si une reconstruction l'a remplacée (renommage) :
+        l'ancienne connexion lirait et écrirait un fichier supprimé.
+        Appelé sous le verrou.
+        """
+        try:
+            inode = os.stat(self.db_path).st_ino
+        except FileNotFoundError:
+            return
+        if inode != self._inode:
+            self._connect()
+            self._cache.clear()
+
+    def get(self, word, default=None):
+        with self._lock:
+            definition = self._cache.get(word, _MISSING)
+            if definition is not _MISSING:
+                self._cache.move_to_end(word)
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._reopen_if_replaced()
+                row = self._connection.execute(
+                    "SELECT definition FROM definitions WHERE word = ?", (word,)
+                ).fetchone()
+                definition = row[0] if row else None
+                self._cache[word] = definition
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return default if definition is None else definition
+
+    def __getitem__(self, word):
+        definition = self.get(word)
+        if definition is None:
+            raise KeyError(word)
+        return definition
+
+    def __contains__(self, word):
+        return self.get(word) is not None
+
+    def __setitem__(self, word, definition):
+        with self._lock:
+            self._reopen_if_replaced()
+            self._connection.execute(_UPSERT, (word, definition, "runtime"))
+            self._connection.commit()
+            self._cache[word] = definition
+
+    def update(self, definitions):
+        for word, definition in dict(definitions).items():
+            self[word] = definition
+
+    def __len__(self):
+        with self._lock:
+            self._reopen_if_replaced()
+            return self._connection.execute("SELECT COUNT(*) FROM definitions").fetchone()[0]
+
+    def items(self):
+        """Toutes les définitions, dans l'ordre des mots"""
+        with self._lock:
+            self._reopen_if_replaced()
+            rows = self._connection.execute(
+                "SELECT word, definition FROM definitions ORDER BY word"
+            ).fetchall()
+        return iter(rows)
+
+    def keys(self):
+        return (word for word, _ in self.items())
+
+    def __iter__(self):
+        return self.keys()
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Tuple[int, List[Dict]]:
+        """
+        Recherche plein texte dans les mots et les définitions (français
+        ou malagasy), classée par pertinence BM25
+
+        Args:
+            query: Saisie libre
+            limit: Taille de la page
+            offset: Nombre de résultats à sauter
+
+        Returns:
+            (nombre total de résultats, résultats de la page)
+        """
+        match = fts_query(query)
+        if not match:
+            return 0, []
+
+        with self._lock:
+            self._reopen_if_replaced()
+            total = self._connection.execute(
+                "SELECT COUNT(*) FROM definitions_fts WHERE definitions_fts MATCH ?", (match,)
+            ).fetchone()[0]
+            # Une correspondance sur le mot compte plus qu'une sur la définition
+            rows = self._connection.execute(
+                "SELECT word, definition,"
+                " snippet(definitions_fts, 1, '[', ']', '…', 12),"
+                " bm25(definitions_fts, 10.0, 1.0) AS rank"
+                " FROM definitions_fts WHERE definitions_fts MATCH ?"
+                " ORDER BY rank LIMIT ? OFFSET ?",
+                (match, limit, offset)
+            ).fetchall()
+
+        return total, [
+            {"word": word, "definition": definition, "snippet": snippet, "score": round(-rank, 4)}
+            for word, definition, snippet, rank in rows
+        ]
+
+    def get_statistics(self):
+        """Retourne des statistiques sur le cache"""
+        return {
+            "cache_entries": len(self._cache),
+            "cache_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses
+        }
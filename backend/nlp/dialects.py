@@ -0,0 +1,127 @@
+# nlp/dialects.py
+"""
+Variantes du dictionnaire (dialectes régionaux, glossaires métier).
+
+Le dictionnaire partagé est le malagasy officiel. Une variante n'en
+stocke que le delta : mots ajoutés (avec définition éventuelle) et mots
+de la base qui n'y sont pas admis. Toutes les variantes sont des vues
+sur la même base : la mémoire et le temps de démarrage ne dépendent que
+de la taille des deltas.
+
+Format (data/variants/) :
+    <nom>.txt   un mot par ligne, « -mot » retire un mot de la base,
+                « # » commence un commentaire
+    <nom>.json  définitions propres à la variante {"mot": "définition"}
+                (les mots sont aussi ajoutés)
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from backend.nlp.dictionary_loader import LayeredWordSet
+from backend.nlp.user_overlay import OverlayDictionary
+
+VARIANTS_DIR = "data/variants"
+
+# Nom de la variante correspondant au dictionnaire partagé lui-même
+OFFICIAL_VARIANT = "official"
+
+
+class VariantDictionary(OverlayDictionary):
+    """
+    Vue d'une variante : delta (ajouts + retraits) au-dessus du
+    dictionnaire partagé
+    """
+
+    def __init__(self, name: str, base, added: Dict[str, Optional[str]], removed: Set[str] = None):
+        """
+        Args:
+            name: Nom de la variante
+            base: Dictionnaire partagé (MalagasyDictionary)
+            added: Mots propres à la variante -> définition (ou None)
+            removed: Mots de la base non admis dans la variante
+        """
+        self.name = name
+        self.base = base
+        self.overlay = added
+        self.removed = (removed or set()) - added.keys()
+        self.words = LayeredWordSet(base.words, added, self.removed)
+
+    def word_exists(self, word):
+        """Vérifie si un mot existe dans la variante"""
+        word_clean = word.lower().strip(".,!?;:\"'")
+        if word_clean in self.overlay:
+            return True
+        return word_clean not in self.removed and self.base.word_exists(word_clean)
+
+    def get_definition(self, word):
+        """Définition propre à la variante, sinon celle de la base"""
+        word_clean = word.lower().strip(".,!?;:\"'")
+        if word_clean in self.removed:
+            return None
+        return super().get_definition(word_clean)
+
+    def get_statistics(self):
+        """Statistiques de la base et taille du delta"""
+        stats = self.base.get_statistics()
+        stats.update({
+            "variant": self.name,
+            "total_words": len(self.words),
+            "added_words": len(self.overlay),
+            "removed_words": len(self.removed)
+        })
+        return stats
+
+
+def _read_variant(txt_path: Path, json_path: Path):
+    added = {}
+    removed = set()
+
+    if txt_path.exists():
+        with open(txt_path, "r", encoding="utf-8") as f:
+            for line in f:
+                word = line.strip().lower()
+                if not word or word.startswith("#"):
+                    continue
+                if word.startswith("-"):
+                    removed.add(word[1:].strip())
+                else:
+                    added.setdefault(word, None)
+
+    if json_path.exists():
+        with open(json_path, "r", encoding="utf-8") as f:
+            for word, definition in json.load(f).items():
+                added[word.lower()] = definition
+
+    return added, removed
+
+
+def load_variants(base, directory: str = VARIANTS_DIR) -> Dict[str, VariantDictionary]:
+    """
+    Charge toutes les variantes de data/variants/ au-dessus de base
+
+    Returns:
+        nom -> VariantDictionary (la variante officielle n'y figure pas :
+        c'est le dictionnaire partagé)
+    """
+    variants_dir = Path(directory)
+    if not variants_dir.is_dir():
+        return {}
+
+    names = sorted({path.stem for path in variants_dir.glob("*.txt")} |
+                   {path.stem for path in variants_dir.glob("*.json")})
+
+    variants = {}
+    for name in names:
+        if name == OFFICIAL_VARIANT:
+            continue
+        try:
+            added, removed = _read_variant(variants_dir / f"{name}.txt", variants_dir / f"{name}.json")
+            variants[name] = VariantDictionary(name, base, added, removed)
+        except Exception as e:
+            print(f"  Erreur lors du chargement de la variante {name} : {e}")
+
+    if variants:
+        print(f" Variantes du dictionnaire chargées : {', '.join(variants)}")
+    return variants
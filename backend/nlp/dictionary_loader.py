@@ -1,29 +1,208 @@
 # nlp/dictionary_loader.py
 import json
 import os
+import struct
 from pathlib import Path
 
+from backend.nlp.artifacts import (
+    FRONT_CODING_BLOCK,
+    FrontCodedStrings,
+    PackedStrings,
+    build_string_hash,
+    open_artifact,
+    pack_front_coded,
+    pack_strings,
+    read_sections,
+    write_artifact
+)
+from backend.nlp.definition_store import (
+    DEFINITION_SOURCES,
+    DEFINITIONS_DB_PATH,
+    DefinitionStore,
+    build_definition_store,
+    definition_store_is_stale
+)
+from backend.nlp.morphology import MorphologicalAnalyzer
+
+WORDS_MAGIC = b"MGWORDS\0"
+# Version 1 : chaînes à plat + table de hachage (accès le plus rapide)
+# Version 2 : chaînes codées par préfixes (quelques octets par mot)
+WORDS_FORMAT_VERSION = 1
+WORDS_FORMAT_FRONT_CODED = 2
+# magic, version du format, nombre de mots
+_WORDS_HEADER = struct.Struct("<8sII")
+
+# Artefact précompilé des mots (voir build_word_artifact)
+WORD_ARTIFACT_PATH = "data/malagasy_words.bin"
+
+
+class CompactWordSet:
+    """
+    Ensemble de mots en lecture seule, trié et stocké dans un artefact binaire.
+    Ouvert via mmap, il est partagé entre tous les workers de la machine.
+    """
+    
+    def __init__(self, filepath, use_mmap=True):
+        self.filepath = filepath
+        # Garder une référence : les vues pointent dans ce buffer
+        self._buffer = open_artifact(filepath, use_mmap=use_mmap)
+        view = memoryview(self._buffer)
+        
+        magic, version, count = _WORDS_HEADER.unpack_from(view, 0)
+        if magic != WORDS_MAGIC:
+            raise ValueError(f"{filepath} n'est pas un artefact de mots")
+        if version not in (WORDS_FORMAT_VERSION, WORDS_FORMAT_FRONT_CODED):
+            raise ValueError(f"Version de format non supportée : {version}")
+        
+        sections = read_sections(view, _WORDS_HEADER.size)
+        self.front_coded = version == WORDS_FORMAT_FRONT_CODED
+        if self.front_coded:
+            block_size = sections[b"WBLK"].cast("I")[0]
+            self._strings = FrontCodedStrings(sections[b"WORD"], sections[b"WOFF"], count, block_size)
+        else:
+            self._strings = PackedStrings(sections[b"WORD"], sections[b"WOFF"], sections.get(b"WHSH"))
+    
+    def __contains__(self, word):
+        return self._strings.index(word) >= 0
+    
+    def __len__(self):
+        return len(self._strings)
+    
+    def __iter__(self):
+        return iter(self._strings)
+    
+    def iter_prefix(self, prefix):
+        """Mots commençant par prefix, dans l'ordre trié"""
+        start, end = self._strings.prefix_range(prefix)
+        return self._strings.iter_range(start, end)
+    
+    def memory_bytes(self):
+        """Taille de l'artefact en octets"""
+        return len(self._buffer)
+
+
+class LayeredWordSet:
+    """
+    Vue « ensemble » d'une base en lecture seule (CompactWordSet)
+    et d'un petit set Python pour les mots ajoutés à l'exécution.
+    Des mots de la base peuvent aussi être masqués (variantes dialectales).
+    """
+    
+    def __init__(self, base, added=None, removed=None):
+        self.base = base
+        self.added = set()
+        self.removed = set(removed) if removed else set()
+        self._removed_in_base = sum(1 for word in self.removed if word in base)
+        if added:
+            self.update(added)
+    
+    def add(self, word):
+        if word in self.removed:
+            self.removed.discard(word)
+            if word in self.base:
+                self._removed_in_base -= 1
+                return
+        if word not in self.base:
+            self.added.add(word)
+    
+    def update(self, words):
+        for word in words:
+            self.add(word)
+    
+    def __contains__(self, word):
+        if word in self.added:
+            return True
+        return word not in self.removed and word in self.base
+    
+    def __len__(self):
+        return len(self.base) + len(self.added) - self._removed_in_base
+    
+    def __iter__(self):
+        if self.removed:
+            yield from (word for word in self.base if word not in self.removed)
+        else:
+            yield from self.base
+        yield from self.added
+
+
+def build_word_artifact(words, filepath=WORD_ARTIFACT_PATH, front_coded=False):
+    """
+    Construit l'artefact binaire des mots (à lancer hors ligne,
+    après chaque mise à jour de data/malagasy_words.txt)
+    
+    Args:
+        words: Mots à inclure
+        filepath: Fichier de sortie
+        front_coded: Coder les mots par préfixes (vocabulaires de plusieurs
+                     millions de formes) plutôt qu'à plat avec table de hachage
+    """
+    encoded = sorted({word.encode("utf-8") for word in words})
+    if front_coded:
+        blob, offsets = pack_front_coded(encoded)
+        header = _WORDS_HEADER.pack(WORDS_MAGIC, WORDS_FORMAT_FRONT_CODED, len(encoded))
+        block = struct.pack("<I", FRONT_CODING_BLOCK)
+        sections = [(b"WBLK", block), (b"WORD", blob), (b"WOFF", offsets)]
+    else:
+        blob, offsets = pack_strings(encoded)
+        header = _WORDS_HEADER.pack(WORDS_MAGIC, WORDS_FORMAT_VERSION, len(encoded))
+        sections = [(b"WORD", blob), (b"WOFF", offsets), (b"WHSH", build_string_hash(encoded))]
+    write_artifact(filepath, header, sections)
+    print(f" Artefact de mots écrit : {filepath} ({len(encoded)} mots)")
+
+
 class MalagasyDictionary:
     """
     Gestionnaire de dictionnaire Malagasy pour la validation des mots.
     Supporte plusieurs sources de données.
     """
     
-    def __init__(self):
+    def __init__(self, artifact_path=WORD_ARTIFACT_PATH, word_log=None,
+                 definitions_db=DEFINITIONS_DB_PATH, morphology=True):
+        """
+        Args:
+            artifact_path: Artefact binaire des mots (None pour l'ignorer)
+            word_log: Journal des mots ajoutés (WordLog), rejoué au chargement
+            definitions_db: Base SQLite des définitions (None : JSON en mémoire)
+            morphology: Accepter les formes dérivées d'une racine connue
+                        (préfixes/suffixes) sans qu'elles soient listées
+        """
         self.words = set()
+        # Racines attestées auxquelles s'appliquent les règles d'affixes
+        self.roots = set()
         self.definitions = {}
+        self.artifact_path = artifact_path
+        self.word_log = word_log
+        self.definitions_db = definitions_db
+        self.morphology = MorphologicalAnalyzer() if morphology else None
         self.load_dictionaries()
     
     def load_dictionaries(self):
         """Charge tous les dictionnaires disponibles"""
-        # Méthode 1 : Dictionnaire de base (créé manuellement)
-        self._load_base_dictionary()
+        # Définitions lues à la demande dans SQLite (au lieu du JSON en mémoire)
+        store_loaded = self._load_definition_store()
         
-        # Méthode 2 : Dictionnaire depuis fichier JSON (si disponible)
-        self._load_json_dictionary()
+        # Méthode 0 : artefact précompilé partagé (mmap), s'il est à jour
+        if self._load_word_artifact():
+            # Les définitions ne sont pas dans l'artefact
+            self._load_json_dictionary(with_definitions=not store_loaded)
+        else:
+            # Méthode 1 : Dictionnaire de base (créé manuellement)
+            self._load_base_dictionary()
+            
+            # Méthode 2 : Dictionnaire depuis fichier JSON (si disponible)
+            self._load_json_dictionary(with_definitions=not store_loaded)
+            
+            # Méthode 3 : Dictionnaire depuis fichier texte (si disponible)
+            self._load_text_dictionary()
         
-        # Méthode 3 : Dictionnaire depuis fichier texte (si disponible)
-        self._load_text_dictionary()
+        # Mots ajoutés depuis la dernière compaction du journal
+        self._replay_word_log()
+        self._update_roots()
+    
+    def _update_roots(self):
+        """Recalcule les racines attestées (remplacées, jamais modifiées sur place)"""
+        if self.morphology is not None:
+            self.roots = self.morphology.attested_roots(self.words)
     
     def _load_base_dictionary(self):
         """
@@ -74,10 +253,64 @@ class MalagasyDictionary:
         self.words.update(base_words)
         print(f" Dictionnaire de base chargé : {len(base_words)} mots")
     
-    def _load_json_dictionary(self):
+    def _load_word_artifact(self):
+        """
+        Charge les mots depuis l'artefact binaire via mmap.
+        Ignoré si absent ou plus ancien que data/malagasy_words.txt.
+        """
+        if not self.artifact_path:
+            return False
+        
+        artifact = Path(self.artifact_path)
+        if not artifact.exists():
+            return False
+        
+        txt_path = Path("data/malagasy_words.txt")
+        if txt_path.exists() and txt_path.stat().st_mtime > artifact.stat().st_mtime:
+            print(f"ℹ  Artefact {artifact} périmé (reconstruire avec build_word_artifact)")
+            return False
+        
+        try:
+            self.words = LayeredWordSet(CompactWordSet(str(artifact)))
+        except Exception as e:
+            print(f"  Erreur lors du chargement de l'artefact : {e}")
+            return False
+        
+        print(f" Artefact de mots chargé (mmap) : {len(self.words)} mots")
+        return True
+    
+    def _load_definition_store(self):
+        """
+        Ouvre la base SQLite des définitions, reconstruite depuis les
+        fichiers JSON s'ils sont plus récents
+        """
+        if not self.definitions_db:
+            return False
+        
+        db_path = Path(self.definitions_db)
+        has_sources = any(Path(source).exists() for source in DEFINITION_SOURCES)
+        if not db_path.exists() and not has_sources:
+            return False
+        
+        try:
+            if has_sources and definition_store_is_stale(DEFINITION_SOURCES, str(db_path)):
+                build_definition_store(DEFINITION_SOURCES, str(db_path))
+            self.definitions = DefinitionStore(str(db_path))
+        except Exception as e:
+            print(f"  Erreur lors de l'ouverture de la base de définitions : {e}")
+            return False
+        
+        print(f" Base de définitions ouverte (lecture à la demande) : {db_path}")
+        return True
+    
+    def _load_json_dictionary(self, with_definitions=True):
         """
         Charge un dictionnaire depuis un fichier JSON.
         Format attendu : {"mot": "définition", ...}
+        
+        Args:
+            with_definitions: False si les définitions sont lues dans la
+                              base SQLite (seuls les mots sont ajoutés)
         """
         json_path = Path("data/malagasy_dict.json")
         
@@ -85,7 +318,8 @@ class MalagasyDictionary:
             try:
                 with open(json_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.definitions.update(data)
+                    if with_definitions:
+                        self.definitions.update(data)
                     self.words.update(data.keys())
                 print(f" Dictionnaire JSON chargé : {len(data)} mots")
             except Exception as e:
@@ -111,10 +345,41 @@ class MalagasyDictionary:
         else:
             print(f"ℹ  Fichier {txt_path} non trouvé")
     
+    def _replay_word_log(self):
+        """Rejoue le journal des mots ajoutés (sans le réécrire)"""
+        if self.word_log is None:
+            return
+        
+        replayed = 0
+        for word, definition in self.word_log.replay():
+            self.words.add(word)
+            if definition:
+                self.definitions[word] = definition
+            replayed += 1
+        
+        if replayed:
+            print(f" Journal de mots rejoué : {replayed} entrée(s)")
+    
     def word_exists(self, word):
-        """Vérifie si un mot existe dans le dictionnaire"""
+        """
+        Vérifie si un mot existe dans le dictionnaire, ou s'il dérive
+        d'une racine connue par des affixes valides
+        """
+        word_clean = word.lower().strip(".,!?;:\"'")
+        if word_clean in self.words:
+            return True
+        return (self.morphology is not None
+                and self.morphology.is_derived(word_clean, self.roots, self.words))
+    
+    def analyze(self, word):
+        """
+        Décompositions (préfixe, racine, suffixe) d'un mot dont la racine
+        est dans le dictionnaire
+        """
+        if self.morphology is None:
+            return []
         word_clean = word.lower().strip(".,!?;:\"'")
-        return word_clean in self.words
+        return list(self.morphology.decompositions(word_clean, self.roots, self.words))
     
     def get_definition(self, word):
         """Récupère la définition d'un mot (si disponible)"""
@@ -122,18 +387,24 @@ class MalagasyDictionary:
         return self.definitions.get(word_clean, None)
     
     def add_word(self, word, definition=None):
-        """Ajoute un mot au dictionnaire"""
+        """
+        Ajoute un mot au dictionnaire. Avec un journal, l'ajout est rendu
+        persistant en arrière-plan (sans réécrire les fichiers de base).
+        """
         word_clean = word.lower().strip()
         self.words.add(word_clean)
         if definition:
             self.definitions[word_clean] = definition
+        self._update_roots()
+        if self.word_log is not None:
+            self.word_log.append(word_clean, definition)
     
     def save_to_json(self, filepath="data/malagasy_dict.json"):
         """Sauvegarde le dictionnaire en JSON"""
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         
         with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(self.definitions, f, ensure_ascii=False, indent=2)
+            json.dump(dict(self.definitions.items()), f, ensure_ascii=False, indent=2)
         print(f" Dictionnaire sauvegardé : {filepath}")
     
     def save_to_text(self, filepath="data/malagasy_words.txt"):
@@ -218,7 +489,8 @@ def initialize_dictionary():
     """
     print(" Initialisation du dictionnaire Malagasy...\n")
     
-    dictionary = MalagasyDictionary()
+    # Reconstruire depuis les sources, sans l'artefact binaire
+    dictionary = MalagasyDictionary(artifact_path=None)
     
     # Option 1 : Scraper Wikipedia (décommenter si besoin)
     # print(" Scraping Wikipedia...")
@@ -229,6 +501,7 @@ def initialize_dictionary():
     # Sauvegarder
     dictionary.save_to_json()
     dictionary.save_to_text()
+    build_word_artifact(dictionary.words)
     
     # Statistiques
     stats = dictionary.get_statistics()
@@ -242,30 +515,37 @@ def initialize_dictionary():
 # INTÉGRATION AVEC symbolic.py
 # ============================================================
 
+def closest_dictionary_words(word, dictionary_words, limit=3, threshold=70):
+    """
+    Mots du dictionnaire les plus proches d'un mot inconnu (score > threshold)
+    """
+    from rapidfuzz import fuzz, process
+    
+    closest_matches = process.extract(
+        word, 
+        dictionary_words, 
+        scorer=fuzz.ratio,
+        limit=limit
+    )
+    
+    return [m[0] for m in closest_matches if m[1] > threshold]
+
+
 def validate_with_dictionary(text, dictionary):
     """
     Valide les mots d'un texte avec le dictionnaire.
     À intégrer dans symbolic_check().
     """
-    from rapidfuzz import fuzz, process
-    
     suggestions = []
     words = text.split()
+    dictionary_words = list(dictionary.words)
     
     for i, word in enumerate(words):
         word_clean = word.lower().strip(".,!?;:\"'")
         
         if not dictionary.word_exists(word_clean):
             # Mot inconnu - suggérer des corrections
-            closest_matches = process.extract(
-                word_clean, 
-                list(dictionary.words), 
-                scorer=fuzz.ratio,
-                limit=3
-            )
-            
-            # Filtrer les suggestions avec un score > 70
-            good_matches = [m for m in closest_matches if m[1] > 70]
+            good_matches = closest_dictionary_words(word_clean, dictionary_words)
             
             if good_matches:
                 suggestions.append({
@@ -273,9 +553,9 @@ def validate_with_dictionary(text, dictionary):
                     "type": "dictionnaire",
                     "severity": "warning",
                     "message": f"Mot '{word}' inconnu",
-                    "suggestion": f"Suggestions : {', '.join([m[0] for m in good_matches])}",
+                    "suggestion": f"Suggestions : {', '.join(good_matches)}",
                     "word": word,
-                    "alternatives": [m[0] for m in good_matches]
+                    "alternatives": good_matches
                 })
     
     return suggestions
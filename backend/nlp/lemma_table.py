@@ -0,0 +1,196 @@
+# nlp/lemma_table.py
+"""
+Table de lemmes précalculée pour tout le vocabulaire (dictionnaire + N-gram).
+
+Chaque mot connu est associé à (id de racine, id de préfixe, id de
+suffixe) dans un artefact binaire (data/lemmas.bin, lu via mmap). La
+lemmatisation d'un mot du vocabulaire devient une recherche dans une
+table de hachage ; seuls les mots hors vocabulaire sont segmentés par
+les tries d'affixes de MalagasyLemmatizer.
+
+L'artefact enregistre les inventaires d'affixes utilisés : il est ignoré
+s'ils ne correspondent plus à ceux du lemmatiseur.
+
+WordFamilyIndex est l'index inverse racine -> mots, construit au
+chargement, qui sert /api/word-family.
+"""
+
+import struct
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backend.nlp.artifacts import (
+    PackedStrings,
+    build_string_hash,
+    open_artifact,
+    pack_strings,
+    read_sections,
+    write_artifact
+)
+
+LEMMA_MAGIC = b"MGLEMMA\0"
+# 2 : segmentations classées par racine connue du dictionnaire
+# 3 : le mot entier (sans affixe) ne compte plus comme racine connue
+LEMMA_FORMAT_VERSION = 3
+# magic, version du format, nombre de mots
+_LEMMA_HEADER = struct.Struct("<8sII")
+
+LEMMA_TABLE_PATH = "data/lemmas.bin"
+
+
+def _pack_inventory(affixes) -> bytes:
+    # Identifiant 0 : pas d'affixe
+    return "\n".join([""] + list(affixes)).encode("utf-8")
+
+
+def build_lemma_table(words: Iterable[str], lemmatizer, filepath: str = LEMMA_TABLE_PATH) -> int:
+    """
+    Lemmatise tout le vocabulaire et écrit la table (à lancer hors ligne)
+
+    Args:
+        words: Vocabulaire (dictionnaire et modèle N-gram)
+        lemmatizer: MalagasyLemmatizer dont les inventaires sont enregistrés
+        filepath: Fichier de sortie
+
+    Returns:
+        Nombre de mots de la table
+    """
+    prefix_ids = {affix: index for index, affix in enumerate([""] + lemmatizer.prefixes)}
+    suffix_ids = {affix: index for index, affix in enumerate([""] + lemmatizer.suffixes)}
+
+    normalized = sorted({word.lower().strip() for word in words if word and word.strip()})
+    lemmas = [lemmatizer.lemmatize(word) for word in normalized]
+
+    encoded_roots = sorted({lemma["root"].encode("utf-8") for lemma in lemmas})
+    root_ids = {root: index for index, root in enumerate(encoded_roots)}
+
+    encoded_words = [word.encode("utf-8") for word in normalized]
+    root_column = array("I", (root_ids[lemma["root"].encode("utf-8")] for lemma in lemmas))
+    prefix_column = array("B", (prefix_ids[lemma["prefix"]] for lemma in lemmas))
+    suffix_column = array("B", (suffix_ids[lemma["suffix"]] for lemma in lemmas))
+
+    word_blob, word_offsets = pack_strings(encoded_words)
+    root_blob, root_offsets = pack_strings(encoded_roots)
+    header = _LEMMA_HEADER.pack(LEMMA_MAGIC, LEMMA_FORMAT_VERSION, len(encoded_words))
+    sections = [
+        (b"WORD", word_blob), (b"WOFF", word_offsets), (b"WHSH", build_string_hash(encoded_words)),
+        (b"ROOT", root_blob), (b"ROFF", root_offsets),
+        (b"LRID", root_column.tobytes()), (b"LPFX", prefix_column.tobytes()),
+        (b"LSFX", suffix_column.tobytes()),
+        (b"AFXP", _pack_inventory(lemmatizer.prefixes)), (b"AFXS", _pack_inventory(lemmatizer.suffixes)),
+    ]
+    write_artifact(filepath, header, sections)
+    print(f" Table de lemmes écrite : {filepath} ({len(encoded_words)} mots, {len(encoded_roots)} racines)")
+    return len(encoded_words)
+
+
+class LemmaTable:
+    """
+    Table mot -> (racine, préfixe, suffixe) en lecture seule, partagée
+    entre workers via mmap
+    """
+
+    def __init__(self, filepath: str = LEMMA_TABLE_PATH, use_mmap: bool = True):
+        self.filepath = filepath
+        # Garder une référence : les vues pointent dans ce buffer
+        self._buffer = open_artifact(filepath, use_mmap=use_mmap)
+        view = memoryview(self._buffer)
+
+        magic, version, count = _LEMMA_HEADER.unpack_from(view, 0)
+        if magic != LEMMA_MAGIC:
+            raise ValueError(f"{filepath} n'est pas une table de lemmes")
+        if version != LEMMA_FORMAT_VERSION:
+            raise ValueError(f"Version de format non supportée : {version}")
+
+        sections = read_sections(view, _LEMMA_HEADER.size)
+        self._words = PackedStrings(sections[b"WORD"], sections[b"WOFF"], sections[b"WHSH"])
+        self._roots = PackedStrings(sections[b"ROOT"], sections[b"ROFF"])
+        self._root_ids = sections[b"LRID"].cast("I")
+        self._prefix_ids = sections[b"LPFX"]
+        self._suffix_ids = sections[b"LSFX"]
+        self.prefixes = bytes(sections[b"AFXP"]).decode("utf-8").split("\n")
+        self.suffixes = bytes(sections[b"AFXS"]).decode("utf-8").split("\n")
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return self._words.index(word) >= 0
+
+    def matches(self, lemmatizer) -> bool:
+        """Vrai si la table a été construite avec les inventaires du lemmatiseur"""
+        return self.prefixes[1:] == lemmatizer.prefixes and self.suffixes[1:] == lemmatizer.suffixes
+
+    def lookup(self, word: str) -> Optional[Dict]:
+        """
+        Lemme d'un mot normalisé (minuscules, sans espaces), au même
+        format que MalagasyLemmatizer.lemmatize ; None si hors vocabulaire
+        """
+        index = self._words.index(word)
+        if index < 0:
+            return None
+
+        prefix = self.prefixes[self._prefix_ids[index]]
+        suffix = self.suffixes[self._suffix_ids[index]]
+        return {
+            "original": word,
+            "root": self._roots[self._root_ids[index]],
+            "prefix": prefix,
+            "suffix": suffix,
+            "has_prefix": bool(prefix),
+            "has_suffix": bool(suffix)
+        }
+
+
+def load_lemma_table(lemmatizer, filepath: str = LEMMA_TABLE_PATH) -> Optional[LemmaTable]:
+    """
+    Ouvre la table de lemmes si elle existe et correspond au lemmatiseur
+    """
+    if not Path(filepath).exists():
+        return None
+
+    try:
+        table = LemmaTable(filepath)
+    except Exception as e:
+        print(f"  Erreur lors du chargement de la table de lemmes : {e}")
+        return None
+
+    if not table.matches(lemmatizer):
+        print(f"ℹ  Table de lemmes {filepath} périmée (inventaires d'affixes modifiés)")
+        return None
+
+    print(f" Table de lemmes chargée (mmap) : {len(table)} mots")
+    return table
+
+
+class WordFamilyIndex:
+    """
+    Index inverse racine -> mots connus de cette racine (famille de mots)
+    """
+
+    def __init__(self, words: Iterable[str], lemmatizer):
+        """
+        Args:
+            words: Vocabulaire à indexer (mots du dictionnaire)
+            lemmatizer: MalagasyLemmatizer (utilise la table de lemmes s'il en a une)
+        """
+        self.lemmatizer = lemmatizer
+        families = defaultdict(list)
+        for word in words:
+            families[lemmatizer.lemmatize(word)["root"]].append(word)
+        self._families = {root: tuple(sorted(members)) for root, members in families.items()}
+
+    def __len__(self) -> int:
+        return len(self._families)
+
+    def family(self, word: str) -> Tuple[str, List[str]]:
+        """
+        Racine d'un mot et mots connus qui la partagent
+
+        Returns:
+            (racine, mots de la famille triés, le mot lui-même compris s'il est connu)
+        """
+        root = self.lemmatizer.lemmatize(word)["root"]
+        return root, list(self._families.get(root, ()))
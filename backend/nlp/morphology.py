@@ -0,0 +1,228 @@
+# nlp/morphology.py
+"""
+Dictionnaire morphologique : racines + règles d'affixes (style hunspell).
+
+Plutôt que de lister chaque forme fléchie dans malagasy_words.txt, un mot
+inconnu est accepté s'il se décompose en préfixe + racine connue + suffixe.
+Les inventaires d'affixes sont ceux de MalagasyLemmatizer, précompilés en
+tables indexées par longueur : tester un mot coûte quelques recherches
+dans des sets, quelle que soit la taille du vocabulaire.
+
+Règles morphophonologiques prises en compte :
+    - mutation nasale : man-/fan-/mpan- absorbent t, s, ts
+      (man + soratra -> manoratra), mam-/fam-/mpam- absorbent p, f, v
+      (mam + vaky -> mamaky) ; aucun autre préfixe ne déclenche de mutation
+    - m-, f- et mp- seuls ne s'attachent qu'à une racine à initiale
+      vocalique (m + ihinana), jamais à boky, faly ou vola
+    - un nom d'agent en mp- (mpan-, mpam-, mpa-) n'est accepté que si le
+      verbe en m- correspondant est dans le dictionnaire
+      (mpanoratra <- manoratra)
+    - finale de la racine modifiée devant -ana/-ina
+      (soratra + ana -> soratana, vaky + ana -> vakiana) : une racine
+      dont la finale change n'est pas acceptée telle quelle (vola + ana
+      donne volana, pas volaana)
+    - les affixes ne s'empilent pas sur une forme fléchie : seules les
+      racines attestées (au moins un mot du vocabulaire en dérive) sont
+      des racines, et une racine à préfixe verbal m- (m-/man-/mi-) ne
+      prend pas de suffixe (mandeha + ana, ratsy + ana et mi + telo
+      sont refusés)
+
+-tra, -ka et -na sont des finales de racine et non des suffixes, et tsy
+est un mot à part entière : ils sont exclus des tables.
+"""
+
+import itertools
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from backend.nlp.algorithmic import MalagasyLemmatizer
+
+# Consonnes initiales de la racine absorbées par chaque préfixe nasal
+# (la plus longue d'abord)
+NASAL_MUTATIONS = {
+    "man": ("ts", "t", "s"),
+    "fan": ("ts", "t", "s"),
+    "mpan": ("ts", "t", "s"),
+    "mam": ("p", "f", "v"),
+    "fam": ("p", "f", "v"),
+    "mpam": ("p", "f", "v"),
+}
+
+# Préfixes réduits à une consonne : seulement devant une voyelle
+CONSONANT_PREFIXES = ("m", "f", "mp")
+VOWELS = "aeiouyàâéèêìîô"
+
+# Entrées de l'inventaire du lemmatiseur qui ne sont pas des affixes
+NON_AFFIXES = ("tsy", "tra", "ka", "na")
+
+# Suffixes devant lesquels la finale de la racine change
+ROOT_CHANGING_SUFFIXES = ("ana", "ina")
+
+# (fin du radical devant le suffixe, finale de la racine), dans l'ordre d'application
+ROOT_ENDING_RULES = (
+    ("t", "tra"),   # soratra -> soratana
+    ("r", "tra"),   # anatra -> anarana
+    ("h", "ka"),    # tapaka -> tapahina
+    ("n", "na"),    # tsangana -> tsanganana
+    ("i", "y"),     # vaky -> vakiana
+    ("", "a"),      # sasa -> sasana
+)
+
+# Initiale des préfixes verbaux actifs (m-, man-, mi-, ma-...) : une
+# racine qui la porte est déjà fléchie et ne prend pas de suffixe
+VERBAL_PREFIX_INITIAL = "m"
+
+# Longueur minimale d'une racine (évite les décompositions fantaisistes)
+MIN_ROOT_LENGTH = 3
+
+
+class AffixTable:
+    """
+    Inventaire de préfixes et suffixes précompilé : pour chaque longueur,
+    l'ensemble des affixes de cette longueur
+    """
+
+    def __init__(self, prefixes: Iterable[str], suffixes: Iterable[str]):
+        self.prefixes = self._by_length(prefixes)
+        self.suffixes = self._by_length(suffixes)
+
+    @staticmethod
+    def _by_length(affixes) -> List[Tuple[int, frozenset]]:
+        groups: Dict[int, set] = {}
+        for affix in affixes:
+            groups.setdefault(len(affix), set()).add(affix)
+        # Plus long en premier, comme MalagasyLemmatizer
+        return [(length, frozenset(groups[length])) for length in sorted(groups, reverse=True)]
+
+    @classmethod
+    def from_lemmatizer(cls, lemmatizer: MalagasyLemmatizer = None) -> "AffixTable":
+        lemmatizer = lemmatizer or MalagasyLemmatizer()
+        return cls([affix for affix in lemmatizer.prefixes if affix not in NON_AFFIXES],
+                   [affix for affix in lemmatizer.suffixes if affix not in NON_AFFIXES])
+
+    def matching_prefixes(self, word: str) -> Iterator[str]:
+        """Préfixes de l'inventaire qui commencent word (plus long d'abord)"""
+        for length, group in self.prefixes:
+            if len(word) > length and word[:length] in group:
+                yield word[:length]
+
+    def matching_suffixes(self, word: str) -> Iterator[str]:
+        """Suffixes de l'inventaire qui terminent word (plus long d'abord)"""
+        for length, group in self.suffixes:
+            if len(word) > length and word[-length:] in group:
+                yield word[-length:]
+
+    def all_prefixes(self) -> List[str]:
+        return [affix for _, group in self.prefixes for affix in sorted(group)]
+
+    def all_suffixes(self) -> List[str]:
+        return [affix for _, group in self.suffixes for affix in sorted(group)]
+
+
+def _restored_roots_after_prefix(prefix: str, stem: str) -> Iterator[str]:
+    """Racines possibles une fois le préfixe retiré (mutation nasale annulée)"""
+    if prefix in CONSONANT_PREFIXES and stem[:1] not in VOWELS:
+        return
+    yield stem
+    for consonant in NASAL_MUTATIONS.get(prefix, ()):
+        yield consonant + stem
+
+
+def _restored_roots_before_suffix(suffix: str, stem: str) -> Iterator[str]:
+    """Racines possibles une fois le suffixe retiré (finale de racine rétablie)"""
+    if suffix not in ROOT_CHANGING_SUFFIXES:
+        yield stem
+        return
+    # Radical inchangé : seulement si aucune règle de finale ne s'applique
+    if _stem_before_suffix(suffix, stem) == stem:
+        yield stem
+    for stem_ending, root_ending in ROOT_ENDING_RULES:
+        if stem.endswith(stem_ending):
+            yield stem[:len(stem) - len(stem_ending)] + root_ending
+
+
+def _stem_before_suffix(suffix: str, root: str) -> str:
+    """Radical d'une racine devant un suffixe (inverse de la règle ci-dessus)"""
+    if suffix in ROOT_CHANGING_SUFFIXES:
+        for stem_ending, root_ending in ROOT_ENDING_RULES:
+            if root.endswith(root_ending):
+                return root[:len(root) - len(root_ending)] + stem_ending
+    return root
+
+
+class MorphologicalAnalyzer:
+    """
+    Reconnaît les formes dérivées d'une racine connue par des règles
+    d'affixes, sans les stocker
+    """
+
+    def __init__(self, affixes: AffixTable = None, min_root_length: int = MIN_ROOT_LENGTH):
+        self.affixes = affixes or AffixTable.from_lemmatizer()
+        self.min_root_length = min_root_length
+
+    def decompositions(self, word: str, roots, words=None) -> Iterator[Tuple[str, str, str]]:
+        """
+        Décompositions (préfixe, racine, suffixe) de word dont la racine
+        appartient à roots ; les affixes vides sont représentés par ""
+
+        Args:
+            roots: Racines admises (voir attested_roots)
+            words: Vocabulaire complet, où chercher le verbe en m- d'un nom
+                   d'agent en mp- (roots par défaut)
+        """
+        words = roots if words is None else words
+        prefix_options = [("", word)] + [(prefix, word[len(prefix):])
+                                         for prefix in self.affixes.matching_prefixes(word)]
+
+        for prefix, rest in prefix_options:
+            if prefix.startswith("mp") and "m" + word[2:] not in words:
+                continue
+            suffix_options = [("", rest)] + [(suffix, rest[:-len(suffix)])
+                                             for suffix in self.affixes.matching_suffixes(rest)]
+            for suffix, stem in suffix_options:
+                if not prefix and not suffix:
+                    continue
+                for candidate in _restored_roots_before_suffix(suffix, stem) if suffix else (stem,):
+                    roots_to_try = (_restored_roots_after_prefix(prefix, candidate)
+                                    if prefix else (candidate,))
+                    for root in roots_to_try:
+                        if suffix and root.startswith(VERBAL_PREFIX_INITIAL):
+                            continue
+                        if len(root) >= self.min_root_length and root in roots:
+                            yield prefix, root, suffix
+
+    def is_derived(self, word: str, roots, words=None) -> bool:
+        """Vrai si word se décompose en affixes valides + racine connue"""
+        return next(self.decompositions(word, roots, words), None) is not None
+
+    def attested_roots(self, words: Iterable[str]) -> set:
+        """
+        Racines réellement attestées : mots du vocabulaire dont au moins
+        un autre mot du vocabulaire dérive. Un mot fléchi (mandeha) ou sans
+        dérivé connu n'en fait pas partie, les affixes ne s'empilent donc
+        pas dessus.
+        """
+        roots = set()
+        for word in words:
+            for _, root, _ in self.decompositions(word, words):
+                roots.add(root)
+        return roots
+
+    def generate(self, root: str) -> Iterator[str]:
+        """
+        Génère paresseusement les formes candidates d'une racine
+        (préfixe et/ou suffixe, avec mutations) sans les matérialiser
+        """
+        prefixes = [""] + self.affixes.all_prefixes()
+        suffixes = [""] + self.affixes.all_suffixes()
+
+        for prefix, suffix in itertools.product(prefixes, suffixes):
+            if not prefix and not suffix:
+                continue
+            if prefix in CONSONANT_PREFIXES and root[:1] not in VOWELS:
+                continue
+            stem = _stem_before_suffix(suffix, root)
+            for consonant in NASAL_MUTATIONS.get(prefix, ()):
+                if stem.startswith(consonant):
+                    stem = stem[len(consonant):]
+                    break
+            yield prefix + stem + suffix
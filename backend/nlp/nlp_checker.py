@@ -4,40 +4,313 @@ API complète d'analyse de texte Malagasy
 Combine les modules symbolic et algorithmic
 """
 
-from backend.nlp.symbolic import symbolic_check
+from backend.nlp import symbolic
+from backend.nlp.symbolic import symbolic_check, DICTIONARY, WORD_LOG
 from backend.nlp.algorithmic import (
     SpellChecker, 
     MalagasyLemmatizer,
+    CompletionTrie,
+    AutocompleteCache,
     NGramModel,
     SentenceAnalyzer,
     SentenceValidator
 )
+from backend.nlp.compact_ngram import load_ngram_model
+from backend.nlp.dialects import OFFICIAL_VARIANT, load_variants
 from backend.nlp.dictionary_loader import MalagasyDictionary
-from typing import Dict, List
+from backend.nlp.lemma_table import LEMMA_TABLE_PATH, WordFamilyIndex, load_lemma_table
+from backend.nlp.online_learning import MAX_PENDING_TEXTS, OnlineNGramLearner
+from backend.nlp.pipeline import WORD_PUNCTUATION, TextAnalysis
+from backend.nlp.user_overlay import UserOverlayStore
+from backend.nlp.word_features import WordFeatureTable
+from pathlib import Path
+from typing import Dict, List, Optional
+import os
+import threading
+import time
 
-# Charger le dictionnaire et les modèles une seule fois
-DICTIONARY = MalagasyDictionary()
-LEMMATIZER = MalagasyLemmatizer()
-ANALYZER = SentenceAnalyzer()
+
+def build_lemmatizer(dictionary) -> MalagasyLemmatizer:
+    """Lemmatiseur dont les racines sont classées sur le dictionnaire, avec la table de lemmes"""
+    lemmatizer = MalagasyLemmatizer()
+    lemmatizer.roots = dictionary.words
+    lemmatizer.table = load_lemma_table(lemmatizer)
+    return lemmatizer
+
+
+def build_analyzer(dictionary) -> SentenceAnalyzer:
+    """Analyseur de phrases dont les classes de mots sont précalculées sur le dictionnaire"""
+    analyzer = SentenceAnalyzer()
+    analyzer.classes.precompute(dictionary.words)
+    return analyzer
+
+
+# Charger les modèles une seule fois (le dictionnaire est partagé avec symbolic.py).
+# Un rechargement construit de nouvelles instances au lieu de modifier celles-ci.
+LEMMATIZER = build_lemmatizer(DICTIONARY)
+ANALYZER = build_analyzer(DICTIONARY)
 VALIDATOR = SentenceValidator()
 
-# Charger le modèle N-gram (si disponible)
-try:
-    NGRAM_MODEL = NGramModel(n=2)
-    NGRAM_MODEL.load_model("data/ngram_model.json")
-    print(" Modèle N-gram chargé")
-except:
-    NGRAM_MODEL = None
+NGRAM_MODEL_PATHS = ("data/ngram_model.bin", "data/ngram_model.json")
+
+
+def _data_files_state(paths=None):
+    """Date de modification de chaque fichier surveillé (fichiers des dossiers compris)"""
+    state = {}
+    for path in paths if paths is not None else WATCHED_DATA_FILES:
+        target = Path(path)
+        # Dossier (data/variants) : la date du dossier ne change pas quand
+        # un fichier est modifié sur place, suivre chaque fichier
+        files = sorted(target.rglob("*")) if target.is_dir() else (target,)
+        for file in files:
+            try:
+                if file.is_file() or file is target:
+                    state[str(file)] = file.stat().st_mtime_ns
+            except FileNotFoundError:
+                state[str(file)] = None
+    return state
+
+
+def load_best_ngram_model():
+    """
+    Charge le modèle N-gram disponible (si présent)
+    Format binaire compact en priorité, JSON sinon
+    """
+    for model_path in NGRAM_MODEL_PATHS:
+        if not Path(model_path).exists():
+            continue
+        try:
+            model = load_ngram_model(model_path)
+            print(f" Modèle N-gram chargé : {model_path}")
+            return model
+        except Exception as e:
+            print(f"  Erreur lors du chargement de {model_path} : {e}")
+    
     print("ℹ  Modèle N-gram non disponible (entraîner d'abord)")
+    return None
+
+
+NGRAM_MODEL = load_best_ngram_model()
+# Fichiers du modèle servi : un rechargement ne relit le modèle que s'ils ont changé
+_NGRAM_FILES_STATE = _data_files_state(NGRAM_MODEL_PATHS)
+
+# Variantes (dialectes, glossaires) : deltas au-dessus du dictionnaire partagé
+VARIANTS = load_variants(DICTIONARY)
+
+# Familles de mots (racine -> mots du dictionnaire), reconstruites au rechargement
+WORD_FAMILIES = WordFamilyIndex(DICTIONARY.words, LEMMATIZER)
+
+# Caractéristiques précalculées des mots du vocabulaire (règles, racine, polarité)
+WORD_FEATURES = WordFeatureTable(DICTIONARY.words, LEMMATIZER)
+
+# Trie du dictionnaire (autocomplétion sans modèle N-gram), construit à la demande
+_DICTIONARY_TRIE = None
+
+# Cache partagé par tous les clients (clé : préfixe, fautes, version du modèle)
+AUTOCOMPLETE_CACHE = AutocompleteCache(maxsize=2048)
+
+
+def set_ngram_model(model):
+    """
+    Remplace le modèle N-gram servi. L'affectation est atomique : les
+    requêtes en cours terminent sur l'ancien modèle, et le cache
+    d'autocomplétion (clé = version du modèle) n'est plus consulté pour lui.
+    """
+    global NGRAM_MODEL
+    NGRAM_MODEL = model
+
+
+# Apprentissage en ligne : désactivé sauf si MALAGASY_ONLINE_LEARNING=1
+LEARNER = None
+if os.environ.get("MALAGASY_ONLINE_LEARNING") == "1" and NGRAM_MODEL is not None:
+    LEARNER = OnlineNGramLearner(
+        NGRAM_MODEL,
+        on_swap=set_ngram_model,
+        merge_interval=float(os.environ.get("MALAGASY_LEARNING_INTERVAL", "300"))
+    )
+    LEARNER.start()
+    print(" Apprentissage en ligne activé")
+
+
+# Intégration périodique du journal des mots ajoutés dans data/
+WORD_LOG.start_compaction(float(os.environ.get("MALAGASY_WORD_LOG_COMPACTION_INTERVAL", "600")))
+
+
+# ============================================================
+# RECHARGEMENT À CHAUD (dictionnaire + modèle N-gram)
+# ============================================================
+
+# Fichiers surveillés dans data/ (mots, définitions, modèles)
+WATCHED_DATA_FILES = (
+    "data/malagasy_words.txt",
+    "data/malagasy_words.bin",
+    "data/malagasy_dict.json",
+    "data/variants",
+    LEMMA_TABLE_PATH,
+) + NGRAM_MODEL_PATHS
+
+_RELOAD_LOCK = threading.Lock()
+RELOAD_STATUS = {"reloads": 0, "last_reload": None, "last_error": None, "in_progress": False}
+
+
+def swap_models(dictionary=None, ngram_model=None, variants=None, word_families=None,
+                word_features=None, lemmatizer=None, analyzer=None):
+    """
+    Remplace atomiquement les références globales. Les requêtes en cours
+    gardent les objets qu'elles ont déjà lus (aucun n'est modifié sur
+    place) ; les caches dérivés sont vidés. Le lemmatiseur, l'analyseur,
+    les variantes, familles et caractéristiques doivent être construits
+    sur le nouveau dictionnaire.
+    """
+    global DICTIONARY, NGRAM_MODEL, VARIANTS, WORD_FAMILIES, WORD_FEATURES, _DICTIONARY_TRIE
+    global LEMMATIZER, ANALYZER
+    
+    if dictionary is not None:
+        lemmatizer = lemmatizer if lemmatizer is not None else build_lemmatizer(dictionary)
+        analyzer = analyzer if analyzer is not None else build_analyzer(dictionary)
+        variants = variants if variants is not None else load_variants(dictionary)
+        word_families = (word_families if word_families is not None
+                         else WordFamilyIndex(dictionary.words, lemmatizer))
+        word_features = (word_features if word_features is not None
+                         else WordFeatureTable(dictionary.words, lemmatizer))
+        
+        symbolic.DICTIONARY = dictionary
+        DICTIONARY = dictionary
+        LEMMATIZER = lemmatizer
+        ANALYZER = analyzer
+        VARIANTS = variants
+        WORD_FAMILIES = word_families
+        WORD_FEATURES = word_features
+        _DICTIONARY_TRIE = None
+    
+    if ngram_model is not None:
+        # Instantané appris présent : il reste servi (voir set_base_model)
+        if LEARNER is None or LEARNER.set_base_model(ngram_model):
+            NGRAM_MODEL = ngram_model
+    
+    AUTOCOMPLETE_CACHE.clear()
+
+
+def reload_models() -> bool:
+    """
+    Reconstruit le dictionnaire (et le modèle N-gram si ses fichiers ont
+    changé) depuis data/ puis les échange avec les versions servies
+    
+    Returns:
+        False si un rechargement est déjà en cours
+    """
+    if not _RELOAD_LOCK.acquire(blocking=False):
+        return False
+    
+    RELOAD_STATUS["in_progress"] = True
+    _reload_locked()
+    return True
+
+
+def _reload_locked():
+    """Rechargement proprement dit : appelé avec _RELOAD_LOCK pris, qu'il relâche"""
+    global _NGRAM_FILES_STATE
+    try:
+        dictionary = MalagasyDictionary(word_log=WORD_LOG)
+        variants = load_variants(dictionary)
+        
+        # Modèle N-gram relu seulement si ses propres fichiers ont changé
+        # (un changement du dictionnaire ne touche pas au modèle appris)
+        ngram_model = None
+        ngram_state = _data_files_state(NGRAM_MODEL_PATHS)
+        if ngram_state != _NGRAM_FILES_STATE:
+            ngram_model = load_best_ngram_model()
+        
+        # Nouvelles instances : les requêtes en cours gardent les anciennes
+        lemmatizer = build_lemmatizer(dictionary)
+        analyzer = build_analyzer(dictionary)
+        word_families = WordFamilyIndex(dictionary.words, lemmatizer)
+        word_features = WordFeatureTable(dictionary.words, lemmatizer)
+        swap_models(dictionary=dictionary, ngram_model=ngram_model, variants=variants,
+                    word_families=word_families, word_features=word_features,
+                    lemmatizer=lemmatizer, analyzer=analyzer)
+        _NGRAM_FILES_STATE = ngram_state
+        RELOAD_STATUS["reloads"] += 1
+        RELOAD_STATUS["last_reload"] = time.time()
+        RELOAD_STATUS["last_error"] = None
+        print(f" Modèles rechargés : {len(dictionary.words)} mots")
+    except Exception as e:
+        RELOAD_STATUS["last_error"] = str(e)
+        print(f"  Erreur lors du rechargement : {e}")
+    finally:
+        RELOAD_STATUS["in_progress"] = False
+        _RELOAD_LOCK.release()
+
+
+def reload_models_in_background() -> bool:
+    """Lance le rechargement dans un thread ; False si déjà en cours"""
+    # Verrou pris avant de lancer le thread : deux demandes simultanées ne
+    # peuvent pas démarrer deux rechargements (le thread le relâche)
+    if not _RELOAD_LOCK.acquire(blocking=False):
+        return False
+    
+    RELOAD_STATUS["in_progress"] = True
+    try:
+        threading.Thread(target=_reload_locked, name="models-reload", daemon=True).start()
+    except Exception:
+        RELOAD_STATUS["in_progress"] = False
+        _RELOAD_LOCK.release()
+        raise
+    return True
+
+
+def watch_data_files(interval: float = 10.0):
+    """
+    Surveille data/ (par scrutation) et recharge les modèles quand un
+    fichier change
+    """
+    def run():
+        state = _data_files_state()
+        while True:
+            time.sleep(interval)
+            current = _data_files_state()
+            # Rechargement déjà en cours : réessayer au tour suivant
+            if current != state and reload_models():
+                state = current
+    
+    threading.Thread(target=run, name="data-watcher", daemon=True).start()
+
+
+# Surveillance automatique : désactivée sauf si MALAGASY_WATCH_DATA=1
+if os.environ.get("MALAGASY_WATCH_DATA") == "1":
+    watch_data_files(float(os.environ.get("MALAGASY_WATCH_INTERVAL", "10")))
+    print(" Surveillance de data/ activée")
+
+
+# Dictionnaires personnels (couches SQLite au-dessus du dictionnaire partagé)
+USER_OVERLAYS = UserOverlayStore()
+
+
+def get_dictionary(user_id: Optional[str] = None, variant: Optional[str] = None):
+    """
+    Dictionnaire à utiliser pour une requête : le dictionnaire partagé ou
+    la variante demandée, augmenté de la couche personnelle de user_id
+    s'il est fourni
+    """
+    dictionary = DICTIONARY
+    if variant and variant != OFFICIAL_VARIANT:
+        # Variante disparue entre-temps (rechargement) : dictionnaire officiel
+        dictionary = VARIANTS.get(variant, dictionary)
+    if user_id:
+        return USER_OVERLAYS.overlay(user_id, dictionary)
+    return dictionary
 
 
-def check_text_complete(text: str) -> Dict:
+def check_text_complete(text: str, user_id: Optional[str] = None,
+                        variant: Optional[str] = None) -> Dict:
     """
     Analyse complète d'un texte Malagasy
     Combine toutes les vérifications (symbolic + algorithmic)
     
     Args:
         text: Texte à analyser
+        user_id: Utilisateur ou équipe (dictionnaire personnel), optionnel
+        variant: Variante du dictionnaire (dialecte, glossaire), optionnelle
     
     Returns:
         Dict avec toutes les analyses et suggestions
@@ -56,10 +329,18 @@ def check_text_complete(text: str) -> Dict:
         "statistics": {}
     }
     
+    # Même version du dictionnaire pour toute la requête (rechargement à chaud)
+    dictionary = get_dictionary(user_id, variant)
+    
+    # Résultats intermédiaires calculés une fois et partagés par les étapes
+    spell_checker = SpellChecker(dictionary.words, known_word=dictionary.word_exists)
+    analysis = TextAnalysis(text, dictionary, ANALYZER, VALIDATOR, LEMMATIZER, spell_checker)
+    
     # ============================================================
     # 1. VÉRIFICATIONS SYMBOLIQUES (Règles linguistiques)
     # ============================================================
-    symbolic_suggestions = symbolic_check(text)
+    symbolic_suggestions = symbolic_check(text, dictionary, features=WORD_FEATURES,
+                                          memo=analysis.memo)
     
     # Formater les suggestions symboliques
     for sugg in symbolic_suggestions:
@@ -76,8 +357,7 @@ def check_text_complete(text: str) -> Dict:
     # ============================================================
     # 2. CORRECTION ORTHOGRAPHIQUE (Levenshtein)
     # ============================================================
-    spell_checker = SpellChecker(DICTIONARY.words)
-    spelling_errors = spell_checker.correct_text(text)
+    spelling_errors = analysis.spelling_errors
     
     for error in spelling_errors:
         results["suggestions"].append({
@@ -94,17 +374,15 @@ def check_text_complete(text: str) -> Dict:
     # ============================================================
     # 3. VALIDATION DE STRUCTURE DE PHRASE
     # ============================================================
-    sentences = ANALYZER.split_sentences(text)
+    sentences = analysis.sentences
     
-    for sentence in sentences:
-        sentence_validation = VALIDATOR.validate_sentence(sentence)
-        
+    for sentence, sentence_validation in zip(sentences, analysis.sentence_validations):
         for validation in sentence_validation:
             results["suggestions"].append({
                 "type": validation["type"],
                 "severity": validation["severity"],
-                "position": text.find(sentence),
-                "word": sentence[:30] + "..." if len(sentence) > 30 else sentence,
+                "position": sentence.start,
+                "word": sentence.text[:30] + "..." if len(sentence.text) > 30 else sentence.text,
                 "message": validation["message"],
                 "suggestion": validation["suggestion"],
                 "category": "structure"
@@ -113,24 +391,20 @@ def check_text_complete(text: str) -> Dict:
     # ============================================================
     # 4. ANALYSE DE PHRASES
     # ============================================================
-    sentence_analysis = ANALYZER.analyze_text(text)
+    sentence_analysis = analysis.sentence_summary
     results["analysis"]["sentences"] = sentence_analysis
     
     # ============================================================
     # 5. LEMMATISATION
     # ============================================================
-    lemmatization_results = LEMMATIZER.lemmatize_text(text)
-    results["analysis"]["lemmatization"] = lemmatization_results
+    results["analysis"]["lemmatization"] = analysis.lemmas
     
     # ============================================================
     # 6. STATISTIQUES
     # ============================================================
-    words = text.split()
-    unique_words = set(w.lower().strip(".,!?;:\"'") for w in words)
-    
     results["statistics"] = {
-        "total_words": len(words),
-        "unique_words": len(unique_words),
+        "total_words": len(analysis.tokens),
+        "unique_words": len(analysis.unique_words),
         "total_sentences": len(sentences),
         "average_sentence_length": sentence_analysis.get("average_words", 0),
         "vso_compliance": sentence_analysis.get("vso_percentage", 0),
@@ -153,75 +427,174 @@ def get_next_word_predictions(context: List[str], top_k: int = 5) -> List[Dict]:
         top_k: Nombre de prédictions
     
     Returns:
-        Liste de prédictions avec probabilités
+        Liste de prédictions avec leur score de repli (stupid backoff,
+        entre 0 et 1 mais non normalisé : ce n'est pas une probabilité)
     """
-    if not NGRAM_MODEL:
+    model = NGRAM_MODEL
+    if not model:
         return []
     
-    predictions = NGRAM_MODEL.predict_next_word(context, top_k)
+    predictions = model.predict_next_word(context, top_k)
     
     return [
         {
             "word": word,
-            "probability": prob,
-            "confidence": f"{prob:.1%}"
+            "score": round(score, 6),
+            "confidence": f"{score:.1%}"
         }
-        for word, prob in predictions
+        for word, score in predictions
     ]
 
 
-def autocomplete_word(prefix: str, top_k: int = 5) -> List[str]:
+def learn_from_text(text: str) -> Dict:
+    """
+    Soumet un texte accepté par l'utilisateur à l'apprentissage en ligne
+    
+    Args:
+        text: Texte validé par l'utilisateur (qui a donné son accord)
+    
+    Returns:
+        Dict avec l'état de la file d'apprentissage (queue_full : texte
+        refusé car la file est pleine, une fusion est en cours)
+    """
+    if LEARNER is None:
+        return {"accepted": False, "pending": 0, "queue_full": False}
+    
+    pending = LEARNER.submit(text)
+    if pending is None:
+        return {"accepted": False, "pending": MAX_PENDING_TEXTS, "queue_full": True}
+    return {"accepted": True, "pending": pending, "queue_full": False}
+
+
+def autocomplete_word(prefix: str, top_k: int = 5, max_edits: int = 0) -> List[str]:
     """
     Suggère des complétions pour un préfixe
     
     Args:
         prefix: Début du mot
         top_k: Nombre de suggestions
+        max_edits: Nombre de fautes tolérées dans le préfixe (0 = exact)
     
     Returns:
         Liste de mots possibles
     """
-    if not NGRAM_MODEL:
-        # Fallback : chercher dans le dictionnaire
-        prefix_lower = prefix.lower()
-        matches = [
-            word for word in DICTIONARY.words 
-            if word.startswith(prefix_lower)
-        ]
-        return sorted(matches)[:top_k]
+    global _DICTIONARY_TRIE
+    
+    prefix = prefix.lower()
+    model = NGRAM_MODEL
+    
+    if not model:
+        # Fallback : chercher dans le dictionnaire (fréquences égales,
+        # donc ordre alphabétique à distance égale)
+        trie = _DICTIONARY_TRIE
+        if trie is None:
+            trie = _DICTIONARY_TRIE = CompletionTrie({word: 0 for word in DICTIONARY.words})
+        compute = lambda p, k: trie.search(p, max_edits=max_edits, top_k=k)
+        version = 0
+    else:
+        compute = lambda p, k: model.autocomplete(p, k, max_edits=max_edits)
+        version = model.version
+    
+    return AUTOCOMPLETE_CACHE.get_or_compute(prefix, top_k, max_edits, version, compute)
+
+
+def get_word_family(word: str, limit: int = 50) -> Dict:
+    """
+    Mots connus dérivés de la même racine (famille de mots)
     
-    return NGRAM_MODEL.autocomplete(prefix, top_k)
+    Args:
+        word: Mot de départ
+        limit: Nombre maximal de mots retournés
+    
+    Returns:
+        Dict avec la racine et les autres membres de la famille
+    """
+    word_clean = word.lower().strip(".,!?;:\"'")
+    root, members = WORD_FAMILIES.family(word_clean)
+    others = [member for member in members if member != word_clean]
+    
+    return {
+        "word": word,
+        "root": root,
+        "family": others[:limit],
+        "count": len(others)
+    }
 
 
-def get_word_info(word: str) -> Dict:
+def search_definitions(query: str, limit: int = 20, offset: int = 0) -> Optional[Dict]:
+    """
+    Recherche plein texte dans les entrées du dictionnaire
+    
+    Args:
+        query: Termes en français ou en malagasy
+        limit: Taille de la page
+        offset: Nombre de résultats à sauter
+    
+    Returns:
+        Dict avec le total et la page de résultats, ou None si aucune
+        base de définitions n'est disponible (index FTS absent)
+    """
+    definitions = DICTIONARY.definitions
+    if not hasattr(definitions, "search"):
+        return None
+    
+    total, results = definitions.search(query, limit=limit, offset=offset)
+    
+    return {
+        "query": query,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
+        "results": results
+    }
+
+
+def get_word_info(word: str, user_id: Optional[str] = None, variant: Optional[str] = None) -> Dict:
     """
     Obtient toutes les informations sur un mot
     
     Args:
         word: Mot à analyser
+        user_id: Utilisateur ou équipe (dictionnaire personnel), optionnel
+        variant: Variante du dictionnaire (dialecte, glossaire), optionnelle
     
     Returns:
         Dict avec lemmatisation, validation, définition
     """
     word_clean = word.lower().strip(".,!?;:\"'")
+    dictionary = get_dictionary(user_id, variant)
     
     info = {
         "word": word,
-        "exists": DICTIONARY.word_exists(word_clean),
-        "definition": DICTIONARY.get_definition(word_clean),
+        "exists": dictionary.word_exists(word_clean),
+        "definition": dictionary.get_definition(word_clean),
         "lemmatization": LEMMATIZER.lemmatize(word_clean),
+        "features": WORD_FEATURES.describe(word_clean, dictionary),
         "suggestions": []
     }
     
     # Si le mot n'existe pas, suggérer des corrections
     if not info["exists"]:
-        spell_checker = SpellChecker(DICTIONARY.words)
+        spell_checker = SpellChecker(dictionary.words, known_word=dictionary.word_exists)
         result = spell_checker.check_word(word_clean)
         info["suggestions"] = result.get("suggestions", [])
     
     return info
 
 
+def count_sentiment_words(text: str) -> Dict:
+    """
+    Compte les mots de sentiment distincts d'un texte, mot par mot (« be »
+    n'est pas compté dans « bebe »)
+    
+    Returns:
+        Dict avec le nombre de mots positifs et négatifs
+    """
+    words = {token.lower().strip(WORD_PUNCTUATION) for token in text.split()}
+    polarities = [WORD_FEATURES.polarity(word) for word in words if word]
+    return {"positive": polarities.count(1), "negative": polarities.count(-1)}
+
+
 def format_suggestions_by_category(suggestions: List[Dict]) -> Dict:
     """
     Organise les suggestions par catégorie pour l'affichage
@@ -0,0 +1,220 @@
+# nlp/online_learning.py
+"""
+Apprentissage en ligne du modèle N-gram à partir des textes acceptés
+par les utilisateurs (sur consentement explicite).
+
+Les requêtes se contentent d'ajouter le texte dans une file (deque.append
+est atomique : aucun verrou côté requête). File pleine : le texte est
+refusé et une fusion est déclenchée sans attendre. Un thread de fond vide
+la file à intervalle régulier, ajoute ces comptes à ses comptes en
+mémoire, écrit un nouvel instantané binaire puis remplace le modèle
+servi. Les requêtes en cours terminent sur l'ancien modèle.
+
+L'instantané (data/ngram_model.learned.bin) n'est pas versionné : le
+modèle de base data/ngram_model.bin n'est jamais réécrit. Au démarrage,
+l'instantané existant remplace le modèle de base (le supprimer après un
+réentraînement du modèle de base).
+
+Avec plusieurs workers, la fusion se fait sous un verrou de fichier et
+repart de l'instantané le plus récent quand un autre worker l'a écrit :
+aucun apport n'est perdu, et chaque worker recharge les instantanés
+écrits par les autres.
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Optional
+
+from backend.nlp.algorithmic import corpus_sentences
+from backend.nlp.compact_ngram import CompactNGramModel
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+# Taille maximale d'un texte soumis et de la file d'attente
+MAX_TEXT_LENGTH = 10000
+MAX_PENDING_TEXTS = 10000
+
+# Instantané du modèle appris (non versionné, voir .gitignore)
+LEARNED_MODEL_PATH = "data/ngram_model.learned.bin"
+
+
+class OnlineNGramLearner:
+    """
+    Couche d'apprentissage incrémental au-dessus du modèle N-gram servi
+    """
+
+    def __init__(self, model, on_swap: Callable, snapshot_path: str = LEARNED_MODEL_PATH,
+                 merge_interval: float = 300.0):
+        """
+        Args:
+            model: Modèle de base servi (NGramModel ou CompactNGramModel)
+            on_swap: Appelé avec le nouveau modèle après chaque fusion
+            snapshot_path: Instantané binaire partagé (rechargé au démarrage)
+            merge_interval: Secondes entre deux fusions
+        """
+        self.model = model
+        self.on_swap = on_swap
+        self.snapshot_path = Path(snapshot_path)
+        self.merge_interval = merge_interval
+        self._pending = deque()
+        # Comptes modifiables du modèle servi, construits à la première fusion
+        self._counts = None
+        self._snapshot_mtime = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.merged_texts = 0
+        self.rejected_texts = 0
+
+        if self.snapshot_path.exists():
+            self._swap(CompactNGramModel(str(self.snapshot_path)))
+            print(f" Modèle appris chargé : {self.snapshot_path}")
+
+    def submit(self, text: str) -> Optional[int]:
+        """
+        Ajoute un texte accepté par l'utilisateur (appelé par les requêtes)
+
+        Returns:
+            Nombre de textes en attente de fusion, ou None si la file est
+            pleine (texte refusé, fusion déclenchée)
+        """
+        if len(self._pending) >= MAX_PENDING_TEXTS:
+            self.rejected_texts += 1
+            self._wake.set()
+            return None
+        self._pending.append(text[:MAX_TEXT_LENGTH])
+        return len(self._pending)
+
+    def _current_mtime(self):
+        try:
+            return self.snapshot_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @contextmanager
+    def _file_lock(self):
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.snapshot_path.with_name(self.snapshot_path.name + ".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def set_base_model(self, model) -> bool:
+        """
+        Nouveau modèle de base (fichier réentraîné). Tant que l'instantané
+        appris existe, il reste la base des fusions et le modèle servi : le
+        supprimer pour repartir du nouveau modèle de base.
+
+        Returns:
+            True si le modèle est adopté (et doit être servi)
+        """
+        with self._file_lock():
+            if self.snapshot_path.exists():
+                print(f"ℹ  Instantané appris conservé : {self.snapshot_path}")
+                return False
+            self.model = model
+            self._counts = None
+            return True
+
+    def _swap(self, model):
+        self.model = model
+        self._snapshot_mtime = self._current_mtime()
+        self.on_swap(model)
+
+    def merge_now(self) -> bool:
+        """
+        Fusionne les textes en attente et écrit un nouvel instantané
+
+        Returns:
+            True si le modèle servi a été remplacé
+        """
+        texts = []
+        while self._pending:
+            texts.append(self._pending.popleft())
+
+        written = False
+        try:
+            with self._file_lock():
+                # Un autre worker a écrit l'instantané : repartir de celui-ci
+                snapshot_changed = (self._current_mtime() != self._snapshot_mtime
+                                    and self.snapshot_path.exists())
+
+                if not texts:
+                    if snapshot_changed:
+                        self._counts = None
+                        self._swap(CompactNGramModel(str(self.snapshot_path)))
+                        return True
+                    return False
+
+                if snapshot_changed:
+                    self._counts = CompactNGramModel(str(self.snapshot_path)).to_ngram_model()
+                elif self._counts is None:
+                    self._counts = self.model.to_ngram_model()
+
+                # Seuls les textes en attente sont comptés
+                self._counts.update_counts(corpus_sentences(texts))
+                self._counts.save_binary(str(self.snapshot_path))
+                written = True
+                self._swap(CompactNGramModel(str(self.snapshot_path)))
+        except Exception:
+            # Instantané non écrit (écriture atomique) : les textes retournent
+            # en tête de file, et les comptes déjà incrémentés sont abandonnés
+            # pour ne pas les compter deux fois au prochain essai
+            if not written:
+                self._counts = None
+                self._pending.extendleft(reversed(texts))
+            raise
+
+        self.merged_texts += len(texts)
+        print(f" Apprentissage en ligne : {len(texts)} texte(s) fusionné(s)")
+        return True
+
+    def _run(self):
+        while True:
+            # Réveil périodique, ou immédiat quand la file est pleine
+            self._wake.wait(self.merge_interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                self.merge_now()
+            except Exception as e:
+                print(f"  Erreur lors de la fusion en ligne : {e}")
+
+    def start(self):
+        """Démarre le thread de fusion périodique"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="ngram-online-learning", daemon=True)
+            self._thread.start()
+
+    def stop(self, merge: bool = True):
+        """Arrête le thread (et fusionne ce qui reste en attente)"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if merge:
+            self.merge_now()
+
+    def get_statistics(self):
+        """Retourne des statistiques sur l'apprentissage en ligne"""
+        return {
+            "pending_texts": len(self._pending),
+            "max_pending_texts": MAX_PENDING_TEXTS,
+            "merged_texts": self.merged_texts,
+            "rejected_texts": self.rejected_texts,
+            "merge_interval_seconds": self.merge_interval,
+            "model_version": self.model.version
+        }
@@ -0,0 +1,157 @@
+# nlp/pipeline.py
+"""
+Analyse d'un texte pour une requête : chaque résultat intermédiaire
+(mots, phrases, analyse de chaque phrase, lemmes, mots inconnus) est
+calculé une seule fois, à la première demande, puis partagé par toutes
+les étapes de check_text_complete (validation, statistiques, score).
+
+Les résultats par mot (présence dans le dictionnaire, suggestions
+d'orthographe, lemme, règles symboliques) passent par un TokenMemo
+commun : un mot distinct n'est analysé qu'une fois par étape, même
+s'il apparaît des centaines de fois (ny, aho, amin'ny...).
+
+Les dépendances entre étapes suivent les attributs :
+
+    text -> token_spans -> tokens -> normalized_tokens -> unique_words -> unknown_words
+                                                     \\-> lemmas      \\-> spelling_errors
+    text -> sentences -> sentence_analyses -> sentence_summary
+                                          \\-> sentence_validations
+"""
+
+import re
+from functools import cached_property
+from typing import Callable, Dict, List, Set, Tuple
+
+from backend.nlp.segmentation import Sentence
+
+# Ponctuation retirée autour d'un mot avant les recherches dans le dictionnaire
+WORD_PUNCTUATION = ".,!?;:\"'"
+
+# Mot tel qu'écrit (mêmes mots que text.split(), avec leur position)
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+class TokenMemo:
+    """
+    Résultats par mot d'une requête, partagés par toutes les étapes
+    """
+
+    def __init__(self):
+        self._results = {}
+
+    def get(self, stage: str, word: str, compute: Callable):
+        """Résultat de l'étape stage pour word, calculé au premier appel"""
+        key = (stage, word)
+        result = self._results.get(key, _MISSING)
+        if result is _MISSING:
+            result = self._results[key] = compute(word)
+        return result
+
+    def update(self, stage: str, results):
+        """Enregistre des résultats (mot, résultat) calculés en lot"""
+        for word, result in results:
+            self._results[(stage, word)] = result
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+
+_MISSING = object()
+
+
+class TextAnalysis:
+    """
+    Résultats intermédiaires mémorisés de l'analyse d'un texte
+    """
+
+    def __init__(self, text: str, dictionary, analyzer, validator, lemmatizer, spell_checker=None):
+        """
+        Args:
+            text: Texte de la requête
+            dictionary: Dictionnaire de la requête (même version pour toutes les étapes)
+            analyzer: SentenceAnalyzer
+            validator: SentenceValidator
+            lemmatizer: MalagasyLemmatizer
+            spell_checker: SpellChecker sur le même dictionnaire (étape orthographe)
+        """
+        self.text = text
+        self.dictionary = dictionary
+        self.analyzer = analyzer
+        self.validator = validator
+        self.lemmatizer = lemmatizer
+        self.spell_checker = spell_checker
+        self.memo = TokenMemo()
+
+    def known(self, word: str) -> bool:
+        """Présence d'un mot normalisé dans le dictionnaire (une recherche par mot distinct)"""
+        return bool(word) and self.memo.get("known", word, self.dictionary.word_exists)
+
+    @cached_property
+    def token_spans(self) -> List[Tuple[str, int]]:
+        """Mots du texte tels qu'écrits, avec leur position"""
+        return [(match.group(), match.start()) for match in TOKEN_PATTERN.finditer(self.text)]
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        """Mots du texte, tels qu'écrits"""
+        return [token for token, _ in self.token_spans]
+
+    @cached_property
+    def normalized_tokens(self) -> List[str]:
+        """Mots en minuscules, sans ponctuation autour (vides compris)"""
+        return [token.lower().strip(WORD_PUNCTUATION) for token in self.tokens]
+
+    @cached_property
+    def unique_words(self) -> Set[str]:
+        """Mots normalisés distincts"""
+        return set(self.normalized_tokens)
+
+    @cached_property
+    def unknown_words(self) -> Set[str]:
+        """Mots normalisés distincts absents du dictionnaire"""
+        return {word for word in self.unique_words if word and not self.known(word)}
+
+    @cached_property
+    def lemmas(self) -> List[Dict]:
+        """Lemme de chaque mot non vide, dans l'ordre du texte"""
+        words = [word for word in self.unique_words if word]
+        self.memo.update("lemma", zip(words, self.lemmatizer.lemmatize_many(words)))
+        return [self.memo.get("lemma", word, self.lemmatizer.lemmatize)
+                for word in self.normalized_tokens if word]
+
+    @cached_property
+    def spelling_errors(self) -> List[Dict]:
+        """Mots inconnus et leurs suggestions (recherche approchée une fois par mot distinct)"""
+        errors = []
+        for (token, start), word in zip(self.token_spans, self.normalized_tokens):
+            if not word or self.known(word):
+                continue
+            result = self.memo.get("spelling", word, self.spell_checker.check_word)
+            if not result["correct"]:
+                errors.append({
+                    "position": start,
+                    "original": token,
+                    "suggestions": result["suggestions"],
+                    "type": "spelling"
+                })
+        return errors
+
+    @cached_property
+    def sentences(self) -> List[Sentence]:
+        """Phrases du texte, avec leurs positions"""
+        return list(self.analyzer.iter_sentences(self.text))
+
+    @cached_property
+    def sentence_analyses(self) -> List[Dict]:
+        """Analyse (verbe, conjonctions, ordre VSO...) de chaque phrase"""
+        return [self.analyzer.analyze_sentence(sentence.text) for sentence in self.sentences]
+
+    @cached_property
+    def sentence_summary(self) -> Dict:
+        """Statistiques du texte sur l'ensemble des phrases"""
+        return self.analyzer.summarize(self.text, self.sentence_analyses)
+
+    @cached_property
+    def sentence_validations(self) -> List[List[Dict]]:
+        """Suggestions de structure de chaque phrase"""
+        return [self.validator.validate_analysis(analysis) for analysis in self.sentence_analyses]
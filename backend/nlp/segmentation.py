@@ -0,0 +1,123 @@
+# nlp/segmentation.py
+"""
+Découpage d'un texte en phrases avec leurs positions.
+
+Chaque phrase est produite avec ses positions de début et de fin dans le
+texte d'origine : plus besoin de la retrouver avec text.find (coûteux,
+et faux quand une phrase apparaît deux fois). Le découpage est un
+générateur qui peut consommer le texte morceau par morceau (fichier,
+flux réseau) sans le charger ni matérialiser la liste des phrases.
+
+Fin de phrase :
+    - . ! ? … (éventuellement répétés)
+    - retour à la ligne (titre, ligne d'un éditeur)
+sauf un point après une abréviation (Atoa., Dr.), une initiale (J.)
+ou entre deux chiffres (3.5).
+"""
+
+import re
+from typing import Iterable, Iterator, NamedTuple
+
+# Abréviations suivies d'un point qui ne termine pas la phrase (minuscules)
+ABBREVIATIONS = frozenset({
+    "atoa", "rtoa", "rtkl", "dr", "pr", "prof", "mgr", "st", "ste",
+    "mme", "mlle", "cf", "ex", "fig", "vol", "tel", "tél", "av", "bd",
+})
+
+# Ponctuation de fin de phrase, ou retour à la ligne
+_BOUNDARY = re.compile(r"[.!?…]+|\n")
+
+# Dernier mot avant une position
+_LAST_WORD = re.compile(r"(\w+)$")
+
+
+class Sentence(NamedTuple):
+    """Phrase (sans la ponctuation finale) et ses positions dans le texte"""
+    text: str
+    start: int
+    end: int
+
+
+class SentenceSegmenter:
+    """
+    Découpeur de phrases qui conserve les positions
+    """
+
+    def __init__(self, abbreviations: Iterable[str] = ABBREVIATIONS):
+        self.abbreviations = frozenset(abbreviations)
+
+    def segment(self, text: str) -> Iterator[Sentence]:
+        """Phrases d'un texte complet"""
+        return self.segment_stream((text,))
+
+    def segment_stream(self, chunks: Iterable[str]) -> Iterator[Sentence]:
+        """
+        Phrases d'un texte lu morceau par morceau. Les positions sont
+        celles du texte complet ; seule la phrase en cours est gardée
+        en mémoire.
+        """
+        buffer = ""
+        # Position de buffer[0] dans le texte complet
+        base = 0
+        scan_from = 0
+
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer += chunk
+            sentence_start = 0
+
+            for match in _BOUNDARY.finditer(buffer, scan_from):
+                # Ponctuation en fin de morceau : elle peut continuer, et
+                # le caractère suivant décide des nombres décimaux
+                if match.end() == len(buffer):
+                    scan_from = match.start()
+                    break
+                if self._is_boundary(buffer, sentence_start, match):
+                    sentence = self._sentence(buffer, base, sentence_start, match.start())
+                    if sentence is not None:
+                        yield sentence
+                    sentence_start = match.end()
+            else:
+                scan_from = len(buffer)
+
+            # Oublier ce qui a déjà été produit
+            buffer = buffer[sentence_start:]
+            base += sentence_start
+            scan_from -= sentence_start
+
+        # Fin du texte : la ponctuation restante termine la phrase
+        match = _BOUNDARY.search(buffer, scan_from)
+        end = match.start() if match is not None and match.end() == len(buffer) else len(buffer)
+        sentence = self._sentence(buffer, base, 0, end)
+        if sentence is not None:
+            yield sentence
+
+    def _is_boundary(self, buffer: str, sentence_start: int, match) -> bool:
+        punctuation = match.group()
+        if punctuation != ".":
+            return True
+
+        position = match.start()
+        # Nombre décimal : 3.5
+        if (position > 0 and buffer[position - 1].isdigit()
+                and buffer[position + 1:position + 2].isdigit()):
+            return False
+
+        last_word = _LAST_WORD.search(buffer, sentence_start, position)
+        if last_word is None:
+            return True
+        word = last_word.group(1)
+        # Initiale (J. Rabe) ou abréviation (Atoa. Rabe)
+        if len(word) == 1 and word.isupper():
+            return False
+        return word.lower() not in self.abbreviations
+
+    @staticmethod
+    def _sentence(buffer: str, base: int, start: int, end: int):
+        text = buffer[start:end]
+        stripped = text.strip()
+        if not stripped:
+            return None
+        start += len(text) - len(text.lstrip())
+        return Sentence(stripped, base + start, base + start + len(stripped))
@@ -1,178 +1,229 @@
 # nlp/symbolic.py (VERSION INTÉGRÉE AVEC DICTIONNAIRE)
 import re
-from backend.nlp.dictionary_loader import MalagasyDictionary, validate_with_dictionary
+from backend.nlp.algorithmic import FOREIGN_INDICATORS
+from backend.nlp.dictionary_loader import MalagasyDictionary, closest_dictionary_words
+from backend.nlp.pipeline import TOKEN_PATTERN, TokenMemo
+from backend.nlp.word_log import WordLog
+
+# Journal des mots ajoutés, partagé par les rechargements du dictionnaire
+WORD_LOG = WordLog()
 
 # Charger le dictionnaire une seule fois (au démarrage)
-DICTIONARY = MalagasyDictionary()
+DICTIONARY = MalagasyDictionary(word_log=WORD_LOG)
+
+# ============================================================
+# RÈGLES LINGUISTIQUES
+# ============================================================
+
+# Combinaisons phonotactiques interdites en Malagasy
+FORBIDDEN_COMBINATIONS = {
+    "nb": "Utiliser 'mb' à la place",
+    "mk": "Vérifier l'orthographe - 'mk' n'existe pas",
+    "dt": "Utiliser 'd' ou 't' séparément",
+    "bp": "Utiliser 'b' ou 'p' séparément",
+    "sz": "Utiliser 's' ou 'z' séparément"
+}
+
+# Préfixes courants (avec exemples)
+VALID_PREFIXES = {
+    "mi-": ["mitory", "milaza", "mihinana"],
+    "ma-": ["mahay", "mahita", "manana"],
+    "man-": ["manao", "manome", "mandray"],
+    "mam-": ["mamaky", "mamindra", "mamita"],
+    "maha-": ["mahafaly", "mahagaga"],
+    "mpan-": ["mpanao", "mpandray"],
+    "mpam-": ["mpamaky", "mpamindra"],
+    "fi-": ["fihaoana", "fitiavana"],
+    "fan-": ["fanao", "fanomezana"],
+    "fam-": ["famakiana", "famindrana"],
+    "tsy": ["tsy", "tsisy"]
+}
+
+# Suffixes courants (avec leur sens)
+VALID_SUFFIXES = {
+    "-ana": "nominalisation/lieu",
+    "-ina": "passif/impératif",
+    "-na": "passif court",
+    "-itra": "résultat d'action",
+    "-nana": "possession abstraite"
+}
 
-def symbolic_check(text):
+_FORBIDDEN_PATTERNS = [re.compile(comb, re.IGNORECASE) for comb in FORBIDDEN_COMBINATIONS]
+_TRIPLE_VOWEL = re.compile(r'([aeiou])\1{2,}', re.IGNORECASE)
+_NON_MALAGASY_LETTERS = re.compile(r'\b\w*[wqx]\w*\b', re.IGNORECASE)
+
+# Règles (numérotées comme ci-dessous) qu'un mot déclenche : bit 1 << (règle - 1)
+FORBIDDEN_COMBINATION = 1 << 0
+SHORT_PREFIXED_ROOT = 1 << 1
+SHORT_SUFFIXED_ROOT = 1 << 2
+TRIPLE_VOWEL = 1 << 3
+NK_START = 1 << 4
+NON_MALAGASY_LETTER = 1 << 5
+FOREIGN_WORD = 1 << 7
+
+# Règle 7 (dictionnaire) : toujours évaluée avec le dictionnaire de la requête
+_DICTIONARY_RULE = 7
+_FOREIGN_RULE = 8
+
+
+def _word_findings(word):
     """
-    Analyse le texte pour détecter les erreurs symboliques selon des règles linguistiques malagasy.
-    Retourne une liste de suggestions avec justification.
+    Constats des règles 1 à 6 et 8 pour un mot tel qu'écrit (ponctuation
+    comprise) : liste de ((règle, sous-ordre), position dans le mot, constat).
+    Ne dépend que du mot : mémorisable, et vide pour la plupart des mots.
+    La règle 8 est à confirmer avec le dictionnaire.
     """
-    suggestions = []
-    words = text.split()
+    findings = []
     
-    # ============================================================
     # Règle 1 : Combinaisons phonotactiques interdites en Malagasy
-    # ============================================================
-    forbidden_combinations = {
-        "nb": "Utiliser 'mb' à la place",
-        "mk": "Vérifier l'orthographe - 'mk' n'existe pas",
-        "dt": "Utiliser 'd' ou 't' séparément",
-        "bp": "Utiliser 'b' ou 'p' séparément",
-        "sz": "Utiliser 's' ou 'z' séparément"
-    }
-    
-    for comb, suggestion in forbidden_combinations.items():
-        pattern = re.compile(comb, re.IGNORECASE)
-        for match in pattern.finditer(text):
-            suggestions.append({
-                "position": match.start(),
+    for index, (comb, suggestion) in enumerate(FORBIDDEN_COMBINATIONS.items()):
+        for match in _FORBIDDEN_PATTERNS[index].finditer(word):
+            findings.append(((1, index), match.start(), {
                 "type": "phonotactique",
                 "severity": "error",
                 "message": f"Combinaison interdite '{comb}' détectée",
                 "suggestion": suggestion,
-                "word": _get_word_at_position(text, match.start())
-            })
+                "word": _get_word_at_position(word, match.start())
+            }))
     
-    # ============================================================
-    # Règle 2 : Validation des préfixes courants
-    # ============================================================
-    valid_prefixes = {
-        "mi-": ["mitory", "milaza", "mihinana"],
-        "ma-": ["mahay", "mahita", "manana"],
-        "man-": ["manao", "manome", "mandray"],
-        "mam-": ["mamaky", "mamindra", "mamita"],
-        "maha-": ["mahafaly", "mahagaga"],
-        "mpan-": ["mpanao", "mpandray"],
-        "mpam-": ["mpamaky", "mpamindra"],
-        "fi-": ["fihaoana", "fitiavana"],
-        "fan-": ["fanao", "fanomezana"],
-        "fam-": ["famakiana", "famindrana"],
-        "tsy": ["tsy", "tsisy"]
-    }
+    word_lower = word.lower().strip(".,!?;:")
     
-    for i, word in enumerate(words):
-        word_lower = word.lower().strip(".,!?;:")
-        
-        for prefix in valid_prefixes.keys():
-            if word_lower.startswith(prefix):
-                root = word_lower[len(prefix):]
-                
-                if len(root) < 2:
-                    suggestions.append({
-                        "position": text.find(word),
-                        "type": "morphologie",
-                        "severity": "warning",
-                        "message": f"Préfixe '{prefix}' sur racine trop courte",
-                        "suggestion": f"Vérifier le mot '{word}' - racine incomplète",
-                        "word": word
-                    })
+    # Règle 2 : Validation des préfixes courants
+    for prefix in VALID_PREFIXES:
+        if word_lower.startswith(prefix) and len(word_lower) - len(prefix) < 2:
+            findings.append(((2, 0), 0, {
+                "type": "morphologie",
+                "severity": "warning",
+                "message": f"Préfixe '{prefix}' sur racine trop courte",
+                "suggestion": f"Vérifier le mot '{word}' - racine incomplète",
+                "word": word
+            }))
     
-    # ============================================================
     # Règle 3 : Validation des suffixes courants
-    # ============================================================
-    valid_suffixes = {
-        "-ana": "nominalisation/lieu",
-        "-ina": "passif/impératif",
-        "-na": "passif court",
-        "-itra": "résultat d'action",
-        "-nana": "possession abstraite"
-    }
-    
-    for i, word in enumerate(words):
-        word_lower = word.lower().strip(".,!?;:")
-        
-        for suffix, meaning in valid_suffixes.items():
-            if word_lower.endswith(suffix):
-                root = word_lower[:-len(suffix)]
-                
-                if len(root) < 2:
-                    suggestions.append({
-                        "position": text.find(word),
-                        "type": "morphologie",
-                        "severity": "warning",
-                        "message": f"Suffixe '{suffix}' sur racine trop courte",
-                        "suggestion": f"Vérifier le mot '{word}' - racine incomplète",
-                        "word": word
-                    })
+    for suffix in VALID_SUFFIXES:
+        if word_lower.endswith(suffix) and len(word_lower) - len(suffix) < 2:
+            findings.append(((3, 0), 0, {
+                "type": "morphologie",
+                "severity": "warning",
+                "message": f"Suffixe '{suffix}' sur racine trop courte",
+                "suggestion": f"Vérifier le mot '{word}' - racine incomplète",
+                "word": word
+            }))
     
-    # ============================================================
     # Règle 4 : Doublons de voyelles non-standards
-    # ============================================================
-    double_vowel_pattern = re.compile(r'([aeiou])\1{2,}', re.IGNORECASE)
-    
-    for match in double_vowel_pattern.finditer(text):
-        suggestions.append({
-            "position": match.start(),
+    for match in _TRIPLE_VOWEL.finditer(word):
+        findings.append(((4, 0), match.start(), {
             "type": "orthographe",
             "severity": "warning",
             "message": f"Triple voyelle '{match.group()}' détectée",
             "suggestion": "Vérifier l'orthographe - peu commun en Malagasy",
-            "word": _get_word_at_position(text, match.start())
-        })
+            "word": _get_word_at_position(word, match.start())
+        }))
     
-    # ============================================================
     # Règle 5 : Mots commençant par 'nk' (rare en début de mot)
-    # ============================================================
-    for i, word in enumerate(words):
-        word_lower = word.lower()
-        if word_lower.startswith("nk") and len(word_lower) > 2:
-            suggestions.append({
-                "position": text.find(word),
-                "type": "phonotactique",
-                "severity": "warning",
-                "message": f"Mot commençant par 'nk' : '{word}'",
-                "suggestion": "Vérifier - 'nk' en début de mot est rare",
-                "word": word
-            })
+    if word.lower().startswith("nk") and len(word) > 2:
+        findings.append(((5, 0), 0, {
+            "type": "phonotactique",
+            "severity": "warning",
+            "message": f"Mot commençant par 'nk' : '{word}'",
+            "suggestion": "Vérifier - 'nk' en début de mot est rare",
+            "word": word
+        }))
     
-    # ============================================================
     # Règle 6 : Lettres non-malagasy (w, c, q, u isolé, x)
-    # ============================================================
-    non_malagasy_letters = re.compile(r'\b\w*[wqx]\w*\b', re.IGNORECASE)
-    
-    for match in non_malagasy_letters.finditer(text):
-        word = match.group()
-        suggestions.append({
-            "position": match.start(),
+    for match in _NON_MALAGASY_LETTERS.finditer(word):
+        findings.append(((6, 0), match.start(), {
             "type": "orthographe",
             "severity": "warning",
-            "message": f"Lettre non-standard détectée dans '{word}'",
+            "message": f"Lettre non-standard détectée dans '{match.group()}'",
             "suggestion": "Vérifier l'orthographe - w, q, x sont rares en Malagasy",
+            "word": match.group()
+        }))
+    
+    # Règle 8 : Détection de mélange de langues (si le mot n'est pas malagasy)
+    if word_lower in FOREIGN_INDICATORS:
+        findings.append(((_FOREIGN_RULE, 0), 0, {
+            "type": "langue",
+            "severity": "info",
+            "message": f"Mot '{word}' semble être en {FOREIGN_INDICATORS[word_lower]}",
+            "suggestion": "Vérifier si c'est intentionnel",
             "word": word
-        })
+        }))
+    
+    return findings
+
+
+def word_rule_flags(word):
+    """Règles 1 à 6 et 8 que déclenche un mot, sous forme de bits (0 : aucune)"""
+    flags = 0
+    for (rule, _), _, _ in _word_findings(word):
+        flags |= 1 << (rule - 1)
+    return flags
+
+
+def symbolic_check(text, dictionary=None, features=None, memo=None):
+    """
+    Analyse le texte pour détecter les erreurs symboliques selon des règles linguistiques malagasy.
+    Retourne une liste de suggestions avec justification.
     
-    # ============================================================
-    # Règle 7 : Validation avec le dictionnaire (Levenshtein)
-    # ============================================================
-    dict_suggestions = validate_with_dictionary(text, DICTIONARY)
-    suggestions.extend(dict_suggestions)
+    dictionary : dictionnaire à utiliser (par défaut DICTIONARY) ; permet
+    à une requête de garder la même version pendant un rechargement.
+    features : table des mots du vocabulaire (WordFeatureTable) ; un mot
+    connu qui n'y déclenche aucune règle est écarté en une recherche.
+    memo : résultats par mot de la requête (TokenMemo), partagés avec
+    les autres étapes de l'analyse.
     
-    # ============================================================
-    # Règle 8 : Détection de mélange de langues (optionnel)
-    # ============================================================
-    foreign_indicators = {
-        "le": "français", "la": "français", "les": "français",
-        "the": "anglais", "is": "anglais", "are": "anglais",
-        "et": "français", "ou": "français"
-    }
+    Les règles sont évaluées une fois par mot distinct ; les suggestions
+    sont rendues règle par règle, dans l'ordre du texte.
+    """
+    if dictionary is None:
+        dictionary = DICTIONARY
+    if memo is None:
+        memo = TokenMemo()
+    
+    buckets = {}
+    dictionary_words = None
     
-    for i, word in enumerate(words):
-        word_lower = word.lower().strip(".,!?;:")
-        if word_lower in foreign_indicators:
-            # Ne pas signaler si le mot existe aussi en malagasy
-            if not DICTIONARY.word_exists(word_lower):
-                suggestions.append({
-                    "position": text.find(word),
-                    "type": "langue",
-                    "severity": "info",
-                    "message": f"Mot '{word}' semble être en {foreign_indicators[word_lower]}",
-                    "suggestion": "Vérifier si c'est intentionnel",
-                    "word": word
+    def closest(word_clean):
+        nonlocal dictionary_words
+        if dictionary_words is None:
+            dictionary_words = list(dictionary.words)
+        return closest_dictionary_words(word_clean, dictionary_words)
+    
+    for token in TOKEN_PATTERN.finditer(text):
+        word = token.group()
+        word_clean = word.lower().strip(".,!?;:\"'")
+        known = bool(word_clean) and memo.get("known", word_clean, dictionary.word_exists)
+        
+        # Mot du vocabulaire sans aucune règle déclenchée : rien à signaler
+        if known and features is not None and features.rule_flags(word_clean) == 0:
+            continue
+        
+        findings = memo.get("rules", word, _word_findings)
+        
+        for key, offset, finding in findings:
+            if key[0] == _FOREIGN_RULE and known:
+                # Ne pas signaler si le mot existe aussi en malagasy
+                continue
+            buckets.setdefault(key, []).append({"position": token.start() + offset, **finding})
+        
+        # Règle 7 : Validation avec le dictionnaire (Levenshtein)
+        if word_clean and not known:
+            alternatives = memo.get("alternatives", word_clean, closest)
+            if alternatives:
+                buckets.setdefault((_DICTIONARY_RULE, 0), []).append({
+                    "position": token.start(),
+                    "type": "dictionnaire",
+                    "severity": "warning",
+                    "message": f"Mot '{word}' inconnu",
+                    "suggestion": f"Suggestions : {', '.join(alternatives)}",
+                    "word": word,
+                    "alternatives": alternatives
                 })
     
+    suggestions = []
+    for key in sorted(buckets):
+        suggestions.extend(buckets[key])
     return suggestions
 
 
@@ -0,0 +1,165 @@
+# nlp/user_overlay.py
+"""
+Dictionnaires personnels (par utilisateur ou par équipe).
+
+Chaque propriétaire possède une petite couche de mots stockée dans SQLite
+(data/user_words.sqlite3). Une requête qui fournit un user_id voit une
+vue OverlayDictionary : la couche personnelle est consultée puis le
+dictionnaire partagé, sans jamais copier ce dernier. Les couches lues
+sont gardées dans un petit cache LRU, invalidé à chaque modification
+(y compris par un autre worker).
+"""
+
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.nlp.dictionary_loader import LayeredWordSet
+
+USER_WORDS_DB_PATH = "data/user_words.sqlite3"
+
+# Longueur maximale d'un identifiant d'utilisateur ou d'équipe
+MAX_OWNER_LENGTH = 64
+
+
+class OverlayDictionary:
+    """
+    Vue d'un dictionnaire partagé augmenté d'une couche personnelle.
+    Expose la même interface de lecture que MalagasyDictionary.
+    """
+
+    def __init__(self, base, overlay: Dict[str, Optional[str]]):
+        """
+        Args:
+            base: Dictionnaire partagé (MalagasyDictionary)
+            overlay: Mots personnels -> définition (ou None)
+        """
+        self.base = base
+        self.overlay = overlay
+        # Les mots de la couche déjà présents dans la base ne sont pas dupliqués
+        self.words = LayeredWordSet(base.words, overlay)
+
+    @property
+    def definitions(self):
+        return self.base.definitions
+
+    def word_exists(self, word):
+        """Vérifie si un mot existe (couche personnelle puis base)"""
+        word_clean = word.lower().strip(".,!?;:\"'")
+        return word_clean in self.overlay or self.base.word_exists(word_clean)
+
+    def get_definition(self, word):
+        """Définition personnelle en priorité, sinon celle de la base"""
+        word_clean = word.lower().strip(".,!?;:\"'")
+        definition = self.overlay.get(word_clean)
+        if definition:
+            return definition
+        return self.base.get_definition(word_clean)
+
+    def get_statistics(self):
+        """Statistiques de la base et taille de la couche personnelle"""
+        stats = self.base.get_statistics()
+        stats["overlay_words"] = len(self.overlay)
+        return stats
+
+
+class UserOverlayStore:
+    """
+    Stockage SQLite des couches personnelles, avec cache LRU des couches lues
+    """
+
+    def __init__(self, db_path: str = USER_WORDS_DB_PATH, cache_size: int = 256):
+        """
+        Args:
+            db_path: Base SQLite (créée au premier accès)
+            cache_size: Nombre de couches gardées en mémoire
+        """
+        self.db_path = Path(db_path)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = None
+        self._data_version = None
+
+    def _connect(self):
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            # WAL : les lectures des autres workers ne bloquent pas les écritures
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_words ("
+                " owner TEXT NOT NULL,"
+                " word TEXT NOT NULL,"
+                " definition TEXT,"
+                " PRIMARY KEY (owner, word)"
+                ") WITHOUT ROWID"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def get_words(self, owner: str) -> Dict[str, Optional[str]]:
+        """Couche personnelle d'un propriétaire : mot -> définition"""
+        with self._lock:
+            connection = self._connect()
+            # data_version change quand un autre worker a modifié la base
+            data_version = connection.execute("PRAGMA data_version").fetchone()[0]
+            if data_version != self._data_version:
+                self._cache.clear()
+                self._data_version = data_version
+
+            words = self._cache.get(owner)
+            if words is not None:
+                self._cache.move_to_end(owner)
+                return words
+
+            rows = connection.execute(
+                "SELECT word, definition FROM user_words WHERE owner = ?", (owner,)
+            ).fetchall()
+            words = dict(rows)
+
+            self._cache[owner] = words
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return words
+
+    def add_word(self, owner: str, word: str, definition: str = None) -> str:
+        """Ajoute (ou met à jour) un mot de la couche personnelle"""
+        word_clean = word.lower().strip()
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO user_words (owner, word, definition) VALUES (?, ?, ?)",
+                (owner, word_clean, definition)
+            )
+            connection.commit()
+            self._cache.pop(owner, None)
+        return word_clean
+
+    def remove_word(self, owner: str, word: str) -> bool:
+        """Retire un mot de la couche personnelle"""
+        word_clean = word.lower().strip()
+        with self._lock:
+            connection = self._connect()
+            cursor = connection.execute(
+                "DELETE FROM user_words WHERE owner = ? AND word = ?", (owner, word_clean)
+            )
+            connection.commit()
+            self._cache.pop(owner, None)
+        return cursor.rowcount > 0
+
+    def overlay(self, owner: str, base) -> OverlayDictionary:
+        """Vue du dictionnaire partagé augmentée de la couche du propriétaire"""
+        return OverlayDictionary(base, self.get_words(owner))
+
+    def get_statistics(self):
+        """Retourne des statistiques sur les couches personnelles"""
+        with self._lock:
+            cached = len(self._cache)
+        return {
+            "cached_overlays": cached,
+            "cache_size": self.cache_size
+        }
@@ -0,0 +1,157 @@
+# nlp/word_features.py
+"""
+Table des caractéristiques de chaque mot du vocabulaire, construite une
+fois au chargement : racine, règles symboliques déclenchées
+(phonotactique, affixes, lettres non malagasy, mot étranger) et polarité
+de sentiment.
+
+La plupart des mots d'un texte réel sont connus et ne déclenchent
+aucune règle : symbolic_check les écarte en une recherche dans cette
+table, et seuls les mots inconnus ou signalés passent par les règles et
+la recherche approchée. La présence dans le dictionnaire n'est pas
+stockée : elle dépend du dictionnaire de la requête (mots personnels,
+variantes).
+"""
+
+from array import array
+from typing import Dict, Iterable, Optional
+
+from backend.nlp.symbolic import (
+    FOREIGN_WORD,
+    FORBIDDEN_COMBINATION,
+    NK_START,
+    NON_MALAGASY_LETTER,
+    SHORT_PREFIXED_ROOT,
+    SHORT_SUFFIXED_ROOT,
+    TRIPLE_VOWEL,
+    word_rule_flags
+)
+
+# Mots positifs en malagasy
+POSITIVE_WORDS = (
+    "faly", "tsara", "mahafaly", "mendrika", "soa", "marina",
+    "mahafinaritra", "mahagaga", "be", "lehibe", "misaotra",
+    "fitiavana", "sambatra", "mazava", "malaza"
+)
+
+# Mots négatifs en malagasy
+NEGATIVE_WORDS = (
+    "malahelo", "ratsy", "mafy", "sarotra", "tsy", "marary",
+    "sosotra", "diso", "mangetaheta", "mangidy", "mahantra",
+    "kivy", "mampalahelo"
+)
+
+_RULE_NAMES = (
+    (FORBIDDEN_COMBINATION, "forbidden_combination"),
+    (SHORT_PREFIXED_ROOT, "short_prefixed_root"),
+    (SHORT_SUFFIXED_ROOT, "short_suffixed_root"),
+    (TRIPLE_VOWEL, "triple_vowel"),
+    (NK_START, "nk_start"),
+    (NON_MALAGASY_LETTER, "non_malagasy_letter"),
+    (FOREIGN_WORD, "foreign_indicator"),
+)
+
+
+def word_polarity(word: str) -> int:
+    """Polarité de sentiment d'un mot : 1, -1 ou 0"""
+    if word in POSITIVE_WORDS:
+        return 1
+    if word in NEGATIVE_WORDS:
+        return -1
+    return 0
+
+
+class WordFeatureTable:
+    """
+    Caractéristiques des mots du vocabulaire en colonnes compactes
+    (drapeaux, identifiant de racine, polarité) indexées par mot
+    """
+
+    def __init__(self, words: Iterable[str], lemmatizer):
+        """
+        Args:
+            words: Vocabulaire (mots du dictionnaire)
+            lemmatizer: MalagasyLemmatizer (racines)
+        """
+        self.lemmatizer = lemmatizer
+        self._index = {}
+        self._flags = array("H")
+        self._root_ids = array("I")
+        self._polarity = array("b")
+        self._roots = []
+        root_ids = {}
+        self.flagged_words = 0
+
+        for word in words:
+            if word in self._index:
+                continue
+            flags = word_rule_flags(word)
+            if flags:
+                self.flagged_words += 1
+            root = lemmatizer.lemmatize(word)["root"]
+            root_id = root_ids.get(root)
+            if root_id is None:
+                root_id = root_ids[root] = len(self._roots)
+                self._roots.append(root)
+
+            self._index[word] = len(self._flags)
+            self._flags.append(flags)
+            self._root_ids.append(root_id)
+            self._polarity.append(word_polarity(word))
+
+    def __len__(self) -> int:
+        return len(self._flags)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._index
+
+    def rule_flags(self, word: str) -> Optional[int]:
+        """Règles symboliques déclenchées par un mot du vocabulaire (None si absent)"""
+        index = self._index.get(word)
+        if index is None:
+            return None
+        return self._flags[index]
+
+    def polarity(self, word: str) -> int:
+        """Polarité de sentiment d'un mot normalisé : 1, -1 ou 0"""
+        index = self._index.get(word)
+        if index is None:
+            return word_polarity(word)
+        return self._polarity[index]
+
+    def describe(self, word: str, dictionary) -> Dict:
+        """
+        Caractéristiques d'un mot normalisé ; calculées à la volée s'il
+        n'est pas dans la table
+
+        Args:
+            word: Mot normalisé
+            dictionary: Dictionnaire de la requête (présence du mot)
+        """
+        index = self._index.get(word)
+        if index is not None:
+            flags = self._flags[index]
+            root = self._roots[self._root_ids[index]]
+            polarity = self._polarity[index]
+        else:
+            flags = word_rule_flags(word)
+            root = self.lemmatizer.lemmatize(word)["root"]
+            polarity = word_polarity(word)
+
+        return {
+            "in_vocabulary": index is not None,
+            "in_dictionary": dictionary.word_exists(word),
+            "root": root,
+            "rules": [name for bit, name in _RULE_NAMES if flags & bit],
+            "non_malagasy_letters": bool(flags & NON_MALAGASY_LETTER),
+            "foreign_indicator": bool(flags & FOREIGN_WORD),
+            "polarity": polarity
+        }
+
+    def get_statistics(self) -> Dict:
+        """Retourne des statistiques sur la table"""
+        return {
+            "words": len(self),
+            "roots": len(self._roots),
+            "words_with_rules": self.flagged_words
+        }
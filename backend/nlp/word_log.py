@@ -0,0 +1,277 @@
+# nlp/word_log.py
+"""
+Journal persistant des mots ajoutés au dictionnaire.
+
+add_word ne réécrit plus les fichiers : chaque ajout est mis en tampon
+puis écrit en fin de journal (une ligne JSON par mot) par un thread de
+fond, avec un seul fsync par lot. Le journal est rejoué au chargement du
+dictionnaire.
+
+Une compaction périodique intègre le journal dans data/malagasy_words.txt
+(ajout en fin de fichier, la liste n'est pas retriée) et dans
+data/malagasy_dict.json pour les définitions, par écriture dans un
+fichier temporaire puis renommage atomique, reconstruit l'artefact
+binaire, puis vide le journal. Un verrou de fichier la sérialise avec les
+écritures des autres workers.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from backend.nlp.dictionary_loader import WORD_ARTIFACT_PATH, CompactWordSet, build_word_artifact
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou inter-processus
+    fcntl = None
+
+WORD_LOG_PATH = "data/added_words.log"
+
+
+def _replace_atomically(path: Path, write):
+    """Écrit path via un fichier temporaire (fsync puis renommage)"""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    tmp_path.replace(path)
+
+
+class WordLog:
+    """
+    Journal en ajout seul des mots ajoutés (partagé entre les rechargements
+    du dictionnaire)
+    """
+
+    def __init__(self, path: str = WORD_LOG_PATH, sync_interval: float = 1.0,
+                 words_path: str = "data/malagasy_words.txt",
+                 definitions_path: str = "data/malagasy_dict.json",
+                 artifact_path: str = WORD_ARTIFACT_PATH):
+        """
+        Args:
+            path: Fichier journal
+            sync_interval: Secondes entre deux écritures (un fsync par lot)
+            words_path: Liste de mots de base, cible de la compaction
+            definitions_path: Définitions de base, cible de la compaction
+            artifact_path: Artefact binaire des mots, reconstruit après compaction
+        """
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.words_path = Path(words_path)
+        self.definitions_path = Path(definitions_path)
+        self.artifact_path = Path(artifact_path)
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._compaction_thread = None
+        self.written_entries = 0
+        self.compactions = 0
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        if fcntl is None:
+            yield
+            return
+        lock_path = self.path.with_name(self.path.name + ".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def append(self, word: str, definition: str = None):
+        """
+        Ajoute une entrée au tampon (appelé par les requêtes, non bloquant).
+        Elle est durable au plus sync_interval secondes plus tard.
+        """
+        entry = {"w": word}
+        if definition:
+            entry["d"] = definition
+        with self._buffer_lock:
+            self._buffer.append(entry)
+        self._start_writer()
+
+    def flush(self) -> int:
+        """
+        Écrit le tampon en fin de journal avec un seul fsync
+
+        Returns:
+            Nombre d'entrées écrites
+        """
+        with self._buffer_lock:
+            entries, self._buffer = self._buffer, []
+        if not entries:
+            return 0
+
+        data = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._file_lock(exclusive=False):
+            # O_APPEND : les lignes des différents workers ne se chevauchent pas
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+        self.written_entries += len(entries)
+        return len(entries)
+
+    def _run_writer(self):
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"  Erreur lors de l'écriture du journal de mots : {e}")
+
+    def _start_writer(self):
+        if self._thread is None:
+            with self._buffer_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run_writer, name="word-log-writer",
+                                                    daemon=True)
+                    self._thread.start()
+
+    # ------------------------------------------------------------
+    # Relecture
+    # ------------------------------------------------------------
+
+    def replay(self):
+        """
+        Relit le journal (une dernière ligne tronquée par un arrêt brutal
+        est ignorée)
+
+        Yields:
+            (mot, définition ou None)
+        """
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                yield entry["w"], entry.get("d")
+
+    # ------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------
+
+    def compact(self) -> int:
+        """
+        Intègre le journal dans les fichiers de base puis le vide
+
+        Returns:
+            Nombre d'entrées intégrées
+        """
+        self.flush()
+
+        with self._file_lock(exclusive=True):
+            entries = list(self.replay())
+            if not entries:
+                return 0
+
+            added = list(dict.fromkeys(word for word, _ in entries))
+            definitions = {word: definition for word, definition in entries if definition}
+
+            # L'artefact n'est reconstruit que s'il était à jour avant la compaction
+            artifact_fresh = self._artifact_is_fresh()
+
+            self._fold_words(added)
+            if definitions:
+                self._fold_definitions(definitions)
+
+            if artifact_fresh:
+                artifact = CompactWordSet(str(self.artifact_path))
+                words = set(artifact)
+                words.update(added)
+                build_word_artifact(words, str(self.artifact_path), front_coded=artifact.front_coded)
+
+            # Une interruption avant cette ligne rejoue des mots déjà intégrés : sans effet
+            os.truncate(self.path, 0)
+
+        self.compactions += 1
+        print(f" Journal de mots compacté : {len(entries)} entrée(s) intégrée(s)")
+        return len(entries)
+
+    def _artifact_is_fresh(self) -> bool:
+        if not self.artifact_path.exists():
+            return False
+        if not self.words_path.exists():
+            return True
+        return self.artifact_path.stat().st_mtime >= self.words_path.stat().st_mtime
+
+    def _fold_words(self, added):
+        """Ajoute les nouveaux mots en fin de liste de base (fichier non retrié)"""
+        content = ""
+        if self.words_path.exists():
+            content = self.words_path.read_text(encoding="utf-8")
+        known = {line.strip().lower() for line in content.splitlines()}
+        new_words = [word for word in added if word not in known]
+        if not new_words:
+            return
+
+        if content and not content.endswith("\n"):
+            content += "\n"
+
+        def write(f):
+            f.write(content)
+            for word in new_words:
+                f.write(f"{word}\n")
+
+        self.words_path.parent.mkdir(parents=True, exist_ok=True)
+        _replace_atomically(self.words_path, write)
+
+    def _fold_definitions(self, definitions):
+        data = {}
+        if self.definitions_path.exists():
+            with open(self.definitions_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        data.update(definitions)
+
+        self.definitions_path.parent.mkdir(parents=True, exist_ok=True)
+        _replace_atomically(self.definitions_path,
+                            lambda f: json.dump(data, f, ensure_ascii=False, indent=2))
+
+    def _run_compaction(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"  Erreur lors de la compaction du journal de mots : {e}")
+
+    def start_compaction(self, interval: float = 600.0):
+        """Démarre la compaction périodique en arrière-plan"""
+        if self._compaction_thread is None:
+            self._compaction_thread = threading.Thread(target=self._run_compaction, args=(interval,),
+                                                       name="word-log-compaction", daemon=True)
+            self._compaction_thread.start()
+
+    def stop(self):
+        """Arrête les threads de fond et écrit ce qui reste en tampon"""
+        self._stop.set()
+        for thread in (self._thread, self._compaction_thread):
+            if thread is not None:
+                thread.join()
+        self._thread = None
+        self._compaction_thread = None
+        self.flush()
+
+    def get_statistics(self):
+        """Retourne des statistiques sur le journal"""
+        return {
+            "pending_entries": len(self._buffer),
+            "written_entries": self.written_entries,
+            "compactions": self.compactions,
+            "log_size_bytes": self.path.stat().st_size if self.path.exists() else 0
+        }
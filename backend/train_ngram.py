@@ -3,9 +3,14 @@
 Script pour entraîner le modèle N-gram sur un corpus de phrases malagasy
 """
 
-from nlp.algorithmic import NGramModel
+import sys
 from pathlib import Path
 
+# Permet de lancer le script depuis backend/ (chemins data/...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.nlp.algorithmic import NGramModel
+
 # ============================================================
 # CORPUS DE PHRASES MALAGASY
 # ============================================================
@@ -253,13 +258,14 @@ CORPUS_PROVERBES = [
 # FONCTION D'ENTRAÎNEMENT
 # ============================================================
 
-def train_ngram_model(corpus: list = None, n: int = 2, save_path: str = "data/ngram_model.json"):
+def train_ngram_model(corpus: list = None, n: int = 3, save_path: str = "data/ngram_model.json"):
     """
     Entraîne le modèle N-gram sur un corpus
     
     Args:
         corpus: Liste de phrases (si None, utilise le corpus par défaut)
-        n: Taille des n-grams (2 = bigram, 3 = trigram)
+        n: Taille des n-grams (2 = bigram, 3 = trigram, 4 = 4-gram) ;
+           les contextes plus courts sont aussi gardés pour le repli
         save_path: Chemin de sauvegarde du modèle
     """
     
@@ -286,10 +292,13 @@ def train_ngram_model(corpus: list = None, n: int = 2, save_path: str = "data/ng
     print(f"   - Mots uniques : {unique_words}")
     print(f"   - N-grams appris : {total_ngrams}")
     
-    # Sauvegarder
+    # Sauvegarder (JSON lisible + binaire compact chargé par l'API)
     Path(save_path).parent.mkdir(exist_ok=True)
     model.save_model(save_path)
     print(f"\n Modèle sauvegardé : {save_path}")
+    binary_path = str(Path(save_path).with_suffix(".bin"))
+    model.save_binary(binary_path)
+    print(f" Modèle binaire sauvegardé : {binary_path}")
     
     # Tests rapides
     print(f"\n Tests de prédiction :")
@@ -304,8 +313,8 @@ def train_ngram_model(corpus: list = None, n: int = 2, save_path: str = "data/ng
     for context in test_contexts:
         predictions = model.predict_next_word(context, top_k=3)
         print(f"\n   Après '{' '.join(context)}' :")
-        for word, prob in predictions:
-            print(f"      - {word} ({prob:.1%})")
+        for word, score in predictions:
+            print(f"      - {word} (score {score:.3f})")
     
     print("\n" + "=" * 70)
     print(" ENTRAÎNEMENT TERMINÉ !")
@@ -0,0 +1,152 @@
+# train_ngram_large.py
+"""
+Entraînement du modèle N-gram sur de gros corpus (Wikipedia, Bible...).
+
+Les fichiers texte sont lus en flux, découpés en tranches d'octets
+(alignées sur les fins de ligne) et comptés en parallèle par plusieurs
+processus. Les comptes partiels sont fusionnés au fil de l'eau, les
+n-grams rares peuvent être élagués, puis le modèle binaire compact est
+écrit directement.
+
+Usage (depuis backend/) :
+    python train_ngram_large.py corpus/wiki.txt corpus/bible.txt \\
+        -n 3 --workers 4 --min-count 2 --output data/ngram_model.bin
+"""
+
+import argparse
+import os
+import sys
+import time
+from multiprocessing import Pool
+from pathlib import Path
+
+# Permet de lancer le script depuis backend/ (chemins data/...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.nlp.algorithmic import NGramModel, corpus_sentences
+
+# Taille visée d'une tranche de fichier confiée à un processus
+SHARD_SIZE = 32 * 1024 * 1024
+
+
+# ============================================================
+# LECTURE EN FLUX
+# ============================================================
+
+def iter_shard_lines(filepath: str, start: int, end: int):
+    """
+    Lit les lignes d'une tranche [start, end) d'un fichier.
+    Une ligne appartient à la tranche où elle commence.
+    """
+    with open(filepath, "rb") as f:
+        if start > 0:
+            # Reculer d'un octet : si start tombe juste après un \n,
+            # la ligne commençant à start appartient bien à cette tranche
+            f.seek(start - 1)
+            f.readline()
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            yield line.decode("utf-8", errors="ignore")
+
+
+def make_shards(filepaths, shard_size: int = SHARD_SIZE):
+    """Découpe les fichiers en tranches d'octets"""
+    shards = []
+    for filepath in filepaths:
+        size = os.path.getsize(filepath)
+        for start in range(0, max(size, 1), shard_size):
+            shards.append((filepath, start, min(start + shard_size, size)))
+    return shards
+
+
+# ============================================================
+# COMPTAGE PARALLÈLE
+# ============================================================
+
+def count_shard(args):
+    """Compte les n-grams d'une tranche (exécuté dans un processus fils)"""
+    filepath, start, end, n = args
+    model = NGramModel(n=n)
+    model.update_counts(corpus_sentences(iter_shard_lines(filepath, start, end)))
+    return dict(model.word_freq), {context: dict(c) for context, c in model.ngrams.items()}
+
+
+def train_from_files(filepaths, n: int = 3, workers: int = None, min_count: int = 1,
+                     shard_size: int = SHARD_SIZE) -> NGramModel:
+    """
+    Entraîne un modèle N-gram sur des fichiers texte, en parallèle
+
+    Args:
+        filepaths: Fichiers du corpus (texte brut UTF-8)
+        n: Ordre du modèle
+        workers: Nombre de processus (défaut : nombre de CPU)
+        min_count: Élaguer les n-grams vus moins de min_count fois
+        shard_size: Taille des tranches en octets
+
+    Returns:
+        Modèle entraîné (tables de prédiction calculées)
+    """
+    shards = make_shards(filepaths, shard_size)
+    tasks = [(filepath, start, end, n) for filepath, start, end in shards]
+    model = NGramModel(n=n)
+
+    print(f" {len(shards)} tranche(s), {workers or os.cpu_count()} processus")
+
+    with Pool(processes=workers) as pool:
+        # Fusion au fil de l'eau : un seul résultat partiel en mémoire à la fois
+        for done, (word_freq, ngrams) in enumerate(pool.imap_unordered(count_shard, tasks), 1):
+            model.merge_counts(word_freq, ngrams)
+            print(f"   - tranche {done}/{len(tasks)} fusionnée")
+
+    if min_count > 1:
+        removed = model.prune(min_count)
+        print(f" Élagage : {removed} n-grams rares supprimés")
+
+    # Tables de prédiction : vocabulaire et successeurs classés une seule fois
+    started = time.time()
+    model.finalize()
+    print(f" Tables de prédiction calculées en {time.time() - started:.1f} s")
+    return model
+
+
+# ============================================================
+# SCRIPT PRINCIPAL
+# ============================================================
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraînement N-gram sur de gros corpus")
+    parser.add_argument("files", nargs="+", help="Fichiers texte du corpus")
+    parser.add_argument("-n", type=int, default=3, help="Ordre du modèle (défaut : 3)")
+    parser.add_argument("--workers", type=int, default=None, help="Nombre de processus")
+    parser.add_argument("--min-count", type=int, default=1, help="Compte minimal d'un n-gram")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="Taille des tranches (octets)")
+    parser.add_argument("--output", default="data/ngram_model.bin", help="Modèle binaire de sortie")
+    parser.add_argument("--json", default=None, help="Écrire aussi le modèle au format JSON")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print(f"ENTRAÎNEMENT DU MODÈLE N-GRAM SUR CORPUS (n={args.n})")
+    print("=" * 70)
+
+    started = time.time()
+    model = train_from_files(args.files, n=args.n, workers=args.workers,
+                             min_count=args.min_count, shard_size=args.shard_size)
+
+    print(f"\n Statistiques :")
+    print(f"   - Mots totaux : {model.total_words}")
+    print(f"   - Mots uniques : {len(model.word_freq)}")
+    print(f"   - Contextes appris : {len(model.ngrams)}")
+
+    model.save_binary(args.output)
+    print(f"\n Modèle binaire sauvegardé : {args.output}")
+    if args.json:
+        model.save_model(args.json)
+        print(f" Modèle JSON sauvegardé : {args.json}")
+
+    print(f" Durée : {time.time() - started:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -249,10 +249,15 @@ function App() {
         const selectedText = editor.getText(selection.index, selection.length);
         
         try {
-          const result = await lemmatizer.findRoot(selectedText.trim());
+          // Tous les mots de la sélection en une seule requête
+          const words = selectedText
+            .split(/\s+/)
+            .map((word) => word.replace(/^[.,!?;:"']+|[.,!?;:"']+$/g, ''))
+            .filter(Boolean);
+          const results = await lemmatizer.findRoots(words);
           setSidePanelContent({
             type: 'lemmatization',
-            data: result
+            data: results
           });
           setShowSidePanel(true);
         } catch (error) {
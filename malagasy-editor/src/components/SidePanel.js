@@ -58,17 +58,19 @@ const SidePanel = ({ content, onClose }) => {
           <div className="panel-content">
             <h3>🔍 Fakany</h3>
             <div className="lemma-result">
-              <div className="word-pair">
-                <div className="source-word">
-                  <span className="label">Teny:</span>
-                  <span className="word">{content.data.word}</span>
+              {content.data.map((item, index) => (
+                <div key={index} className="word-pair">
+                  <div className="source-word">
+                    <span className="label">Teny:</span>
+                    <span className="word">{item.original}</span>
+                  </div>
+                  <div className="arrow">→</div>
+                  <div className="target-word">
+                    <span className="label">Faka:</span>
+                    <span className="word">{item.root}</span>
+                  </div>
                 </div>
-                <div className="arrow">→</div>
-                <div className="target-word">
-                  <span className="label">Faka:</span>
-                  <span className="word">{content.data.root}</span>
-                </div>
-              </div>
+              ))}
             </div>
           </div>
         );
@@ -7,20 +7,21 @@ class AutoComplete {
 
   /**
    * Autocomplétion d'un préfixe
+   * maxEdits : fautes de frappe tolérées dans le préfixe (complétions exactes en premier)
    */
-  async autocomplete(prefix, limit = 10) {
+  async autocomplete(prefix, limit = 10, maxEdits = 1) {
     if (prefix.length < 2) {
       return [];
     }
 
-    const cacheKey = `${prefix}-${limit}`;
+    const cacheKey = `${prefix}-${limit}-${maxEdits}`;
     if (this.cache.has(cacheKey)) {
       return this.cache.get(cacheKey);
     }
 
     try {
       const response = await fetch(
-        `${API_BASE_URL}/autocomplete?prefix=${encodeURIComponent(prefix)}&limit=${limit}`
+        `${API_BASE_URL}/autocomplete?prefix=${encodeURIComponent(prefix)}&limit=${limit}&max_edits=${maxEdits}`
       );
 
       const data = await response.json();
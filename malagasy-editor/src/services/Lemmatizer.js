@@ -1,5 +1,8 @@
 import API_BASE_URL from './api';
 
+// Taille maximale d'un lot accepté par /lemmatize/batch (MAX_LEMMATIZE_BATCH)
+const MAX_BATCH_SIZE = 1000;
+
 class Lemmatizer {
   constructor() {
     this.cache = new Map();
@@ -9,44 +12,65 @@ class Lemmatizer {
    * Trouve la racine d'un mot
    */
   async findRoot(word) {
-    if (this.cache.has(word)) {
-      return this.cache.get(word);
+    const [result] = await this.findRoots([word]);
+    return result;
+  }
+
+  /**
+   * Trouve la racine de plusieurs mots, par lots de MAX_BATCH_SIZE
+   * (seuls les mots absents du cache sont envoyés, sans doublons)
+   */
+  async findRoots(words) {
+    const missing = [...new Set(words.filter((word) => !this.cache.has(word)))];
+
+    for (let start = 0; start < missing.length; start += MAX_BATCH_SIZE) {
+      await this.fetchRoots(missing.slice(start, start + MAX_BATCH_SIZE));
     }
 
+    return words.map((word) => this.cache.get(word) || {
+      original: word,
+      root: word,
+      prefix: '',
+      suffix: '',
+      has_prefix: false,
+      has_suffix: false
+    });
+  }
+
+  /**
+   * Lemmatise un lot de mots et le met en cache
+   * (en cas d'erreur, les mots du lot gardent leur forme d'origine)
+   */
+  async fetchRoots(batch) {
     try {
-      const response = await fetch(`${API_BASE_URL}/lemmatize`, {
+      const response = await fetch(`${API_BASE_URL}/lemmatize/batch`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ word }),
+        body: JSON.stringify({ words: batch }),
       });
 
+      if (!response.ok) {
+        throw new Error('Erreur lors de la lemmatisation');
+      }
+
       const data = await response.json();
-      
-      const result = {
-        original: data.original,
-        root: data.root,
-        prefix: data.prefix,
-        suffix: data.suffix,
-        has_prefix: data.has_prefix,
-        has_suffix: data.has_suffix
-      };
-      
-      this.cache.set(word, result);
-      return result;
+
+      data.results.forEach((item, index) => {
+        this.cache.set(batch[index], {
+          original: item.original,
+          root: item.root,
+          prefix: item.prefix,
+          suffix: item.suffix,
+          has_prefix: item.has_prefix,
+          has_suffix: item.has_suffix
+        });
+      });
     } catch (error) {
-      console.error('Erreur findRoot:', error);
-      return {
-        original: word,
-        root: word,
-        prefix: '',
-        suffix: '',
-        has_prefix: false,
-        has_suffix: false
-      };
+      console.error('Erreur findRoots:', error);
     }
   }
 }
 
-export default Lemmatizer;
\ No newline at end of file
+export default Lemmatizer;